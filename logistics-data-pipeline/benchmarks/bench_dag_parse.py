@@ -0,0 +1,241 @@
+"""
+DAG Parse Benchmark
+Import-time report (python -X importtime) for the DAG file and each task's start-up imports
+
+Usage:
+    python benchmarks/bench_dag_parse.py [--repeat 5] [--budget-ms 150] [--output results.json]
+
+Exits non-zero when the DAG file pulls a heavy module into the scheduler's
+parse loop, or when its own import time exceeds --budget-ms.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCRIPTS_DIR = os.path.join(ROOT, 'scripts')
+DAG_PATH = os.path.join(ROOT, 'dags', 'logistics_pipeline_dag.py')
+CONFIG_PATH = os.path.join(ROOT, 'config', 'config.yaml')
+
+sys.path.insert(0, SCRIPTS_DIR)
+
+from pipeline_config import load_config
+
+# Modules that belong in task callables, never at DAG parse time
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'sqlalchemy', 'requests', 'yaml')
+
+# What each kind of task imports when it starts
+TASK_IMPORTS = {
+    'extract': ['pipeline_config', 'extractors.citybikes_extractor', 'extractors.flights_extractor',
+                'artifacts.artifact_store', 'monitoring.metrics'],
+    'transform': ['transformers.bikes_transformer', 'transformers.flights_transformer', 'transformers.dtypes'],
+    'load': ['loaders.data_loader'],
+}
+
+AIRFLOW_BASELINE = 'import airflow; from airflow.operators.python import PythonOperator'
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Parse the lines python -X importtime writes to stderr
+
+    Args:
+        stderr: Captured stderr of the child process
+
+    Returns:
+        One entry per import: module, depth, self_us and cumulative_us
+    """
+    entries = []
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.rstrip()
+        entries.append({
+            'module': module.strip(),
+            'depth': (len(module) - len(module.lstrip())) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+        })
+
+    return entries
+
+
+def top_level_imports(path: str) -> Set[str]:
+    """
+    Modules imported when a file is executed, ignoring function bodies and
+    `if TYPE_CHECKING:` blocks
+
+    Works without Airflow installed, so the parse-time rule can be checked
+    anywhere.
+    """
+    with open(path, 'r') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = set()
+
+    def visit(statements: Sequence[ast.stmt]):
+        for node in statements:
+            if isinstance(node, ast.Import):
+                modules.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                modules.add(node.module)
+            elif isinstance(node, ast.If):
+                if not (isinstance(node.test, ast.Name) and node.test.id == 'TYPE_CHECKING'):
+                    visit(node.body)
+                visit(node.orelse)
+            elif isinstance(node, (ast.Try, ast.With)):
+                visit(node.body)
+
+    visit(tree.body)
+    return modules
+
+
+def heavy(modules: Set[str]) -> List[str]:
+    """The heavy packages among a set of module names"""
+    return sorted({module.split('.')[0] for module in modules} & set(HEAVY_MODULES))
+
+
+def run_importtime(code: str, repeat: int) -> Dict[str, Any]:
+    """
+    Run code in fresh interpreters under -X importtime
+
+    Args:
+        code: Python source passed to -c
+        repeat: Number of interpreter runs; the median wall time is reported
+
+    Returns:
+        Wall time, total import time and the parsed imports of the last run
+    """
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([SCRIPTS_DIR, os.environ.get('PYTHONPATH', '')])}
+    wall_times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, cwd=ROOT, env=env
+        )
+        wall_times.append(time.perf_counter() - start)
+
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    entries = parse_importtime(result.stderr)
+    return {
+        'wall_ms': statistics.median(wall_times) * 1000,
+        'import_ms': sum(entry['cumulative_us'] for entry in entries if entry['depth'] == 0) / 1000,
+        'imports': entries,
+    }
+
+
+def airflow_available() -> bool:
+    return subprocess.run([sys.executable, '-c', 'import airflow'], capture_output=True).returncode == 0
+
+
+def bench_dag(repeat: int) -> Optional[Dict[str, Any]]:
+    """Import the DAG file in a fresh interpreter, minus the cost of importing Airflow itself"""
+    if not airflow_available():
+        return None
+
+    baseline = run_importtime(AIRFLOW_BASELINE, repeat)
+    dag = run_importtime(f"{AIRFLOW_BASELINE}; import runpy; runpy.run_path({DAG_PATH!r})", repeat)
+
+    baseline_modules = {entry['module'] for entry in baseline['imports']}
+    added = [entry for entry in dag['imports'] if entry['module'] not in baseline_modules]
+
+    return {
+        'wall_ms': dag['wall_ms'] - baseline['wall_ms'],
+        'import_ms': sum(entry['self_us'] for entry in added) / 1000,
+        'added_modules': sorted(entry['module'] for entry in added),
+        'heavy_modules': heavy({entry['module'] for entry in added}),
+    }
+
+
+def bench_config(repeat: int) -> Dict[str, float]:
+    """Time load_config with a cold JSON cache and with a warm one (as a new process sees it)"""
+    import pipeline_config
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold, warm = [], []
+
+        for _ in range(repeat):
+            for cache_file in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, cache_file))
+
+            for timings in (cold, warm):
+                pipeline_config._loaded.clear()
+                start = time.perf_counter()
+                load_config(CONFIG_PATH, cache_dir=cache_dir)
+                timings.append(time.perf_counter() - start)
+
+    return {'cold_ms': statistics.median(cold) * 1000, 'cached_ms': statistics.median(warm) * 1000}
+
+
+def top_imports(entries: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Slowest top-level imports by cumulative time"""
+    roots = [entry for entry in entries if entry['depth'] == 0]
+    return sorted(roots, key=lambda entry: entry['cumulative_us'], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per measurement')
+    parser.add_argument('--budget-ms', type=float, default=150.0, help="Max import time the DAG file adds to Airflow's")
+    parser.add_argument('--top', type=int, default=5, help='Slowest imports listed per task kind')
+    parser.add_argument('--output', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    failures = []
+    results: Dict[str, Any] = {'tasks': {}}
+
+    static_heavy = heavy(top_level_imports(DAG_PATH))
+    results['dag_static_heavy_imports'] = static_heavy
+    if static_heavy:
+        failures.append(f"DAG imports {', '.join(static_heavy)} at module level")
+
+    dag = bench_dag(args.repeat)
+    results['dag'] = dag
+    if dag is None:
+        print("DAG parse: skipped, Airflow is not installed (static import check only)")
+    else:
+        print(f"DAG parse: +{dag['wall_ms']:.0f} ms wall, +{dag['import_ms']:.1f} ms imports "
+              f"({len(dag['added_modules'])} modules beyond Airflow)")
+        if dag['heavy_modules']:
+            failures.append(f"DAG parse imports {', '.join(dag['heavy_modules'])}")
+        if dag['import_ms'] > args.budget_ms:
+            failures.append(f"DAG imports take {dag['import_ms']:.0f} ms, budget {args.budget_ms:.0f} ms")
+
+    config = bench_config(args.repeat)
+    results['config'] = config
+    print(f"Config load: {config['cold_ms']:.2f} ms parsing YAML, {config['cached_ms']:.2f} ms from the JSON cache")
+
+    for kind, modules in TASK_IMPORTS.items():
+        task = run_importtime('import ' + ', '.join(modules), args.repeat)
+        results['tasks'][kind] = {'wall_ms': task['wall_ms'], 'import_ms': task['import_ms']}
+
+        print(f"{kind} task start-up: {task['wall_ms']:.0f} ms wall, {task['import_ms']:.0f} ms imports")
+        for entry in top_imports(task['imports'], args.top):
+            print(f"  {entry['cumulative_us'] / 1000:8.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
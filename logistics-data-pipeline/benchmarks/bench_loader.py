@@ -0,0 +1,56 @@
+"""
+Loader Benchmark
+Compares DataFrame.to_sql and the SQLite bulk load path
+
+Usage:
+    python benchmarks/bench_loader.py --rows 1000000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.generators import generate_bike_networks
+from transformers.bikes_transformer import BikesTransformer
+from loaders.data_loader import DataLoader
+
+
+def bench_load(df, load_method: str) -> float:
+    """Load df into a fresh database and return the wall time in seconds"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        loader = DataLoader(os.path.join(tmp_dir, 'bench.db'), load_method=load_method)
+
+        start = time.perf_counter()
+        loader.load_bikes(df)
+        elapsed = time.perf_counter() - start
+
+        assert loader.get_record_counts()['bike_stations'] == len(df)
+        loader.db_manager.engine.dispose()
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    df = BikesTransformer.transform(generate_bike_networks(args.rows), columnar=True)
+
+    print(f"DataLoader.load_bikes ({len(df)} rows)")
+    results = {}
+    for method in DataLoader.LOAD_METHODS:
+        results[method] = bench_load(df, method)
+        print(f"  {method:7s} {results[method]:.2f}s  {len(df) / results[method]:,.0f} rows/sec")
+
+    print(f"  speedup: {results['to_sql'] / results['bulk']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Station Index Benchmark
+Measures nearest-station and radius query latency on a large snapshot
+
+Usage:
+    python benchmarks/bench_station_index.py --stations 100000 --queries 1000
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.generators import generate_bike_networks
+from transformers.bikes_transformer import BikesTransformer
+from loaders.station_index import StationIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stations', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    df = BikesTransformer.transform(generate_bike_networks(args.stations), columnar=True)
+
+    index = StationIndex()
+    start = time.perf_counter()
+    index.update(df)
+    print(f"StationIndex ({len(index)} stations)")
+    print(f"  build           {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    index.update(df)
+    print(f"  update          {time.perf_counter() - start:.3f}s")
+
+    rng = random.Random(7)
+    sample = df.sample(min(args.queries, len(df)), random_state=7)
+    points = [
+        (lat + rng.uniform(-0.01, 0.01), lon + rng.uniform(-0.01, 0.01))
+        for lat, lon in zip(sample['latitude'], sample['longitude'])
+    ]
+
+    for label, query in (
+        ('nearest k=5', lambda lat, lon: index.nearest(lat, lon, k=5, min_bikes=3)),
+        ('radius 500m', lambda lat, lon: index.within_radius(lat, lon, 0.5, min_bikes=3)),
+    ):
+        start = time.perf_counter()
+        for lat, lon in points:
+            query(lat, lon)
+        per_query = (time.perf_counter() - start) / len(points)
+        print(f"  {label:15s} {per_query * 1000:.3f} ms/query")
+
+
+if __name__ == '__main__':
+    main()
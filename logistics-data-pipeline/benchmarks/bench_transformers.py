@@ -0,0 +1,73 @@
+"""
+Transformer Benchmark
+Compares row-wise and columnar/vectorized transform throughput on synthetic data
+
+Usage:
+    python benchmarks/bench_transformers.py --stations 100000 --flights 50000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.generators import generate_bike_networks, generate_flights_by_airport
+from transformers.bikes_transformer import BikesTransformer
+from transformers.flights_transformer import FlightsTransformer
+
+
+def time_call(func, *args, repeat: int = 3, **kwargs) -> float:
+    """Return the best wall time in seconds over repeat runs"""
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def bench_bikes(stations: int, repeat: int):
+    """Benchmark BikesTransformer row-wise vs columnar paths"""
+    networks = generate_bike_networks(stations)
+
+    rows = time_call(BikesTransformer.transform, networks, repeat=repeat)
+    columnar = time_call(BikesTransformer.transform, networks, columnar=True, repeat=repeat)
+
+    print(f"BikesTransformer ({stations} stations, best of {repeat})")
+    print(f"  rows:     {rows:.3f}s  {stations / rows:,.0f} rows/sec")
+    print(f"  columnar: {columnar:.3f}s  {stations / columnar:,.0f} rows/sec")
+    print(f"  speedup:  {rows / columnar:.1f}x")
+
+
+def bench_flights(flights: int, repeat: int):
+    """Benchmark FlightsTransformer per-flight vs vectorized paths"""
+    flights_by_airport = generate_flights_by_airport(flights)
+
+    rows = time_call(FlightsTransformer.transform, flights_by_airport, repeat=repeat)
+    vectorized = time_call(FlightsTransformer.transform, flights_by_airport, vectorized=True, repeat=repeat)
+
+    print(f"FlightsTransformer ({flights} state vectors, best of {repeat})")
+    print(f"  rows:       {rows:.3f}s  {flights / rows:,.0f} rows/sec")
+    print(f"  vectorized: {vectorized:.3f}s  {flights / vectorized:,.0f} rows/sec")
+    print(f"  speedup:    {rows / vectorized:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stations', type=int, default=100_000)
+    parser.add_argument('--flights', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    bench_bikes(args.stations, args.repeat)
+    bench_flights(args.flights, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark Comparison
+Diffs two run_benchmarks.py result files and flags throughput regressions
+
+Usage:
+    python benchmarks/compare.py benchmarks/results/abc1234.json benchmarks/results/def5678.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compare stage metrics of two benchmark runs
+
+    Args:
+        baseline: Results of the reference commit
+        candidate: Results of the commit under test
+        threshold: Relative throughput drop treated as a regression, e.g. 0.1
+
+    Returns:
+        One row per stage present in both runs
+    """
+    rows = []
+
+    for name, old in baseline['stages'].items():
+        new = candidate['stages'].get(name)
+        if new is None:
+            continue
+
+        change = new['throughput_per_sec'] / old['throughput_per_sec'] - 1 if old['throughput_per_sec'] else 0.0
+        rows.append({
+            'stage': name,
+            'old_throughput': old['throughput_per_sec'],
+            'new_throughput': new['throughput_per_sec'],
+            'change': change,
+            'old_p95_ms': old['p95_ms'],
+            'new_p95_ms': new['p95_ms'],
+            'old_peak_mb': old['peak_memory_mb'],
+            'new_peak_mb': new['peak_memory_mb'],
+            'regression': change < -threshold,
+        })
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed relative throughput drop')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    if baseline['params'] != candidate['params']:
+        print(f"warning: runs used different parameters\n  {baseline['params']}\n  {candidate['params']}")
+
+    rows = compare(baseline, candidate, args.threshold)
+
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    print(f"{'stage':18s} {'old/sec':>12s} {'new/sec':>12s} {'change':>8s} {'p95 ms':>15s} {'peak MB':>13s}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(
+            f"{row['stage']:18s} {row['old_throughput']:12,.0f} {row['new_throughput']:12,.0f} "
+            f"{row['change']:+8.1%} {row['old_p95_ms']:7.1f}>{row['new_p95_ms']:<7.1f} "
+            f"{row['old_peak_mb']:6.1f}>{row['new_peak_mb']:<6.1f}{flag}"
+        )
+
+    sys.exit(1 if any(row['regression'] for row in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
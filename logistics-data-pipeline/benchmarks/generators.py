@@ -0,0 +1,138 @@
+"""
+Synthetic Data Generators
+Seeded API payloads shaped like the real CityBikes and OpenSky responses
+"""
+import random
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+
+def generate_bike_networks(
+    total_stations: int,
+    num_networks: int = 4,
+    seed: int = 42
+) -> List[Dict]:
+    """
+    Generate CityBikes network payloads
+
+    Args:
+        total_stations: Number of stations spread across all networks
+        num_networks: Number of networks to generate
+        seed: Random seed, so runs are comparable across commits
+
+    Returns:
+        List of network dicts as returned by CityBikesExtractor.extract_network
+    """
+    rng = random.Random(seed)
+    base_time = datetime(2024, 1, 1, 12, 0, 0)
+    networks = []
+
+    per_network = total_stations // num_networks
+    remainder = total_stations % num_networks
+
+    for n in range(num_networks):
+        count = per_network + (1 if n < remainder else 0)
+        center_lat = rng.uniform(40.0, 55.0)
+        center_lon = rng.uniform(-5.0, 15.0)
+        stations = []
+
+        for s in range(count):
+            capacity = rng.randint(10, 40)
+            free_bikes = rng.randint(0, capacity)
+            stations.append({
+                'id': f"{n:02d}{s:08x}",
+                'name': f"Station {s} - Network {n}",
+                'latitude': round(center_lat + rng.uniform(-0.1, 0.1), 6),
+                'longitude': round(center_lon + rng.uniform(-0.1, 0.1), 6),
+                'free_bikes': free_bikes,
+                'empty_slots': capacity - free_bikes,
+                'timestamp': (base_time + timedelta(seconds=rng.randint(0, 600))).isoformat() + 'Z',
+            })
+
+        networks.append({
+            'id': f"synthetic-network-{n}",
+            'name': f"Synthetic Network {n}",
+            'location': {'city': f"City {n}", 'country': 'XX'},
+            'stations': stations,
+        })
+
+    return networks
+
+
+def generate_state_vectors(
+    count: int,
+    bbox: Tuple[float, float, float, float] = (-10.0, 35.0, 30.0, 60.0),
+    seed: int = 42,
+    start_index: int = 0
+) -> List[List]:
+    """
+    Generate OpenSky state vectors inside a bounding box
+
+    Args:
+        count: Number of aircraft
+        bbox: (lon_min, lat_min, lon_max, lat_max), defaults to roughly Europe
+        seed: Random seed, so runs are comparable across commits
+        start_index: Offset for icao24 addresses, to keep batches distinct
+
+    Returns:
+        List of 17-field state vectors as found in states/all responses
+    """
+    rng = random.Random(seed)
+    now = int(datetime(2024, 1, 1, 12, 0, 0).timestamp())
+    countries = ['Italy', 'Germany', 'France', 'Netherlands', 'Spain', 'United Kingdom']
+    states = []
+
+    for i in range(count):
+        on_ground = rng.random() < 0.15
+        callsign: Optional[str] = f"{rng.choice(['AZA', 'DLH', 'KLM', 'AFR', 'EZY'])}{rng.randint(1, 9999):<5d}"
+        if rng.random() < 0.05:
+            callsign = None
+
+        states.append([
+            f"{start_index + i:06x}",
+            callsign,
+            rng.choice(countries),
+            now - rng.randint(0, 10),
+            now - rng.randint(0, 5),
+            round(rng.uniform(bbox[0], bbox[2]), 4),
+            round(rng.uniform(bbox[1], bbox[3]), 4),
+            0.0 if on_ground else round(rng.uniform(300, 12000), 1),
+            on_ground,
+            round(rng.uniform(0, 20) if on_ground else rng.uniform(100, 260), 2),
+            round(rng.uniform(0, 360), 2),
+            None if on_ground else round(rng.uniform(-10, 10), 2),
+            None,
+            None if on_ground else round(rng.uniform(300, 12500), 1),
+            f"{rng.randint(0, 7777):04d}",
+            False,
+            0,
+        ])
+
+    return states
+
+
+def generate_flights_by_airport(
+    total_flights: int,
+    airports: Optional[List[str]] = None,
+    seed: int = 42
+) -> Dict[str, List]:
+    """
+    Generate the Dict[str, List] payload returned by extract_flights_for_airports
+
+    Args:
+        total_flights: Number of state vectors spread across airports
+        airports: Airport codes, defaults to the configured ones
+        seed: Random seed
+
+    Returns:
+        Dictionary mapping airport codes to state vectors
+    """
+    airports = airports or ['LIMC', 'EDDM', 'EHAM']
+    per_airport = total_flights // len(airports)
+    result = {}
+
+    for n, code in enumerate(airports):
+        count = per_airport + (1 if n < total_flights % len(airports) else 0)
+        result[code] = generate_state_vectors(count, seed=seed + n, start_index=n * per_airport)
+
+    return result
@@ -0,0 +1,165 @@
+"""
+Mock API Server
+Local stand-in for the CityBikes and OpenSky APIs serving synthetic payloads
+
+Usage:
+    python benchmarks/mock_server.py --stations 100000 --flights 20000 --latency-ms 50 --port 8765
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.generators import generate_bike_networks, generate_state_vectors
+
+
+class MockApiServer:
+    """
+    Serve CityBikes /networks/<id> and OpenSky /states/all from memory
+
+    Network payloads are encoded once up front, so the server costs little
+    next to the client being measured. Every request sleeps latency seconds
+    (plus up to jitter seconds) before answering, to stand in for network
+    round trips.
+    """
+
+    def __init__(
+        self,
+        networks: Optional[List[Dict]] = None,
+        states: Optional[List[List]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        host: str = '127.0.0.1',
+        port: int = 0
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.states = states or []
+        self.requests = 0
+
+        self._bodies = {
+            network['id']: json.dumps({'network': network}, separators=(',', ':')).encode('utf-8')
+            for network in networks or []
+        }
+        self._index = json.dumps({
+            'networks': [{'id': network['id'], 'name': network['name']} for network in networks or []]
+        }).encode('utf-8')
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server._handle(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _states_body(self, query: Dict[str, List[str]]) -> bytes:
+        """Filter state vectors by the lamin/lomin/lamax/lomax query, like the real API"""
+        try:
+            lamin, lomin = float(query['lamin'][0]), float(query['lomin'][0])
+            lamax, lomax = float(query['lamax'][0]), float(query['lomax'][0])
+        except (KeyError, ValueError):
+            states = self.states
+        else:
+            states = [
+                state for state in self.states
+                if lomin <= state[5] <= lomax and lamin <= state[6] <= lamax
+            ]
+
+        return json.dumps({'time': int(time.time()), 'states': states}, separators=(',', ':')).encode('utf-8')
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        with self._lock:
+            self.requests += 1
+
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        parts = urlsplit(request.path)
+        path = parts.path.rstrip('/')
+        body = None
+
+        if path == '/networks':
+            body = self._index
+        elif path.startswith('/networks/'):
+            body = self._bodies.get(path[len('/networks/'):])
+        elif path == '/states/all':
+            body = self._states_body(parse_qs(parts.query))
+
+        if body is None:
+            request.send_response(404)
+            request.send_header('Content-Length', '0')
+            request.end_headers()
+            return
+
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def start(self) -> 'MockApiServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'MockApiServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stations', type=int, default=100_000)
+    parser.add_argument('--networks', type=int, default=4)
+    parser.add_argument('--flights', type=int, default=20_000)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = MockApiServer(
+        generate_bike_networks(args.stations, num_networks=args.networks),
+        generate_state_vectors(args.flights),
+        latency=args.latency_ms / 1000,
+        port=args.port
+    )
+    print(f"Serving {args.stations} stations and {args.flights} aircraft on {server.url}")
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
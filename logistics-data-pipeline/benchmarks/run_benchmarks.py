@@ -0,0 +1,262 @@
+"""
+Benchmark Suite
+Per-stage and end-to-end throughput, latency percentiles and peak memory as JSON
+
+Usage:
+    python benchmarks/run_benchmarks.py --stations 100000 --flights 20000 --latency-ms 20
+    python benchmarks/compare.py benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.generators import generate_bike_networks, generate_state_vectors
+from benchmarks.mock_server import MockApiServer
+from extractors.citybikes_extractor import CityBikesExtractor
+from extractors.flights_extractor import FlightsExtractor
+from transformers.bikes_transformer import BikesTransformer
+from transformers.flights_transformer import FlightsTransformer
+from loaders.data_loader import DataLoader
+from loaders.database_schema import dispose_engine
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+AIRPORTS = [
+    {'code': 'LIMC', 'bbox': [8.5, 45.4, 8.8, 45.7]},
+    {'code': 'EDDM', 'bbox': [11.4, 48.0, 11.8, 48.3]},
+    {'code': 'EHAM', 'bbox': [4.6, 52.2, 4.9, 52.4]},
+]
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, 'unknown' outside a git tree"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(
+    func: Callable[..., Any],
+    items: int,
+    repeat: int,
+    setup: Optional[Callable[[], Any]] = None,
+    teardown: Optional[Callable[[Any], Any]] = None
+) -> Dict[str, float]:
+    """
+    Time func over repeat runs, then trace one extra run for peak memory
+
+    Args:
+        func: Callable running one stage on a fixed input; it takes setup's
+            result when setup is given, no arguments otherwise
+        items: Records processed per run, used for throughput
+        repeat: Number of timed runs
+        setup: Builds func's argument before each run, outside the timing
+        teardown: Releases setup's result after each run, even if func failed
+
+    Returns:
+        Throughput from the median run, latency percentiles and peak memory
+    """
+    def run_once() -> float:
+        state = setup() if setup is not None else None
+        try:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            start = time.perf_counter()
+            func(state) if setup is not None else func()
+            return time.perf_counter() - start
+        finally:
+            if teardown is not None:
+                teardown(state)
+
+    timings = [run_once() for _ in range(repeat)]
+
+    tracemalloc.start()
+    try:
+        run_once()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return summarize(timings, items, peak)
+
+
+def summarize(timings: List[float], items: int, peak_bytes: int) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+
+    return {
+        'items': items,
+        'runs': len(timings),
+        'throughput_per_sec': items / p50 if p50 > 0 else float('inf'),
+        'p50_ms': p50 * 1000,
+        'p95_ms': p95 * 1000,
+        'p99_ms': p99 * 1000,
+        'peak_memory_mb': peak_bytes / (1024 * 1024),
+    }
+
+
+def request_latencies(func: Callable[[Any], Any], extractor, items: List[Any]) -> List[float]:
+    """Run func per item through the extractor's pool, timing each call"""
+    def timed(item):
+        start = time.perf_counter()
+        func(item)
+        return time.perf_counter() - start
+
+    return extractor.map_concurrent(timed, items)
+
+
+def run(args) -> Dict[str, Any]:
+    networks = generate_bike_networks(args.stations, num_networks=args.networks)
+    per_airport = args.flights // len(AIRPORTS)
+    states = []
+    for n, airport in enumerate(AIRPORTS):
+        states += generate_state_vectors(per_airport, tuple(airport['bbox']), seed=n, start_index=n * per_airport)
+
+    network_ids = [network['id'] for network in networks]
+    stations = sum(len(network['stations']) for network in networks)
+    stages: Dict[str, Dict[str, float]] = {}
+
+    with MockApiServer(networks, states, latency=args.latency_ms / 1000) as server, \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        bikes_extractor = CityBikesExtractor(base_url=server.url, max_workers=args.workers)
+        flights_extractor = FlightsExtractor(base_url=server.url, max_workers=args.workers)
+
+        raw_bikes = bikes_extractor.extract_all_networks(network_ids)
+        raw_flights = flights_extractor.extract_flights_for_airports(AIRPORTS)
+        flights = sum(len(v) for v in raw_flights.values())
+
+        stages['extract_bikes'] = measure(
+            lambda: bikes_extractor.extract_all_networks(network_ids), stations, args.repeat
+        )
+        stages['extract_flights'] = measure(
+            lambda: flights_extractor.extract_flights_for_airports(AIRPORTS), flights, args.repeat
+        )
+
+        # Per-request latency distribution, one sample per API call; throughput
+        # is requests completed per second of wall time across the worker pool
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            latencies += request_latencies(bikes_extractor.extract_network, bikes_extractor, network_ids)
+            latencies += request_latencies(
+                lambda airport: flights_extractor.extract_flights_by_bbox(tuple(airport['bbox'])),
+                flights_extractor,
+                AIRPORTS
+            )
+        elapsed = time.perf_counter() - started
+        stages['api_request'] = {
+            **summarize(latencies, len(latencies), 0),
+            'throughput_per_sec': len(latencies) / elapsed,
+        }
+
+        stages['transform_bikes'] = measure(
+            lambda: BikesTransformer.transform(raw_bikes, columnar=True), stations, args.repeat
+        )
+        stages['transform_flights'] = measure(
+            lambda: FlightsTransformer.transform(raw_flights, vectorized=True), flights, args.repeat
+        )
+
+        bikes_df = BikesTransformer.transform(raw_bikes, columnar=True)
+        flights_df = FlightsTransformer.transform(raw_flights, vectorized=True)
+        loads = iter(range(10 ** 6))
+
+        # Each run loads into a new database; building the loader (engine,
+        # schema) is not timed, and its engine is closed after the run
+        def fresh_loader() -> DataLoader:
+            return DataLoader(os.path.join(tmp_dir, f"bench_{next(loads)}.db"), load_method=args.load_method)
+
+        def close_loader(loader: DataLoader):
+            # Also drops the engine from the registry, which would otherwise keep one per run
+            dispose_engine(loader.db_manager.url)
+
+        stages['load_bikes'] = measure(
+            lambda loader: loader.load_bikes(bikes_df), stations, args.repeat,
+            setup=fresh_loader, teardown=close_loader
+        )
+        stages['load_flights'] = measure(
+            lambda loader: loader.load_flights(flights_df), flights, args.repeat,
+            setup=fresh_loader, teardown=close_loader
+        )
+
+        def end_to_end(loader: DataLoader):
+            loader.load_bikes(BikesTransformer.transform(
+                bikes_extractor.extract_all_networks(network_ids), columnar=True
+            ))
+            loader.load_flights(FlightsTransformer.transform(
+                flights_extractor.extract_flights_for_airports(AIRPORTS), vectorized=True
+            ))
+
+        stages['end_to_end'] = measure(
+            end_to_end, stations + flights, args.repeat, setup=fresh_loader, teardown=close_loader
+        )
+
+        bikes_extractor.close()
+        flights_extractor.close()
+
+    return {
+        'commit': git_commit(),
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {
+            'stations': stations,
+            'flights': flights,
+            'networks': args.networks,
+            'latency_ms': args.latency_ms,
+            'workers': args.workers,
+            'repeat': args.repeat,
+            'load_method': args.load_method,
+        },
+        'stages': stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stations', type=int, default=100_000)
+    parser.add_argument('--networks', type=int, default=8)
+    parser.add_argument('--flights', type=int, default=20_000)
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Mock API latency per request')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests per extractor')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--load-method', choices=DataLoader.LOAD_METHODS, default='bulk')
+    parser.add_argument('--output', help='Result file, defaults to benchmarks/results/<commit>.json')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = run(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'stage':18s} {'items/sec':>12s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'peak MB':>8s}")
+    for name, stage in results['stages'].items():
+        print(
+            f"{name:18s} {stage['throughput_per_sec']:12,.0f} {stage['p50_ms']:9.1f} "
+            f"{stage['p95_ms']:9.1f} {stage['p99_ms']:9.1f} {stage['peak_memory_mb']:8.1f}"
+        )
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,130 @@
 """
 Logistics Data Pipeline DAG
 Orchestrates ETL for transport and logistics data
+
+The scheduler parses this file in every loop, so only Airflow, the standard
+library and the config loader are imported here. Extractors, transformers,
+loaders (and pandas/SQLAlchemy through them) are imported inside the task
+callables. benchmarks/bench_dag_parse.py guards this.
 """
 from airflow import DAG
+from airflow.decorators import task, task_group
 from airflow.operators.python import PythonOperator
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+import functools
 import sys
 import os
-import yaml
 import logging
 
-# Add scripts directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+# Add scripts directory to path (once, the scheduler may re-parse in the same process)
+scripts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+if scripts_dir not in sys.path:
+    sys.path.insert(0, scripts_dir)
+
+from pipeline_config import load_config
 
-from extractors.citybikes_extractor import CityBikesExtractor
-from extractors.flights_extractor import FlightsExtractor
-from transformers.bikes_transformer import BikesTransformer
-from transformers.flights_transformer import FlightsTransformer
-from loaders.data_loader import DataLoader
+if TYPE_CHECKING:
+    import pandas as pd
+    from loaders.data_loader import DataLoader
 
-# Load configuration
-config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
-with open(config_path, 'r') as f:
-    config = yaml.safe_load(f)
+# Parsed once per config change and cached as JSON, see scripts/pipeline_config.py
+config = load_config(os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml'))
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Airflow configures logging for the scheduler and task processes
 logger = logging.getLogger(__name__)
 
+monitoring_config = config.get('monitoring', {})
+
+# Shared HTTP settings for all extractors
+extraction_config = config.get('extraction', {})
+
+
+@functools.lru_cache(maxsize=None)
+def get_metrics():
+    """Per-stage timings and row counts, exported after every task (None if disabled)"""
+    from monitoring.metrics import MetricsRegistry
+    
+    return MetricsRegistry.from_config(monitoring_config)
+
+
+@functools.lru_cache(maxsize=None)
+def extractor_options() -> dict:
+    """
+    Keyword arguments shared by every extractor in the task process
+    
+    The rate limiter and circuit breaker are created once, so per-host quotas
+    hold across sources.
+    """
+    from extractors.base_extractor import BaseExtractor
+    
+    return {**BaseExtractor.options_from_config(extraction_config), 'metrics': get_metrics()}
+
+
+def flights_options() -> dict:
+    """Merge airport bboxes into as few states/all calls as possible"""
+    from extractors.flights_extractor import FlightsExtractor
+    
+    return FlightsExtractor.consolidation_options(config['data_sources']['opensky'])
+
+
+# Fan-out mode maps extract tasks over these, one task instance per network or airport
+airports_by_code = {airport['code']: airport for airport in config['data_sources']['opensky']['airports']}
+
+
+def pool_options(source: str) -> dict:
+    """Airflow pool for the mapped tasks calling one upstream API, if configured"""
+    pool = config['pipeline'].get('pools', {}).get(source)
+    return {'pool': pool} if pool else {}
+
+
+def build_response_cache():
+    """Create the on-disk HTTP response cache if enabled in config"""
+    from extractors.response_cache import ResponseCache
+    
+    return ResponseCache.from_config(extraction_config.get('cache', {}))
+
+
+# Task outputs are exchanged as files; XCom only carries path, rows and checksum
+artifacts_config = config.get('artifacts', {})
+
+
+def artifact_store():
+    """Create the artifact store from config"""
+    from artifacts.artifact_store import build_artifact_store
+    
+    return build_artifact_store(artifacts_config)
+
+
+def track(stage: str, source: str, rows_in=None):
+    """Time a stage if monitoring is enabled"""
+    metrics = get_metrics()
+    if metrics is None:
+        return nullcontext(SimpleNamespace())
+    return metrics.stage(stage, source=source, rows_in=rows_in)
+
+
+def instrumented(func):
+    """Time a task callable and export the metrics when it ends"""
+    @functools.wraps(func)
+    def wrapper(**context):
+        try:
+            with track('task', func.__name__):
+                return func(**context)
+        finally:
+            metrics = get_metrics()
+            if metrics is not None and monitoring_config.get('prometheus_dir'):
+                # Mapped tasks write one file per source, not one per task
+                source = context.get('network_id') or context.get('airport_code')
+                name = f"{func.__name__}_{source}" if source else func.__name__
+                path = os.path.join(monitoring_config['prometheus_dir'], f"{name}.prom")
+                metrics.write_prometheus(path)
+    
+    return wrapper
+
+
 # Default arguments
 default_args = {
     'owner': 'gabriele_pascaretta',
@@ -50,147 +147,420 @@ dag = DAG(
 )
 
 
+@instrumented
 def extract_bikes(**context):
     """Extract bike-sharing data"""
+    from extractors.citybikes_extractor import CityBikesExtractor
+    
     logger.info("Starting bike data extraction")
     
-    extractor = CityBikesExtractor()
+    extractor = CityBikesExtractor(cache=build_response_cache(), **extractor_options())
     network_ids = config['data_sources']['citybikes']['cities']
     
-    data = extractor.extract_all_networks(network_ids)
+    try:
+        with track('extract', 'bikes', rows_in=len(network_ids)) as record:
+            data = extractor.extract_all_networks(network_ids)
+            record.rows_out = sum(len(network.get('stations', [])) for network in data)
+    finally:
+        extractor.close()
     
-    context['ti'].xcom_push(key='bikes_raw_data', value=data)
+    logger.info(f"Extractor stats: {extractor.stats()}")
+    
+    ref = artifact_store().write_json(data, context['run_id'], 'bikes_raw')
+    context['ti'].xcom_push(key='bikes_raw_data', value=ref)
     logger.info(f"Extracted data for {len(data)} bike networks")
 
 
+@instrumented
 def extract_flights(**context):
     """Extract flight tracking data"""
+    from extractors.flights_extractor import FlightsExtractor
+    
     logger.info("Starting flight data extraction")
     
-    extractor = FlightsExtractor()
+    extractor = FlightsExtractor(cache=build_response_cache(), **flights_options(), **extractor_options())
     airports = config['data_sources']['opensky']['airports']
     
-    data = extractor.extract_flights_for_airports(airports)
+    try:
+        with track('extract', 'flights', rows_in=len(airports)) as record:
+            data = extractor.extract_flights_for_airports(airports)
+            record.rows_out = sum(len(flights) for flights in data.values())
+    finally:
+        extractor.close()
     
-    context['ti'].xcom_push(key='flights_raw_data', value=data)
+    logger.info(f"Extractor stats: {extractor.stats()}")
+    
+    ref = artifact_store().write_json(data, context['run_id'], 'flights_raw')
+    context['ti'].xcom_push(key='flights_raw_data', value=ref)
     
     total_flights = sum(len(flights) for flights in data.values())
     logger.info(f"Extracted {total_flights} flights")
 
 
+def bikes_frame(raw_data) -> 'pd.DataFrame':
+    """Transform raw bike networks, compacting them if configured"""
+    from transformers.bikes_transformer import BikesTransformer
+    from transformers.dtypes import memory_report, format_memory_report
+    
+    transformer = BikesTransformer()
+    with track('transform', 'bikes', rows_in=sum(len(n.get('stations', [])) for n in raw_data)) as record:
+        df = transformer.transform(raw_data, columnar=config.get('transform', {}).get('columnar', False))
+        if config.get('transform', {}).get('compact', False):
+            compact_df = transformer.compact(df)
+            logger.info(f"Compact bike batch: {format_memory_report(memory_report(df, compact_df))}")
+            df = compact_df
+        record.rows_out = len(df)
+    
+    return df
+
+
+def flights_frame(raw_data) -> 'pd.DataFrame':
+    """Transform raw flights per airport, compacting them if configured"""
+    from transformers.flights_transformer import FlightsTransformer
+    from transformers.dtypes import memory_report, format_memory_report
+    
+    transformer = FlightsTransformer()
+    with track('transform', 'flights', rows_in=sum(len(flights) for flights in raw_data.values())) as record:
+        df = transformer.transform(raw_data, vectorized=config.get('transform', {}).get('vectorized', False))
+        if config.get('transform', {}).get('compact', False):
+            compact_df = transformer.compact(df)
+            logger.info(f"Compact flight batch: {format_memory_report(memory_report(df, compact_df))}")
+            df = compact_df
+        record.rows_out = len(df)
+    
+    return df
+
+
+@instrumented
 def transform_bikes(**context):
     """Transform bike-sharing data"""
     logger.info("Starting bike data transformation")
     
-    raw_data = context['ti'].xcom_pull(key='bikes_raw_data', task_ids='extract_bikes')
+    raw_ref = context['ti'].xcom_pull(key='bikes_raw_data', task_ids='extract_bikes')
     
-    if not raw_data:
+    if not raw_ref or not raw_ref['rows']:
         logger.warning("No bike data to transform")
         return
     
-    transformer = BikesTransformer()
-    df = transformer.transform(raw_data)
+    store = artifact_store()
+    df = bikes_frame(store.read_json(raw_ref))
     
-    context['ti'].xcom_push(key='bikes_transformed_data', value=df.to_dict('records'))
+    ref = store.write_frame(df, context['run_id'], 'bikes_transformed')
+    context['ti'].xcom_push(key='bikes_transformed_data', value=ref)
     logger.info(f"Transformed {len(df)} bike station records")
 
 
+@instrumented
 def transform_flights(**context):
     """Transform flight tracking data"""
     logger.info("Starting flight data transformation")
     
-    raw_data = context['ti'].xcom_pull(key='flights_raw_data', task_ids='extract_flights')
+    raw_ref = context['ti'].xcom_pull(key='flights_raw_data', task_ids='extract_flights')
     
-    if not raw_data:
+    if not raw_ref or not raw_ref['rows']:
         logger.warning("No flight data to transform")
         return
     
-    transformer = FlightsTransformer()
-    df = transformer.transform(raw_data)
+    store = artifact_store()
+    df = flights_frame(store.read_json(raw_ref))
     
-    context['ti'].xcom_push(key='flights_transformed_data', value=df.to_dict('records'))
+    ref = store.write_frame(df, context['run_id'], 'flights_transformed')
+    context['ti'].xcom_push(key='flights_transformed_data', value=ref)
     logger.info(f"Transformed {len(df)} flight records")
 
 
+def build_loader() -> 'DataLoader':
+    """Create a DataLoader from the database config"""
+    from loaders.data_loader import DataLoader
+    
+    return DataLoader.from_config(config['database'], metrics=get_metrics())
+
+
+def store_bikes(df: 'pd.DataFrame'):
+    """Load a bike batch and drop expired partitions"""
+    loader = build_loader()
+    
+    count = loader.load_bikes(df)
+    logger.info(f"Loaded {count} bike records to database")
+    
+    if loader.partition_by_day:
+        loader.drop_old_partitions(config['database'].get('partition_retention_days', 30))
+
+
+def store_flights(df: 'pd.DataFrame'):
+    """Load a flight batch"""
+    count = build_loader().load_flights(df)
+    logger.info(f"Loaded {count} flight records to database")
+
+
+@instrumented
 def load_bikes(**context):
     """Load bike data to database"""
     logger.info("Starting bike data loading")
     
-    import pandas as pd
-    
-    data = context['ti'].xcom_pull(key='bikes_transformed_data', task_ids='transform_bikes')
+    ref = context['ti'].xcom_pull(key='bikes_transformed_data', task_ids='transform_bikes')
     
-    if not data:
+    if not ref or not ref['rows']:
         logger.warning("No bike data to load")
         return
     
-    df = pd.DataFrame(data)
-    
-    db_path = config['database']['path']
-    loader = DataLoader(db_path)
-    
-    count = loader.load_bikes(df)
-    logger.info(f"Loaded {count} bike records to database")
+    store = artifact_store()
+    store_bikes(store.read_frame(ref))
+    store.purge(artifacts_config.get('retention_hours', 24) * 3600)
 
 
+@instrumented
 def load_flights(**context):
     """Load flight data to database"""
     logger.info("Starting flight data loading")
     
-    import pandas as pd
+    ref = context['ti'].xcom_pull(key='flights_transformed_data', task_ids='transform_flights')
+    
+    if not ref or not ref['rows']:
+        logger.warning("No flight data to load")
+        return
+    
+    store = artifact_store()
+    store_flights(store.read_frame(ref))
+    store.purge(artifacts_config.get('retention_hours', 24) * 3600)
+
+
+@instrumented
+def extract_bike_network(network_id: str, **context):
+    """Extract one bike network (mapped per network in fan_out mode)"""
+    from extractors.citybikes_extractor import CityBikesExtractor
+    
+    extractor = CityBikesExtractor(cache=build_response_cache(), **extractor_options())
+    
+    try:
+        with track('extract', 'bikes', rows_in=1) as record:
+            network = extractor.extract_network(network_id)
+            record.rows_out = len(network.get('stations', [])) if network else 0
+    finally:
+        extractor.close()
+    
+    # Failing the mapped task lets Airflow retry this network only
+    if network is None:
+        raise RuntimeError(f"Failed to extract bike network {network_id}")
+    
+    return artifact_store().write_json([network], context['run_id'], f'bikes_raw_{network_id}')
+
+
+@instrumented
+def transform_bike_network(network_id: str, raw_ref: dict, **context):
+    """Transform one extracted bike network"""
+    store = artifact_store()
+    df = bikes_frame(store.read_json(raw_ref))
+    
+    return store.write_frame(df, context['run_id'], f'bikes_transformed_{network_id}')
+
+
+@instrumented
+def extract_airport(airport_code: str, **context):
+    """Extract flights around one airport (mapped per airport in fan_out mode)"""
+    from extractors.flights_extractor import FlightsExtractor
+    
+    airport = airports_by_code[airport_code]
+    extractor = FlightsExtractor(cache=build_response_cache(), **extractor_options())
+    
+    try:
+        with track('extract', 'flights', rows_in=1) as record:
+            flights = extractor.extract_airport(airport)
+            record.rows_out = len(flights or [])
+    finally:
+        extractor.close()
+    
+    if flights is None:
+        raise RuntimeError(f"Failed to extract flights for {airport_code}")
+    
+    return artifact_store().write_json(
+        {airport_code: flights}, context['run_id'], f'flights_raw_{airport_code}'
+    )
+
+
+@instrumented
+def transform_airport(airport_code: str, raw_ref: dict, **context):
+    """Transform the flights extracted around one airport"""
+    store = artifact_store()
+    df = flights_frame(store.read_json(raw_ref))
+    
+    return store.write_frame(df, context['run_id'], f'flights_transformed_{airport_code}')
+
+
+@instrumented
+def load_bike_networks(**context):
+    """Load every transformed bike network as one batch; failed networks are skipped"""
+    store = artifact_store()
+    df = store.read_frames(context['ti'].xcom_pull(task_ids='bike_networks.transform_bike_network'))
+    
+    if df is None:
+        logger.warning("No bike data to load")
+        return
     
-    data = context['ti'].xcom_pull(key='flights_transformed_data', task_ids='transform_flights')
+    store_bikes(df)
+    store.purge(artifacts_config.get('retention_hours', 24) * 3600)
+
+
+@instrumented
+def load_airports(**context):
+    """Load the flights of every airport as one batch; failed airports are skipped"""
+    store = artifact_store()
+    df = store.read_frames(context['ti'].xcom_pull(task_ids='airports.transform_airport'))
     
-    if not data:
+    if df is None:
         logger.warning("No flight data to load")
         return
     
-    df = pd.DataFrame(data)
+    store_flights(df)
+    store.purge(artifacts_config.get('retention_hours', 24) * 3600)
+
+
+@instrumented
+def stream_bikes(**context):
+    """Extract, transform and load bike data chunk by chunk"""
+    from extractors.citybikes_extractor import CityBikesExtractor
+    from transformers.bikes_transformer import BikesTransformer
     
-    db_path = config['database']['path']
-    loader = DataLoader(db_path)
+    logger.info("Starting streaming bike pipeline")
     
-    count = loader.load_flights(df)
-    logger.info(f"Loaded {count} flight records to database")
+    extractor = CityBikesExtractor(cache=build_response_cache(), **extractor_options())
+    network_ids = config['data_sources']['citybikes']['cities']
+    chunk_size = config['pipeline'].get('chunk_size', 5000)
+    
+    try:
+        if extraction_config.get('incremental', False):
+            networks = extractor.iter_station_batches(network_ids, batch_size=chunk_size)
+        else:
+            networks = extractor.iter_networks(network_ids)
+        chunks = BikesTransformer.transform_stream(
+            networks,
+            chunk_size=chunk_size,
+            compact=config.get('transform', {}).get('compact', False)
+        )
+        count = build_loader().load_bikes_stream(chunks)
+    finally:
+        extractor.close()
+    
+    logger.info(f"Streamed {count} bike records to database")
 
 
-# Define tasks
-extract_bikes_task = PythonOperator(
-    task_id='extract_bikes',
-    python_callable=extract_bikes,
-    dag=dag,
-)
+@instrumented
+def stream_flights(**context):
+    """Extract, transform and load flight data chunk by chunk"""
+    from extractors.flights_extractor import FlightsExtractor
+    from transformers.flights_transformer import FlightsTransformer
+    
+    logger.info("Starting streaming flight pipeline")
+    
+    extractor = FlightsExtractor(cache=build_response_cache(), **flights_options(), **extractor_options())
+    airports = config['data_sources']['opensky']['airports']
+    chunk_size = config['pipeline'].get('chunk_size', 5000)
+    
+    try:
+        if extraction_config.get('incremental', False):
+            flights = extractor.iter_flight_batches(airports, batch_size=chunk_size)
+        else:
+            flights = extractor.iter_flights_for_airports(airports)
+        chunks = FlightsTransformer.transform_stream(
+            flights,
+            chunk_size=chunk_size,
+            compact=config.get('transform', {}).get('compact', False)
+        )
+        count = build_loader().load_flights_stream(chunks)
+    finally:
+        extractor.close()
+    
+    logger.info(f"Streamed {count} flight records to database")
 
-extract_flights_task = PythonOperator(
-    task_id='extract_flights',
-    python_callable=extract_flights,
-    dag=dag,
-)
 
-transform_bikes_task = PythonOperator(
-    task_id='transform_bikes',
-    python_callable=transform_bikes,
-    dag=dag,
-)
+if config['pipeline'].get('mode', 'batch') == 'fan_out':
+    # One mapped task group per network and airport: each transform depends only on
+    # its own extract, pools cap the calls in flight per API and a failed source is
+    # retried on its own. Loads fan back in to one batch per table once every source
+    # is done, loading whatever succeeded.
+    with dag:
+        @task_group(group_id='bike_networks')
+        def bike_network(network_id):
+            extract = task(task_id='extract_bike_network', **pool_options('citybikes'))(extract_bike_network)
+            transform = task(task_id='transform_bike_network')(transform_bike_network)
+            return transform(network_id=network_id, raw_ref=extract(network_id=network_id))
+        
+        @task_group(group_id='airports')
+        def airport(airport_code):
+            extract = task(task_id='extract_airport', **pool_options('opensky'))(extract_airport)
+            transform = task(task_id='transform_airport')(transform_airport)
+            return transform(airport_code=airport_code, raw_ref=extract(airport_code=airport_code))
+        
+        bike_network_groups = bike_network.expand(network_id=config['data_sources']['citybikes']['cities'])
+        airport_groups = airport.expand(airport_code=list(airports_by_code))
+    
+    load_bike_networks_task = PythonOperator(
+        task_id='load_bike_networks',
+        python_callable=load_bike_networks,
+        trigger_rule='all_done',
+        dag=dag,
+    )
+    
+    load_airports_task = PythonOperator(
+        task_id='load_airports',
+        python_callable=load_airports,
+        trigger_rule='all_done',
+        dag=dag,
+    )
+    
+    bike_network_groups >> load_bike_networks_task
+    airport_groups >> load_airports_task
+elif config['pipeline'].get('mode', 'batch') == 'streaming':
+    # One task per source; memory stays bounded by chunk_size
+    stream_bikes_task = PythonOperator(
+        task_id='stream_bikes',
+        python_callable=stream_bikes,
+        dag=dag,
+    )
+    
+    stream_flights_task = PythonOperator(
+        task_id='stream_flights',
+        python_callable=stream_flights,
+        dag=dag,
+    )
+else:
+    # Batch mode: separate extract, transform and load tasks exchanging artifacts
+    extract_bikes_task = PythonOperator(
+        task_id='extract_bikes',
+        python_callable=extract_bikes,
+        dag=dag,
+    )
 
-transform_flights_task = PythonOperator(
-    task_id='transform_flights',
-    python_callable=transform_flights,
-    dag=dag,
-)
+    extract_flights_task = PythonOperator(
+        task_id='extract_flights',
+        python_callable=extract_flights,
+        dag=dag,
+    )
 
-load_bikes_task = PythonOperator(
-    task_id='load_bikes',
-    python_callable=load_bikes,
-    dag=dag,
-)
+    transform_bikes_task = PythonOperator(
+        task_id='transform_bikes',
+        python_callable=transform_bikes,
+        dag=dag,
+    )
 
-load_flights_task = PythonOperator(
-    task_id='load_flights',
-    python_callable=load_flights,
-    dag=dag,
-)
+    transform_flights_task = PythonOperator(
+        task_id='transform_flights',
+        python_callable=transform_flights,
+        dag=dag,
+    )
+
+    load_bikes_task = PythonOperator(
+        task_id='load_bikes',
+        python_callable=load_bikes,
+        dag=dag,
+    )
+
+    load_flights_task = PythonOperator(
+        task_id='load_flights',
+        python_callable=load_flights,
+        dag=dag,
+    )
 
-# Set task dependencies - parallel extraction and processing
-extract_bikes_task >> transform_bikes_task >> load_bikes_task
-extract_flights_task >> transform_flights_task >> load_flights_task
+    # Set task dependencies - parallel extraction and processing
+    extract_bikes_task >> transform_bikes_task >> load_bikes_task
+    extract_flights_task >> transform_flights_task >> load_flights_task
@@ -0,0 +1,212 @@
+"""
+Artifact Store
+Exchanges task outputs as files so XCom only carries small references
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+# pandas and pyarrow are imported by the frame methods only, so extract
+# tasks that just write JSON don't pay for them at start-up
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore(ABC):
+    """Base class for artifact stores"""
+
+    @abstractmethod
+    def write_frame(self, df: 'pd.DataFrame', run_id: str, name: str) -> Dict[str, Any]:
+        """Persist a DataFrame and return its reference"""
+
+    @abstractmethod
+    def read_frame(self, ref: Dict[str, Any]) -> 'pd.DataFrame':
+        """Load a DataFrame from its reference"""
+
+    @abstractmethod
+    def write_json(self, data: Any, run_id: str, name: str) -> Dict[str, Any]:
+        """Persist a JSON-serializable payload and return its reference"""
+
+    @abstractmethod
+    def read_json(self, ref: Dict[str, Any]) -> Any:
+        """Load a JSON payload from its reference"""
+
+    def read_frames(self, refs: Optional[Iterable[Optional[Dict[str, Any]]]]) -> Optional['pd.DataFrame']:
+        """
+        Read and concatenate several frames, e.g. every map index of a task
+
+        Missing references (sources whose task failed) and empty frames are skipped.
+
+        Returns:
+            The concatenated frame, or None if there was nothing to read
+        """
+        frames = [self.read_frame(ref) for ref in refs or [] if ref and ref['rows']]
+        if not frames:
+            return None
+
+        import pandas as pd
+
+        return pd.concat(frames, ignore_index=True)
+
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Store artifacts on the local filesystem
+
+    DataFrames are written as uncompressed Arrow IPC (Feather v2) files, so
+    they can be memory-mapped on read. With more than one Airflow worker the
+    root must be on a shared volume.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _safe(value: str) -> str:
+        """Make a run id or name usable as a path component"""
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', value)
+
+    def _path(self, run_id: str, name: str, extension: str) -> str:
+        run_dir = os.path.join(self.root, self._safe(run_id))
+        os.makedirs(run_dir, exist_ok=True)
+        return os.path.join(run_dir, f"{self._safe(name)}.{extension}")
+
+    @staticmethod
+    def checksum(path: str) -> str:
+        """SHA-256 of a file's contents"""
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def _reference(self, path: str, rows: int, artifact_format: str) -> Dict[str, Any]:
+        return {
+            'path': path,
+            'rows': rows,
+            'checksum': self.checksum(path),
+            'format': artifact_format,
+        }
+
+    def _verify(self, ref: Dict[str, Any]):
+        if self.checksum(ref['path']) != ref['checksum']:
+            raise ValueError(f"Checksum mismatch for artifact {ref['path']}")
+
+    def write_frame(self, df: 'pd.DataFrame', run_id: str, name: str) -> Dict[str, Any]:
+        """
+        Write a DataFrame as an Arrow IPC file
+
+        Args:
+            df: DataFrame to store
+            run_id: DAG run identifier, used as directory
+            name: Artifact name within the run
+
+        Returns:
+            Reference dict with path, rows, checksum and format
+        """
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        path = self._path(run_id, name, 'arrow')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        tmp_path = f"{path}.tmp"
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+
+        logger.info(f"Wrote {len(df)} rows to {path}")
+        return self._reference(path, len(df), 'arrow')
+
+    def read_frame(self, ref: Dict[str, Any]) -> 'pd.DataFrame':
+        """
+        Read a DataFrame written by write_frame
+
+        Args:
+            ref: Reference returned by write_frame
+
+        Returns:
+            DataFrame backed by a memory-mapped Arrow table where possible
+        """
+        import pyarrow.feather as feather
+
+        self._verify(ref)
+        table = feather.read_table(ref['path'], memory_map=True)
+        return table.to_pandas(split_blocks=True)
+
+    def write_json(self, data: Any, run_id: str, name: str) -> Dict[str, Any]:
+        """
+        Write a raw API payload as JSON
+
+        Args:
+            data: JSON-serializable payload
+            run_id: DAG run identifier, used as directory
+            name: Artifact name within the run
+
+        Returns:
+            Reference dict with path, rows (top-level items), checksum and format
+        """
+        path = self._path(run_id, name, 'json')
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+        rows = len(data) if hasattr(data, '__len__') else 1
+        logger.info(f"Wrote raw payload to {path}")
+        return self._reference(path, rows, 'json')
+
+    def read_json(self, ref: Dict[str, Any]) -> Any:
+        """Read a payload written by write_json"""
+        self._verify(ref)
+
+        with open(ref['path'], 'r') as f:
+            return json.load(f)
+
+    def purge(self, max_age_seconds: float) -> int:
+        """
+        Delete run directories older than max_age_seconds
+
+        Returns:
+            Number of run directories removed
+        """
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+
+        if removed:
+            logger.info(f"Purged {removed} old artifact runs from {self.root}")
+        return removed
+
+
+def build_artifact_store(artifacts_config: Dict[str, Any]) -> ArtifactStore:
+    """
+    Create the artifact store described by the artifacts config section
+
+    Args:
+        artifacts_config: Dict with 'type' (only 'local' for now) and 'root'
+
+    Returns:
+        ArtifactStore instance
+    """
+    store_type = artifacts_config.get('type', 'local')
+
+    if store_type == 'local':
+        return LocalArtifactStore(artifacts_config.get('root', 'data/artifacts'))
+
+    raise ValueError(f"Unknown artifact store type '{store_type}'")
@@ -1,56 +1,376 @@
 """
 Base extractor class for API calls
-Provides retry logic and error handling
+Provides retry logic, rate limiting, connection pooling, response caching and concurrent fetching
 """
 import requests
+import io
+import itertools
 import logging
+import threading
 import time
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from . import json_decoder
+from .response_cache import ResponseCache
+from .rate_limiter import RateLimiter, CircuitBreaker, backoff_delay, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+R = TypeVar('R')
+
 
 class BaseExtractor:
     """Base class for API extractors"""
-    
-    def __init__(self, base_url: str, timeout: int = 30, max_retries: int = 3):
+
+    # Responses that mean the host wants us to slow down
+    THROTTLED_STATUSES = (429, 503)
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 30,
+        max_retries: int = 3,
+        max_workers: int = 1,
+        max_per_host: int = 4,
+        pool_size: int = 10,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        metrics=None
+    ):
         self.base_url = base_url
         self.timeout = timeout
         self.max_retries = max_retries
-        
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Optional monitoring.metrics.MetricsRegistry
+        self.metrics = metrics
+
+        # One keep-alive connection pool shared by every request of this extractor
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_limits_lock = threading.Lock()
+
+    @staticmethod
+    def options_from_config(extraction_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build constructor keyword arguments from the extraction config section
+
+        The rate limiter and circuit breaker are created once here, so
+        extractors built from the same options share per-host quotas and
+        circuit state. The response cache and metrics are passed separately.
+
+        Args:
+            extraction_config: Parsed 'extraction' config section
+
+        Returns:
+            Keyword arguments for BaseExtractor subclasses
+        """
+        return {
+            'timeout': extraction_config.get('timeout', 30),
+            'max_retries': extraction_config.get('max_retries', 3),
+            'max_workers': extraction_config.get('max_workers', 1),
+            'max_per_host': extraction_config.get('max_connections_per_host', 4),
+            'pool_size': extraction_config.get('pool_size', 10),
+            'backoff_base': extraction_config.get('backoff_base_seconds', 1.0),
+            'backoff_max': extraction_config.get('backoff_max_seconds', 30.0),
+            'rate_limiter': RateLimiter.from_config(extraction_config.get('rate_limits', {})),
+            'circuit_breaker': CircuitBreaker.from_config(extraction_config.get('circuit_breaker', {})),
+        }
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        """Get the semaphore capping in-flight requests to the host of url"""
+        host = urlsplit(url).netloc
+
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def _count(self, name: str, value: float = 1, **labels):
+        if self.metrics is not None:
+            self.metrics.inc(name, value, **labels)
+
     def get(self, endpoint: str, params: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
         """
         Make GET request with retry logic
-        
+
         Args:
             endpoint: API endpoint path
             params: Query parameters
-            
+
         Returns:
             JSON response or None if failed
         """
         url = f"{self.base_url}/{endpoint}" if endpoint else self.base_url
-        
+        host = urlsplit(url).hostname
+
+        body = self._fetch(url, params)
+        if body is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            data = json_decoder.loads(body)
+        except ValueError as e:
+            logger.error(f"Invalid JSON from {url}: {e}")
+            self._count('http_errors_total', host=host, error='JSONDecodeError')
+            return None
+
+        self._count('json_decode_seconds_total', time.perf_counter() - start, host=host)
+        return data
+
+    def get_batches(
+        self,
+        endpoint: str,
+        path: str,
+        batch_size: int = 1000,
+        params: Optional[Dict] = None
+    ) -> Iterator[Tuple[Dict[str, Any], List[Any]]]:
+        """
+        Stream the items of one array in a response in bounded batches
+
+        With ijson installed and no response cache, the body is parsed as it
+        is downloaded, so neither the raw payload nor the decoded document is
+        held in full. With a cache the body is buffered (to be stored) but
+        still parsed incrementally. Retries cover the request up to the
+        response headers; an error while reading the body is raised.
+
+        Args:
+            endpoint: API endpoint path
+            path: Dotted path of the array, e.g. 'network.stations'
+            batch_size: Maximum items per batch
+            params: Query parameters
+
+        Yields:
+            (members, items) pairs, see json_decoder.iter_batches
+        """
+        url = f"{self.base_url}/{endpoint}" if endpoint else self.base_url
+
+        body = self._fetch(url, params, stream=json_decoder.INCREMENTAL)
+        if body is None:
+            return
+
+        if isinstance(body, bytes):
+            yield from json_decoder.iter_batches(io.BytesIO(body), path, batch_size)
+            return
+
+        try:
+            body.raw.decode_content = True
+            yield from json_decoder.iter_batches(body.raw, path, batch_size)
+        finally:
+            body.close()
+
+    def _fetch(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        stream: bool = False
+    ) -> Union[bytes, requests.Response, None]:
+        """
+        Fetch a response body, from the cache or with retries
+
+        Args:
+            url: Full request URL
+            params: Query parameters
+            stream: Return the open response instead of reading the body.
+                Ignored when the cache is enabled, since the body is stored.
+
+        Returns:
+            Body bytes, the open streaming response, or None if failed
+        """
+        host = urlsplit(url).hostname
+        stream = stream and self.cache is None
+
+        cached = self.cache.lookup(url, params) if self.cache is not None else None
+        if cached is not None and self.cache.is_fresh(cached):
+            body = self.cache.read(cached)
+            if body is not None:
+                logger.info(f"Serving {url} from cache")
+                self._count('http_cache_hits_total', host=host)
+                return body
+            cached = None
+
         for attempt in range(self.max_retries):
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow(url):
+                logger.error(f"Circuit open for {url}, not sending request")
+                return None
+
+            response = None
             try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(url)
+
                 logger.info(f"Requesting {url} (attempt {attempt + 1}/{self.max_retries})")
-                
-                response = requests.get(
-                    url,
-                    params=params,
-                    timeout=self.timeout
-                )
-                
+
+                start = time.perf_counter()
+                with self._host_limit(url):
+                    response = self.session.get(
+                        url,
+                        params=params,
+                        headers=ResponseCache.conditional_headers(cached),
+                        timeout=self.timeout,
+                        stream=stream
+                    )
+                self._count('http_request_seconds_total', time.perf_counter() - start, host=host)
+                self._count('http_requests_total', host=host, status=response.status_code)
+
+                if response.status_code in self.THROTTLED_STATUSES:
+                    # A streamed response holds its pooled connection until closed
+                    if stream:
+                        response.close()
+                    if self.circuit_breaker is not None:
+                        self.circuit_breaker.record_failure(url)
+
+                    retry_after = parse_retry_after(
+                        response.headers.get('Retry-After')
+                        or response.headers.get('X-Rate-Limit-Retry-After-Seconds')
+                    )
+
+                    if self.rate_limiter is not None and not self.rate_limiter.throttled(url, retry_after):
+                        return None
+
+                    logger.warning(f"{url} throttled with status {response.status_code}")
+                    if attempt < self.max_retries - 1 and (self.rate_limiter is None or retry_after is None):
+                        self._backoff(attempt)
+                    continue
+
+                if cached is not None and response.status_code == 304:
+                    if stream:
+                        response.close()
+                    if self.circuit_breaker is not None:
+                        self.circuit_breaker.record_success(url)
+
+                    body = self.cache.read(cached, revalidated=True)
+                    if body is not None:
+                        logger.info(f"{url} not modified, using cached response")
+                        self._count('http_cache_revalidated_total', host=host)
+                        return body
+                    cached = None
+                    continue
+
                 response.raise_for_status()
-                return response.json()
-                
+
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success(url)
+
+                if stream:
+                    return response
+
+                if self.cache is not None:
+                    self.cache.store(
+                        url,
+                        params,
+                        response.content,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+
+                self._count('http_bytes_downloaded_total', len(response.content), host=host)
+                return response.content
+
             except requests.exceptions.RequestException as e:
+                if stream and response is not None:
+                    response.close()
                 logger.error(f"Request failed: {e}")
-                
+                self._count('http_errors_total', host=host, error=type(e).__name__)
+
+                if self.circuit_breaker is not None:
+                    # Client errors say nothing about the host's health
+                    status = e.response.status_code if e.response is not None else None
+                    if status is not None and status < 500:
+                        self.circuit_breaker.record_success(url)
+                    else:
+                        self.circuit_breaker.record_failure(url)
+
                 if attempt < self.max_retries - 1:
-                    wait_time = 2 ** attempt
-                    logger.info(f"Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"Max retries reached for {url}")
-                    return None
+                    self._backoff(attempt)
+
+        logger.error(f"Max retries reached for {url}")
+        return None
+
+    def _backoff(self, attempt: int):
+        """Sleep a full-jitter exponential delay before the next attempt"""
+        wait_time = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        logger.info(f"Retrying in {wait_time:.2f} seconds...")
+        time.sleep(wait_time)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache, rate limiter and circuit breaker metrics"""
+        return {
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'rate_limits': self.rate_limiter.stats() if self.rate_limiter is not None else None,
+            'circuits': self.circuit_breaker.stats() if self.circuit_breaker is not None else None,
+        }
+
+    def map_concurrent(self, func: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """
+        Apply func to every item using a bounded thread pool
+
+        Args:
+            func: Callable run once per item (typically a single-resource extract)
+            items: Inputs to fetch
+
+        Returns:
+            Results in the same order as items
+        """
+        items = list(items)
+
+        if self.max_workers == 1 or len(items) <= 1:
+            return [func(item) for item in items]
+
+        workers = min(self.max_workers, len(items))
+        logger.info(f"Fetching {len(items)} resources with {workers} workers")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items))
+
+    def iter_concurrent(self, func: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """
+        Yield func(item) results as they complete, with at most max_workers in flight
+
+        Unlike map_concurrent, results are not collected, so only the
+        in-flight responses are held in memory.
+
+        Args:
+            func: Callable run once per item
+            items: Inputs to fetch (consumed lazily)
+
+        Yields:
+            Results in completion order
+        """
+        items = iter(items)
+
+        if self.max_workers == 1:
+            for item in items:
+                yield func(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(func, item) for item in itertools.islice(items, self.max_workers)}
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    for item in itertools.islice(items, 1):
+                        pending.add(executor.submit(func, item))
+                    yield future.result()
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
@@ -3,7 +3,7 @@ CityBikes API Extractor
 Fetches bike-sharing station data
 """
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 from .base_extractor import BaseExtractor
 
 logger = logging.getLogger(__name__)
@@ -12,8 +12,8 @@ logger = logging.getLogger(__name__)
 class CityBikesExtractor(BaseExtractor):
     """Extract bike-sharing data from CityBikes API"""
     
-    def __init__(self):
-        super().__init__(base_url="https://api.citybik.es/v2")
+    def __init__(self, base_url: str = "https://api.citybik.es/v2", **kwargs):
+        super().__init__(base_url=base_url, **kwargs)
         
     def extract_network(self, network_id: str) -> Optional[Dict]:
         """
@@ -46,12 +46,53 @@ class CityBikesExtractor(BaseExtractor):
         Returns:
             List of network data
         """
-        results = []
+        fetched = self.map_concurrent(self.extract_network, network_ids)
+        results = [data for data in fetched if data]
         
-        for network_id in network_ids:
-            data = self.extract_network(network_id)
-            if data:
-                results.append(data)
-                
         logger.info(f"Extracted data for {len(results)}/{len(network_ids)} networks")
         return results
+    
+    def iter_networks(self, network_ids: List[str]) -> Iterator[Dict]:
+        """
+        Yield network data as each request completes
+        
+        Args:
+            network_ids: List of network identifiers
+            
+        Yields:
+            Network data, in completion order; failed networks are skipped
+        """
+        extracted = 0
+        
+        for data in self.iter_concurrent(self.extract_network, network_ids):
+            if data:
+                extracted += 1
+                yield data
+                
+        logger.info(f"Streamed data for {extracted}/{len(network_ids)} networks")
+    
+    def iter_station_batches(self, network_ids: List[str], batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Yield networks in partial pieces of at most batch_size stations
+        
+        Each network's response is parsed incrementally (see
+        BaseExtractor.get_batches), so a large network is never held as one
+        decoded document. Networks are fetched one after another. The pieces
+        have the shape of extract_network results and can go straight into
+        BikesTransformer.transform_stream.
+        
+        Args:
+            network_ids: List of network identifiers
+            batch_size: Maximum stations per piece
+            
+        Yields:
+            Network data whose 'stations' hold one batch
+        """
+        for network_id in network_ids:
+            stations = 0
+            
+            for members, batch in self.get_batches(f"networks/{network_id}", 'network.stations', batch_size):
+                stations += len(batch)
+                yield {**members, 'id': members.get('id', network_id), 'stations': batch}
+            
+            logger.info(f"Streamed {stations} stations for network: {network_id}")
@@ -3,17 +3,42 @@ OpenSky Network API Extractor
 Fetches real-time flight data
 """
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from .base_extractor import BaseExtractor
 
 logger = logging.getLogger(__name__)
 
+BBox = Tuple[float, float, float, float]
+
+# Positions within an OpenSky state vector
+LONGITUDE_INDEX = 5
+LATITUDE_INDEX = 6
+
 
 class FlightsExtractor(BaseExtractor):
     """Extract flight data from OpenSky Network API"""
     
-    def __init__(self):
-        super().__init__(base_url="https://opensky-network.org/api")
+    # OpenSky charges one credit per states/all call below 25 square degrees
+    DEFAULT_MAX_MERGED_AREA = 25.0
+    
+    def __init__(
+        self,
+        base_url: str = "https://opensky-network.org/api",
+        consolidate_requests: bool = False,
+        max_merged_area: float = DEFAULT_MAX_MERGED_AREA,
+        **kwargs
+    ):
+        """
+        Args:
+            base_url: API root, overridable for a local stand-in server
+            consolidate_requests: Fetch merged airport bboxes instead of one
+                request per airport
+            max_merged_area: Largest merged bbox, in square degrees
+            **kwargs: Passed to BaseExtractor
+        """
+        super().__init__(base_url=base_url, **kwargs)
+        self.consolidate_requests = consolidate_requests
+        self.max_merged_area = max_merged_area
         
     def extract_flights_by_bbox(
         self, 
@@ -28,16 +53,9 @@ class FlightsExtractor(BaseExtractor):
         Returns:
             List of flight data
         """
-        params = {
-            'lamin': bbox[1],
-            'lomin': bbox[0],
-            'lamax': bbox[3],
-            'lomax': bbox[2]
-        }
-        
         logger.info(f"Extracting flights for bbox: {bbox}")
         
-        data = self.get("states/all", params=params)
+        data = self.get("states/all", params=self._bbox_params(bbox))
         
         if data and 'states' in data:
             flights = data['states']
@@ -47,6 +65,140 @@ class FlightsExtractor(BaseExtractor):
             logger.warning("No flights found or API error")
             return []
     
+    @staticmethod
+    def _bbox_params(bbox: BBox) -> Dict[str, float]:
+        return {
+            'lamin': bbox[1],
+            'lomin': bbox[0],
+            'lamax': bbox[3],
+            'lomax': bbox[2]
+        }
+    
+    def extract_airport(self, airport: Dict) -> Optional[List]:
+        """
+        Extract flights for a single airport
+        
+        Unlike extract_flights_by_bbox, a failed request is told apart from
+        an empty sky, so callers can retry it.
+        
+        Args:
+            airport: Airport config with bbox
+            
+        Returns:
+            Flight states (empty if nothing is airborne), or None if the request failed
+        """
+        logger.info(f"Extracting flights for airport: {airport['code']}")
+        
+        data = self.get("states/all", params=self._bbox_params(tuple(airport['bbox'])))
+        
+        if data is None:
+            logger.error(f"Failed to extract flights for {airport['code']}")
+            return None
+        
+        return data.get('states') or []
+    
+    @classmethod
+    def consolidation_options(cls, opensky_config: Dict) -> Dict:
+        """Constructor keyword arguments from the data_sources.opensky config section"""
+        return {
+            'consolidate_requests': opensky_config.get('consolidate_requests', False),
+            'max_merged_area': opensky_config.get('max_merged_area', cls.DEFAULT_MAX_MERGED_AREA),
+        }
+    
+    @staticmethod
+    def merge_bboxes(bboxes: List[BBox], max_area: float) -> List[Tuple[BBox, List[int]]]:
+        """
+        Greedily merge bounding boxes into as few enclosing boxes as possible
+        
+        The pair whose enclosing box adds the least uncovered area is merged
+        first, as long as the result stays within max_area.
+        
+        Args:
+            bboxes: (lon_min, lat_min, lon_max, lat_max) boxes
+            max_area: Largest allowed merged box, in square degrees
+            
+        Returns:
+            (enclosing bbox, indices of the input boxes it covers) pairs
+        """
+        def area(box: BBox) -> float:
+            return (box[2] - box[0]) * (box[3] - box[1])
+        
+        def union(a: BBox, b: BBox) -> BBox:
+            return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+        
+        groups = [(tuple(box), [i]) for i, box in enumerate(bboxes)]
+        
+        while len(groups) > 1:
+            best = None
+            
+            for i in range(len(groups)):
+                for j in range(i + 1, len(groups)):
+                    merged = union(groups[i][0], groups[j][0])
+                    if area(merged) > max_area:
+                        continue
+                    
+                    waste = area(merged) - area(groups[i][0]) - area(groups[j][0])
+                    if best is None or waste < best[0]:
+                        best = (waste, i, j, merged)
+            
+            if best is None:
+                break
+            
+            _, i, j, merged = best
+            groups[i] = (merged, groups[i][1] + groups[j][1])
+            del groups[j]
+        
+        return groups
+    
+    @staticmethod
+    def assign_to_airports(states: List[List], airports: List[Dict]) -> Dict[str, List]:
+        """
+        Split state vectors between airports with a vectorized point-in-box test
+        
+        An aircraft inside several overlapping airport bboxes is listed under
+        each of them, as with one request per airport.
+        
+        Args:
+            states: OpenSky state vectors
+            airports: Airport configs with bbox
+            
+        Returns:
+            Dictionary mapping airport codes to the state vectors inside their bbox
+        """
+        if not states:
+            return {airport['code']: [] for airport in airports}
+        
+        # Imported here so extract tasks that never split merged requests skip numpy
+        import numpy as np
+        
+        positions = np.array(
+            [(state[LONGITUDE_INDEX], state[LATITUDE_INDEX]) for state in states],
+            dtype=float
+        )
+        boxes = np.array([airport['bbox'] for airport in airports], dtype=float)
+        lon, lat = positions[:, 0:1], positions[:, 1:2]
+        
+        inside = (
+            (lon >= boxes[:, 0]) & (lon <= boxes[:, 2])
+            & (lat >= boxes[:, 1]) & (lat <= boxes[:, 3])
+        )
+        
+        return {
+            airport['code']: [states[i] for i in np.flatnonzero(inside[:, column])]
+            for column, airport in enumerate(airports)
+        }
+    
+    def _airport_groups(self, airports: List[Dict]) -> List[Tuple[BBox, List[Dict]]]:
+        """Merged request bboxes with the airports each one serves"""
+        groups = self.merge_bboxes([tuple(airport['bbox']) for airport in airports], self.max_merged_area)
+        logger.info(f"Consolidated {len(airports)} airport bboxes into {len(groups)} requests")
+        
+        return [(bbox, [airports[i] for i in members]) for bbox, members in groups]
+    
+    def _fetch_group(self, group: Tuple[BBox, List[Dict]]) -> Dict[str, List]:
+        bbox, members = group
+        return self.assign_to_airports(self.extract_flights_by_bbox(bbox) or [], members)
+    
     def extract_flights_for_airports(self, airports: List[Dict]) -> Dict[str, List]:
         """
         Extract flights for multiple airports
@@ -57,13 +209,72 @@ class FlightsExtractor(BaseExtractor):
         Returns:
             Dictionary mapping airport codes to flight data
         """
+        if self.consolidate_requests:
+            results = {}
+            for assigned in self.map_concurrent(self._fetch_group, self._airport_groups(airports)):
+                results.update(assigned)
+            return {airport['code']: results[airport['code']] for airport in airports}
+        
+        fetched = self.map_concurrent(
+            lambda airport: self.extract_flights_by_bbox(tuple(airport['bbox'])),
+            airports
+        )
+        
         results = {}
         
-        for airport in airports:
-            code = airport['code']
-            bbox = tuple(airport['bbox'])
-            
-            flights = self.extract_flights_by_bbox(bbox)
-            results[code] = flights if flights else []
+        for airport, flights in zip(airports, fetched):
+            results[airport['code']] = flights if flights else []
             
         return results
+    
+    def iter_flights_for_airports(self, airports: List[Dict]) -> Iterator[Tuple[str, List]]:
+        """
+        Yield flights per airport as each request completes
+        
+        Args:
+            airports: List of airport configs with bbox
+            
+        Yields:
+            (airport code, flight states) pairs, in completion order
+        """
+        if self.consolidate_requests:
+            for assigned in self.iter_concurrent(self._fetch_group, self._airport_groups(airports)):
+                yield from assigned.items()
+            return
+        
+        def fetch(airport: Dict) -> Tuple[str, List]:
+            flights = self.extract_flights_by_bbox(tuple(airport['bbox']))
+            return airport['code'], flights if flights else []
+        
+        yield from self.iter_concurrent(fetch, airports)
+    
+    def iter_flight_batches(self, airports: List[Dict], batch_size: int = 1000) -> Iterator[Tuple[str, List]]:
+        """
+        Yield flights per airport in batches, parsing each response incrementally
+        
+        Requests are sent one after another. With consolidate_requests each
+        batch of a merged response is split between its airports as it arrives.
+        
+        Args:
+            airports: List of airport configs with bbox
+            batch_size: Maximum state vectors parsed per batch
+            
+        Yields:
+            (airport code, flight states) pairs; an airport may appear many times
+        """
+        if self.consolidate_requests:
+            groups = self._airport_groups(airports)
+        else:
+            groups = [(tuple(airport['bbox']), [airport]) for airport in airports]
+        
+        for bbox, members in groups:
+            batches = self.get_batches("states/all", 'states', batch_size, params=self._bbox_params(bbox))
+            
+            for _, states in batches:
+                if len(members) == 1:
+                    yield members[0]['code'], states
+                    continue
+                
+                for code, flights in self.assign_to_airports(states, members).items():
+                    if flights:
+                        yield code, flights
@@ -0,0 +1,311 @@
+"""
+Rate Limiting
+Per-host token buckets, jittered backoff and circuit breakers for API calls
+"""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Full-jitter exponential backoff
+
+    Args:
+        attempt: Zero-based retry attempt
+        base: Delay scale in seconds
+        cap: Upper bound for the delay in seconds
+
+    Returns:
+        Random delay between 0 and min(cap, base * 2 ** attempt)
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Allow rate requests per second with bursts of up to capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        Take one token, blocking until one is available
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for the next seconds, e.g. after a 429"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+    def state(self) -> Dict[str, float]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'tokens': round(self._tokens, 3),
+                'paused_seconds': round(max(0.0, self._paused_until - now), 3),
+            }
+
+
+class RateLimiter:
+    """Token bucket per API host, with optional per-host overrides"""
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: float = 10.0,
+        hosts: Optional[Dict[str, Dict[str, float]]] = None,
+        max_retry_after: float = 120.0
+    ):
+        """
+        Args:
+            rate: Default requests per second per host
+            burst: Default bucket capacity
+            hosts: Per-host {'rate': ..., 'burst': ...} overrides keyed by hostname
+            max_retry_after: Longest Retry-After worth waiting for; longer
+                ones fail the request instead of blocking the task
+        """
+        self.rate = rate
+        self.burst = burst
+        self.hosts = hosts or {}
+        self.max_retry_after = max_retry_after
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_config(cls, rate_config: Dict[str, Any]) -> Optional['RateLimiter']:
+        """
+        Create a RateLimiter from the extraction.rate_limits config section
+
+        Returns:
+            RateLimiter, or None if rate limiting is disabled
+        """
+        if not rate_config.get('enabled', False):
+            return None
+
+        return cls(
+            rate=rate_config.get('requests_per_second', 5.0),
+            burst=rate_config.get('burst', 10.0),
+            hosts=rate_config.get('hosts'),
+            max_retry_after=rate_config.get('max_retry_after_seconds', 120.0)
+        )
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                limits = self.hosts.get(host, {})
+                self._buckets[host] = TokenBucket(
+                    limits.get('rate', self.rate),
+                    limits.get('burst', self.burst)
+                )
+                self._stats[host] = {'requests': 0, 'throttled': 0, 'wait_seconds': 0.0}
+            return self._buckets[host]
+
+    def acquire(self, url: str) -> float:
+        """
+        Wait for permission to send a request to the host of url
+
+        Returns:
+            Seconds spent waiting
+        """
+        host = urlsplit(url).hostname or ''
+        waited = self._bucket(host).acquire()
+
+        with self._lock:
+            self._stats[host]['requests'] += 1
+            self._stats[host]['wait_seconds'] += waited
+
+        if waited > 0:
+            logger.debug(f"Rate limited {host} for {waited:.2f}s")
+        return waited
+
+    def throttled(self, url: str, retry_after: Optional[float]) -> bool:
+        """
+        Record a 429 from the host of url and pause its bucket
+
+        Args:
+            url: Requested URL
+            retry_after: Parsed Retry-After header, if any
+
+        Returns:
+            True if the caller should retry, False if the wait exceeds max_retry_after
+        """
+        host = urlsplit(url).hostname or ''
+        bucket = self._bucket(host)
+
+        with self._lock:
+            self._stats[host]['throttled'] += 1
+
+        if retry_after is not None and retry_after > self.max_retry_after:
+            logger.warning(f"{host} asked to retry after {retry_after:.0f}s, giving up")
+            return False
+
+        if retry_after is not None:
+            bucket.pause(retry_after)
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Get per-host request, throttle and wait counters plus bucket state"""
+        with self._lock:
+            buckets = dict(self._buckets)
+            counters = {host: dict(values) for host, values in self._stats.items()}
+
+        return {host: {**counters[host], **bucket.state()} for host, bucket in buckets.items()}
+
+
+class CircuitBreaker:
+    """
+    Fail fast against hosts that keep failing
+
+    After failure_threshold consecutive failures a host's circuit opens and
+    requests are rejected without being sent. After reset_timeout one trial
+    request is let through (half-open); its outcome closes or reopens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_config(cls, breaker_config: Dict[str, Any]) -> Optional['CircuitBreaker']:
+        """
+        Create a CircuitBreaker from the extraction.circuit_breaker config section
+
+        Returns:
+            CircuitBreaker, or None if disabled
+        """
+        if not breaker_config.get('enabled', False):
+            return None
+
+        return cls(
+            failure_threshold=breaker_config.get('failure_threshold', 5),
+            reset_timeout=breaker_config.get('reset_timeout_seconds', 60.0)
+        )
+
+    def _host(self, url: str) -> Dict[str, Any]:
+        host = urlsplit(url).hostname or ''
+        if host not in self._hosts:
+            self._hosts[host] = {
+                'state': self.CLOSED,
+                'failures': 0,
+                'opened_at': 0.0,
+                'times_opened': 0,
+                'rejected': 0,
+            }
+        return self._hosts[host]
+
+    def allow(self, url: str) -> bool:
+        """Check whether a request to the host of url may be sent"""
+        with self._lock:
+            circuit = self._host(url)
+
+            if circuit['state'] == self.CLOSED:
+                return True
+
+            if circuit['state'] == self.OPEN and time.monotonic() - circuit['opened_at'] >= self.reset_timeout:
+                circuit['state'] = self.HALF_OPEN
+                return True
+
+            circuit['rejected'] += 1
+            return False
+
+    def record_success(self, url: str):
+        with self._lock:
+            circuit = self._host(url)
+            circuit['state'] = self.CLOSED
+            circuit['failures'] = 0
+
+    def record_failure(self, url: str):
+        with self._lock:
+            circuit = self._host(url)
+            circuit['failures'] += 1
+
+            if circuit['state'] == self.HALF_OPEN or circuit['failures'] >= self.failure_threshold:
+                if circuit['state'] != self.OPEN:
+                    circuit['times_opened'] += 1
+                    logger.warning(f"Circuit opened for {urlsplit(url).hostname} after {circuit['failures']} failures")
+                circuit['state'] = self.OPEN
+                circuit['opened_at'] = time.monotonic()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-host circuit state and counters"""
+        with self._lock:
+            return {
+                host: {key: value for key, value in circuit.items() if key != 'opened_at'}
+                for host, circuit in self._hosts.items()
+            }
@@ -0,0 +1,233 @@
+"""
+HTTP Response Cache
+On-disk, size-bounded cache with ETag/Last-Modified revalidation
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Metadata for a cached response body"""
+    key: str
+    url: str
+    size: int
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ResponseCache:
+    """Cache raw API responses on disk keyed by URL and query parameters"""
+
+    def __init__(self, cache_dir: str, ttl: float = 60, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._total_bytes = 0
+        self._stats = {
+            'hits': 0,
+            'revalidated': 0,
+            'misses': 0,
+            'evictions': 0,
+            'bytes_saved': 0,
+            'bytes_downloaded': 0,
+        }
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> Optional['ResponseCache']:
+        """
+        Create a cache from the extraction.cache config section
+
+        Returns:
+            ResponseCache, or None if caching is disabled
+        """
+        if not cache_config.get('enabled', False):
+            return None
+
+        return cls(
+            cache_config.get('path', 'data/http_cache'),
+            ttl=cache_config.get('ttl_seconds', 60),
+            max_bytes=cache_config.get('max_bytes', 256 * 1024 * 1024)
+        )
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        """Build a stable cache key from URL and query parameters"""
+        canonical = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.meta.json")
+
+    def _load_index(self):
+        """Rebuild the LRU index from disk, least recently used first"""
+        entries = []
+
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.meta.json'):
+                continue
+
+            key = name[:-len('.meta.json')]
+            try:
+                with open(self._meta_path(key), 'r') as f:
+                    entry = CacheEntry(**json.load(f))
+                last_access = os.path.getmtime(self._body_path(key))
+            except (OSError, ValueError, TypeError):
+                self._remove_files(key)
+                continue
+
+            entries.append((last_access, entry))
+
+        for _, entry in sorted(entries, key=lambda item: item[0]):
+            self._entries[entry.key] = entry
+            self._total_bytes += entry.size
+
+        logger.info(f"Loaded {len(self._entries)} cached responses ({self._total_bytes} bytes)")
+
+    def _remove_files(self, key: str):
+        for path in (self._body_path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, url: str, params: Optional[Dict] = None) -> Optional[CacheEntry]:
+        """Find the cached entry for a request, if any"""
+        with self._lock:
+            return self._entries.get(self.make_key(url, params))
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Check whether an entry can be served without contacting the API"""
+        return time.time() - entry.stored_at < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for revalidation"""
+        headers = {}
+
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        return headers
+
+    def read(self, entry: CacheEntry, revalidated: bool = False) -> Optional[bytes]:
+        """
+        Serve a cached body and mark it as recently used
+
+        Args:
+            entry: Entry returned by lookup
+            revalidated: True if the API answered 304 Not Modified
+
+        Returns:
+            Cached body, or None if it disappeared from disk
+        """
+        try:
+            with open(self._body_path(entry.key), 'rb') as f:
+                body = f.read()
+            os.utime(self._body_path(entry.key))
+        except OSError:
+            with self._lock:
+                self._drop(entry.key)
+            return None
+
+        with self._lock:
+            if revalidated:
+                entry.stored_at = time.time()
+                self._write_meta(entry)
+                self._stats['revalidated'] += 1
+            else:
+                self._stats['hits'] += 1
+
+            self._stats['bytes_saved'] += entry.size
+            if entry.key in self._entries:
+                self._entries.move_to_end(entry.key)
+
+        return body
+
+    def store(
+        self,
+        url: str,
+        params: Optional[Dict],
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """Save a freshly downloaded body and evict old entries if over budget"""
+        key = self.make_key(url, params)
+        entry = CacheEntry(
+            key=key,
+            url=url,
+            size=len(body),
+            stored_at=time.time(),
+            etag=etag,
+            last_modified=last_modified
+        )
+
+        with self._lock:
+            self._stats['misses'] += 1
+            self._stats['bytes_downloaded'] += entry.size
+
+            if entry.size > self.max_bytes:
+                logger.warning(f"Response for {url} larger than cache budget, not cached")
+                return
+
+            tmp_path = f"{self._body_path(key)}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, self._body_path(key))
+            self._write_meta(entry)
+
+            self._drop(key, remove_files=False)
+            self._entries[key] = entry
+            self._total_bytes += entry.size
+            self._evict()
+
+    def _write_meta(self, entry: CacheEntry):
+        with open(self._meta_path(entry.key), 'w') as f:
+            json.dump(asdict(entry), f)
+
+    def _drop(self, key: str, remove_files: bool = True):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+        if remove_files:
+            self._remove_files(key)
+
+    def _evict(self):
+        """Remove least recently used entries until under max_bytes"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self._stats['evictions'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss/bytes-saved counters"""
+        with self._lock:
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'size_bytes': self._total_bytes,
+            }
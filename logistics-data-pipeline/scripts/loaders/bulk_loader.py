@@ -0,0 +1,112 @@
+"""
+SQLite Bulk Loader
+Chunked executemany inserts in a single tuned transaction
+"""
+import logging
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteBulkLoader:
+    """Insert DataFrames into SQLite faster than DataFrame.to_sql"""
+
+    # Write-path tuning: WAL avoids the rollback journal copy, NORMAL skips the
+    # fsync on every commit (still durable across application crashes in WAL mode),
+    # negative cache_size is in KiB
+    PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,
+        'temp_store': 'MEMORY',
+    }
+
+    # Matches the storage format SQLAlchemy's SQLite DateTime type reads back
+    DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+    def __init__(self, engine, chunk_size: int = 50000):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.last_stats: Dict[str, float] = {}
+
+    def _tune(self, cursor):
+        """Apply write-path PRAGMAs to the connection"""
+        for name, value in self.PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+
+    @classmethod
+    def _prepare(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert columns to types the sqlite3 driver can bind directly"""
+        prepared = df.copy(deep=False)
+
+        for column in prepared.columns:
+            if not pd.api.types.is_datetime64_any_dtype(prepared[column]):
+                continue
+
+            # Batches share a handful of timestamps, so format each distinct value once
+            codes, uniques = pd.factorize(prepared[column])
+            formatted = np.append(np.asarray(uniques.strftime(cls.DATETIME_FORMAT), dtype=object), None)
+            prepared[column] = formatted[codes]
+
+        return prepared
+
+    def load(self, table: str, df: pd.DataFrame, conflict_keys: Optional[Sequence[str]] = None) -> int:
+        """
+        Insert a DataFrame into an existing table in one transaction
+
+        Args:
+            table: Target table name
+            df: Rows to insert; column names must match the table
+            conflict_keys: Columns of a unique index; rows that collide
+                with stored ones are skipped (ON CONFLICT DO NOTHING)
+
+        Returns:
+            Number of rows inserted
+        """
+        if df.empty:
+            return 0
+
+        start = time.perf_counter()
+        prepared = self._prepare(df)
+
+        column_list = ', '.join(f'"{column}"' for column in prepared.columns)
+        placeholders = ', '.join('?' for _ in prepared.columns)
+        sql = f'INSERT INTO "{table}" ({column_list}) VALUES ({placeholders})'
+        if conflict_keys:
+            key_list = ', '.join(f'"{key}"' for key in conflict_keys)
+            sql += f' ON CONFLICT ({key_list}) DO NOTHING'
+
+        connection = self.engine.raw_connection()
+        inserted = 0
+
+        try:
+            cursor = connection.cursor()
+            self._tune(cursor)
+
+            for offset in range(0, len(prepared), self.chunk_size):
+                chunk = prepared.iloc[offset:offset + self.chunk_size]
+                cursor.executemany(sql, chunk.itertuples(index=False, name=None))
+                # sqlite3 sums rowcount over executemany; skipped rows are not counted
+                inserted += cursor.rowcount
+
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        elapsed = time.perf_counter() - start
+        rows_per_sec = len(prepared) / elapsed if elapsed > 0 else float('inf')
+        self.last_stats = {
+            'rows': len(prepared),
+            'inserted': inserted,
+            'seconds': elapsed,
+            'rows_per_sec': rows_per_sec,
+        }
+
+        logger.info(f"Bulk loaded {inserted}/{len(prepared)} rows into {table} in {elapsed:.2f}s ({rows_per_sec:,.0f} rows/sec)")
+        return inserted
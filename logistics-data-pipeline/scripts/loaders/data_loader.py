@@ -3,8 +3,24 @@ Data Loader
 Loads transformed data into database
 """
 import logging
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional
+import numpy as np
 import pandas as pd
-from .database_schema import DatabaseManager, BikeStation, Flight
+from sqlalchemy import (
+    select, update, func, table, column, and_, cast, null, Column, DateTime, MetaData, Table
+)
+from .database_schema import (
+    Base, DatabaseManager, BikeStation, Flight, BikeStationState, BikeSnapshot,
+    Station, StationAvailability, TableCount
+)
+from .bulk_loader import SQLiteBulkLoader
+from .postgres_loader import PostgresCopyLoader
+from .parquet_sink import ParquetSink
+from .rollups import RollupManager
+from .station_index import StationIndex
 
 logger = logging.getLogger(__name__)
 
@@ -12,15 +28,313 @@ logger = logging.getLogger(__name__)
 class DataLoader:
     """Load data into database"""
     
-    def __init__(self, db_path: str):
-        self.db_manager = DatabaseManager(db_path)
+    LOAD_METHODS = ('to_sql', 'bulk')
+    BIKE_LOAD_MODES = ('full', 'delta')
+    BIKE_STORAGE = ('wide', 'star')
+    DATABASE_TYPES = DatabaseManager.DATABASE_TYPES
+    
+    # Identity of a station across snapshots
+    STATION_KEY = ['network_id', 'station_id']
+    
+    # Descriptive station attributes kept in the stations dimension
+    STATION_ATTRIBUTES = ['network_name', 'city', 'country', 'station_name', 'latitude', 'longitude']
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        load_method: str = 'to_sql',
+        chunk_size: int = 50000,
+        bike_load_mode: str = 'full',
+        partition_by_day: bool = False,
+        bike_storage: str = 'wide',
+        maintain_rollups: bool = False,
+        station_index: bool = False,
+        metrics=None,
+        db_url: Optional[str] = None,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        archive: Optional[ParquetSink] = None,
+        idempotent: bool = False
+    ):
+        if load_method not in self.LOAD_METHODS:
+            raise ValueError(f"Unknown load method '{load_method}', expected one of {self.LOAD_METHODS}")
+        if bike_load_mode not in self.BIKE_LOAD_MODES:
+            raise ValueError(f"Unknown bike load mode '{bike_load_mode}', expected one of {self.BIKE_LOAD_MODES}")
+        if bike_storage not in self.BIKE_STORAGE:
+            raise ValueError(f"Unknown bike storage '{bike_storage}', expected one of {self.BIKE_STORAGE}")
+        if idempotent and bike_storage == 'star':
+            raise ValueError("Idempotent loads need bike_storage 'wide': star facts are keyed by load time")
+        
+        self.db_manager = DatabaseManager(db_path, url=db_url, pool_size=pool_size, max_overflow=max_overflow)
         self.db_manager.connect()
         self.db_manager.create_tables()
         
+        self.load_method = load_method
+        self.bike_load_mode = bike_load_mode
+        self.bike_storage = bike_storage
+        self.partition_by_day = partition_by_day
+        if partition_by_day:
+            for base in DatabaseManager.PARTITIONED_TABLES:
+                self.db_manager.refresh_partition_view(base)
+        if self.db_manager.dialect == 'postgresql':
+            self.bulk_loader = PostgresCopyLoader(self.db_manager.engine, chunk_size=chunk_size)
+        else:
+            self.bulk_loader = SQLiteBulkLoader(self.db_manager.engine, chunk_size=chunk_size)
+        self.rollups = RollupManager(self.db_manager) if maintain_rollups else None
+        # Optional monitoring.metrics.MetricsRegistry
+        self.metrics = metrics
+        # Seeded on first access (see station_index), not here: the seed scans every station
+        self.use_station_index = station_index
+        self._station_index = None
+        self._stream_snapshots = None
+        # Every loaded batch is also appended here when set
+        self.archive = archive
+        # Skip rows whose natural key (DatabaseManager.NATURAL_KEYS) is already stored
+        self.idempotent = idempotent
+        if idempotent and self.db_manager.ensure_natural_keys():
+            # Building the indexes may have removed duplicate rows
+            self.refresh_record_counts()
+        self._seed_record_counts()
+        
+    @property
+    def station_index(self) -> Optional[StationIndex]:
+        """
+        Grid index of the latest stations, or None if disabled
+        
+        Built from read_latest_stations on first access, so loaders that
+        never query it (e.g. one-off Airflow tasks) skip the full scan.
+        """
+        if self._station_index is None and self.use_station_index:
+            with self._stage('station_index', 'bikes') as record:
+                index = StationIndex()
+                index.update(self.read_latest_stations())
+                record.rows_out = len(index)
+            self._station_index = index
+        return self._station_index
+        
+    @classmethod
+    def from_config(cls, db_config: dict, metrics=None) -> 'DataLoader':
+        """
+        Create a DataLoader from the database section of config.yaml
+        
+        With type 'postgresql' the connection URL is read from the
+        LOGISTICS_DATABASE_URL environment variable, falling back to 'url'.
+        
+        Args:
+            db_config: Parsed 'database' config section
+            metrics: Optional MetricsRegistry recording load stages
+            
+        Returns:
+            Configured DataLoader
+        """
+        db_path, db_url = DatabaseManager.location_from_config(db_config)
+        
+        return cls(
+            db_path,
+            db_url=db_url,
+            pool_size=db_config.get('pool_size', 5),
+            max_overflow=db_config.get('max_overflow', 10),
+            load_method=db_config.get('load_method', 'to_sql'),
+            chunk_size=db_config.get('bulk_chunk_size', 50000),
+            bike_load_mode=db_config.get('bike_load_mode', 'full'),
+            partition_by_day=db_config.get('partition_by_day', False),
+            bike_storage=db_config.get('bike_storage', 'wide'),
+            maintain_rollups=db_config.get('rollups', False),
+            station_index=db_config.get('station_index', False),
+            archive=ParquetSink.from_config(db_config.get('archive', {})),
+            idempotent=db_config.get('idempotent', False),
+            metrics=metrics
+        )
+        
+    def _stage(self, stage: str, source: str, rows_in: Optional[int] = None):
+        """Time a load stage if metrics are enabled"""
+        if self.metrics is None:
+            return nullcontext(SimpleNamespace())
+        return self.metrics.stage(stage, source=source, rows_in=rows_in)
+        
+    @contextmanager
+    def _archived(self, table: str, df: pd.DataFrame):
+        """
+        Archive a batch before the block writing it to the database
+        
+        Archiving after the commit could lose rows: if the archive write
+        failed, an idempotent retry would find them stored and filter them
+        out. If the database write fails instead, the archived files are
+        removed again, so the retry does not archive the batch twice.
+        """
+        if self.archive is None:
+            yield
+            return
+        
+        source = 'bikes' if table == 'bike_stations' else table
+        with self._stage('archive', source, rows_in=len(df)):
+            written = self.archive.write(table, df)
+        
+        try:
+            yield
+        except Exception:
+            self.archive.discard(written)
+            raise
+        
+    def _write(self, table: str, df: pd.DataFrame) -> int:
+        """
+        Append a DataFrame to a table using the configured load method
+        
+        Returns:
+            Number of rows inserted; in idempotent mode rows already stored are skipped
+        """
+        conflict_keys = DatabaseManager.NATURAL_KEYS.get(table) if self.idempotent else None
+        
+        if self.partition_by_day and table in DatabaseManager.PARTITIONED_TABLES:
+            inserted = sum(
+                self._append(self.db_manager.ensure_partition(table, day), day_df, conflict_keys)
+                for day, day_df in df.groupby(df['timestamp'].dt.date, sort=True)
+            )
+        else:
+            inserted = self._append(table, df, conflict_keys)
+        
+        self._count_rows(table, inserted)
+        return inserted
+            
+    def _append(self, table: str, df: pd.DataFrame, conflict_keys: Optional[List[str]] = None) -> int:
+        if self.load_method == 'bulk':
+            return self.bulk_loader.load(table, df, conflict_keys=conflict_keys)
+        
+        if conflict_keys is None:
+            df.to_sql(
+                table,
+                self.db_manager.engine,
+                if_exists='append',
+                index=False
+            )
+            return len(df)
+        
+        def insert_ignoring_conflicts(pd_table, connection, keys, data_iter):
+            statement = self.db_manager.insert(pd_table.table).on_conflict_do_nothing(index_elements=conflict_keys)
+            return connection.execute(statement, [dict(zip(keys, row)) for row in data_iter]).rowcount
+        
+        return df.to_sql(
+            table,
+            self.db_manager.engine,
+            if_exists='append',
+            index=False,
+            method=insert_ignoring_conflicts
+        ) or 0
+        
+    def _new_rows(self, base: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drop rows whose natural key is already stored, or repeated within the batch
+        
+        The batch keys go to a temporary table joined against the stored
+        rows through the natural-key index, so a re-run costs one indexed
+        lookup per row and writes nothing.
+        
+        Args:
+            base: 'bike_stations' or 'flights'
+            df: Rows about to be loaded
+            
+        Returns:
+            Rows not stored yet
+        """
+        keys = DatabaseManager.NATURAL_KEYS[base]
+        batch = df.drop_duplicates(subset=keys, keep='last')
+        
+        model_table = Base.metadata.tables[base]
+        key_table = Table(
+            f'_batch_keys_{base}',
+            MetaData(),
+            *[Column(key, model_table.c[key].type) for key in keys],
+            prefixes=['TEMPORARY']
+        )
+        source = self._source(base)
+        key_rows = batch[keys].astype(object).where(batch[keys].notna(), None).to_dict('records')
+        
+        with self.db_manager.engine.begin() as connection:
+            key_table.create(connection)
+            try:
+                connection.execute(key_table.insert(), key_rows)
+                stored = connection.execute(
+                    select(*key_table.c).join_from(
+                        key_table, source, and_(*[source.c[key] == key_table.c[key] for key in keys])
+                    )
+                ).all()
+            finally:
+                key_table.drop(connection)
+        
+        if not stored:
+            return batch
+        
+        stored = pd.DataFrame(stored, columns=keys).astype({'observed_at': 'datetime64[ns]'}).assign(_stored=True)
+        merged = batch[keys].astype({key: object for key in keys if key != 'observed_at'}).merge(
+            stored, on=keys, how='left'
+        )
+        return batch[merged['_stored'].isna().to_numpy()]
+            
+    def _source(self, base: str):
+        """
+        Table to read rows of a partitioned table from
+        
+        Args:
+            base: Table name, e.g. 'bike_stations'
+            
+        Returns:
+            The mapped table, the <base>_all view over it and its partitions,
+            or for star-schema bikes a join shaped like bike_stations
+        """
+        if base == 'bike_stations' and self.bike_storage == 'star':
+            stations = Station.__table__
+            facts = StationAvailability.__table__
+            
+            return select(
+                stations.c.network_id,
+                stations.c.network_name,
+                stations.c.city,
+                stations.c.country,
+                stations.c.station_id,
+                stations.c.station_name,
+                stations.c.latitude,
+                stations.c.longitude,
+                facts.c.free_bikes,
+                facts.c.empty_slots,
+                (facts.c.free_bikes + facts.c.empty_slots).label('total_slots'),
+                # Facts are keyed by load time and do not keep the source time
+                cast(null(), DateTime).label('observed_at'),
+                facts.c.ts.label('timestamp'),
+                facts.c.ts.label('extracted_at')
+            ).join_from(facts, stations, facts.c.station_key == stations.c.station_key).subquery('bike_stations_star')
+        
+        base_table = BikeStation.__table__ if base == 'bike_stations' else Flight.__table__
+        
+        if not self.partition_by_day:
+            return base_table
+        
+        return table(f"{base}_all", *[column(c.name) for c in base_table.columns])
+        
+    def drop_old_partitions(self, retention_days: int) -> List[str]:
+        """
+        Drop day partitions older than retention_days
+        
+        Args:
+            retention_days: Number of days to keep, including today
+            
+        Returns:
+            Names of the dropped partitions
+        """
+        cutoff = datetime.utcnow().date() - timedelta(days=retention_days - 1)
+        dropped = []
+        
+        for base in DatabaseManager.PARTITIONED_TABLES:
+            dropped.extend(self.db_manager.drop_partitions(base, cutoff))
+            
+        return dropped
+        
     def load_bikes(self, df: pd.DataFrame) -> int:
         """
         Load bike station data to database
         
+        In delta mode only stations whose availability changed since their
+        last stored row are written; see get_bike_timeseries.
+        
         Args:
             df: DataFrame with bike station data
             
@@ -34,20 +348,337 @@ class DataLoader:
         logger.info(f"Loading {len(df)} bike station records")
         
         try:
-            df.to_sql(
-                'bike_stations',
-                self.db_manager.engine,
-                if_exists='append',
-                index=False
-            )
+            with self._stage('load', 'bikes', rows_in=len(df)) as record:
+                if self.idempotent:
+                    with self._stage('dedupe', 'bikes', rows_in=len(df)) as dedupe:
+                        df = self._new_rows('bike_stations', df)
+                        dedupe.rows_out = len(df)
+                    
+                    if df.empty:
+                        logger.info("All bike records are already stored, nothing to load")
+                        record.rows_out = 0
+                        return 0
+                
+                with self._archived('bike_stations', df):
+                    with self._stage('db_write', 'bikes', rows_in=len(df)) as write:
+                        if self.bike_load_mode == 'delta':
+                            loaded = self._load_bikes_delta(df)
+                        else:
+                            loaded = self._store_bikes(df)
+                            logger.info(f"Successfully loaded {loaded} bike records")
+                        write.rows_out = loaded
+                
+                # Rollup merges are additive, so they only run once the rows are stored;
+                # a failed write retried by Airflow must not count the batch twice
+                if self.rollups is not None:
+                    with self._stage('rollups', 'bikes', rows_in=len(df)):
+                        self.rollups.update_bikes(df)
+                
+                # An index not seeded yet picks these rows up from the database when it is
+                if self._station_index is not None:
+                    with self._stage('station_index', 'bikes', rows_in=len(df)):
+                        self._station_index.update(df)
+                
+                record.rows_out = loaded
             
-            logger.info(f"Successfully loaded {len(df)} bike records")
-            return len(df)
+            return loaded
             
         except Exception as e:
             logger.error(f"Failed to load bike data: {e}")
             raise
             
+    def _store_bikes(self, df: pd.DataFrame) -> int:
+        """Write bike rows to the wide table or the star schema, returning rows inserted"""
+        if self.bike_storage == 'star':
+            return self._load_bikes_star(df)
+        return self._write('bike_stations', df)
+            
+    def _upsert_stations(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Insert new stations and update those whose attributes changed
+        
+        Args:
+            df: Bike station rows
+            
+        Returns:
+            DataFrame mapping (network_id, station_id) to station_key
+        """
+        network_ids = [str(n) for n in df['network_id'].unique()]
+        stations = Station.__table__
+        existing_query = select(
+            *[stations.c[c] for c in ['station_key'] + self.STATION_KEY + self.STATION_ATTRIBUTES]
+        ).where(stations.c.network_id.in_(network_ids))
+        
+        incoming = df.drop_duplicates(subset=self.STATION_KEY, keep='last')[self.STATION_KEY + self.STATION_ATTRIBUTES]
+        existing = pd.read_sql(existing_query, self.db_manager.engine)
+        merged = incoming.merge(existing, on=self.STATION_KEY, how='left', suffixes=('', '_stored'))
+        
+        changed = merged['station_key'].isna()
+        for attribute in self.STATION_ATTRIBUTES:
+            new, stored = merged[attribute], merged[f'{attribute}_stored']
+            changed |= (new != stored) & ~(new.isna() & stored.isna())
+        
+        upserts = merged.loc[changed.to_numpy(), self.STATION_KEY + self.STATION_ATTRIBUTES]
+        
+        if not upserts.empty:
+            rows = upserts.astype(object).where(upserts.notna(), None).to_dict('records')
+            now = datetime.utcnow()
+            for row in rows:
+                row['updated_at'] = now
+            
+            statement = self.db_manager.insert(Station)
+            statement = statement.on_conflict_do_update(
+                index_elements=self.STATION_KEY,
+                set_={c: statement.excluded[c] for c in self.STATION_ATTRIBUTES + ['updated_at']}
+            )
+            
+            with self.db_manager.engine.begin() as connection:
+                connection.execute(statement, rows)
+            
+            logger.info(f"Upserted {len(rows)} stations into the dimension")
+        
+        keys_query = select(stations.c.station_key, stations.c.network_id, stations.c.station_id).where(
+            stations.c.network_id.in_(network_ids)
+        )
+        return pd.read_sql(keys_query, self.db_manager.engine)
+            
+    def _load_bikes_star(self, df: pd.DataFrame) -> int:
+        """
+        Fill the stations dimension and the availability fact table in one pass
+        
+        Args:
+            df: Bike station rows as produced by BikesTransformer
+            
+        Returns:
+            Number of fact rows inserted
+        """
+        keys = self._upsert_stations(df)
+        
+        facts = df[self.STATION_KEY + ['timestamp', 'free_bikes', 'empty_slots']].merge(
+            keys, on=self.STATION_KEY, how='inner'
+        )
+        facts = facts.rename(columns={'timestamp': 'ts'})[['station_key', 'ts', 'free_bikes', 'empty_slots']]
+        
+        inserted = self._append('station_availability', facts)
+        self._count_rows('station_availability', inserted)
+        return inserted
+            
+    def _read_station_state(self, network_ids) -> pd.DataFrame:
+        """Read the last known availability for the given networks"""
+        query = select(
+            BikeStationState.network_id,
+            BikeStationState.station_id,
+            BikeStationState.free_bikes,
+            BikeStationState.empty_slots
+        ).where(BikeStationState.network_id.in_([str(n) for n in network_ids]))
+        
+        return pd.read_sql(query, self.db_manager.engine)
+    
+    def _load_bikes_delta(self, df: pd.DataFrame) -> int:
+        """
+        Write only stations whose free_bikes/empty_slots changed
+        
+        Args:
+            df: Full bike station snapshot
+            
+        Returns:
+            Number of changed records inserted
+        """
+        snapshot = df.drop_duplicates(subset=self.STATION_KEY, keep='last')
+        previous = self._read_station_state(snapshot['network_id'].unique())
+        
+        merged = snapshot.merge(previous, on=self.STATION_KEY, how='left', suffixes=('', '_prev'))
+        changed_mask = (
+            merged['free_bikes_prev'].isna()
+            | (merged['free_bikes'] != merged['free_bikes_prev'])
+            | (merged['empty_slots'] != merged['empty_slots_prev'])
+        ).to_numpy()
+        changed = snapshot[changed_mask]
+        
+        # Changed rows go in first: if the state update below fails, the next
+        # run sees the old state and simply writes these stations again
+        if not changed.empty:
+            self._store_bikes(changed)
+        
+        state_rows = changed[self.STATION_KEY + ['free_bikes', 'empty_slots', 'timestamp']].to_dict('records')
+        snapshot_rows = self._snapshot_rows(snapshot, changed_mask)
+        
+        state_insert = self.db_manager.insert(BikeStationState)
+        state_upsert = state_insert.on_conflict_do_update(
+            index_elements=self.STATION_KEY,
+            set_={
+                'free_bikes': state_insert.excluded.free_bikes,
+                'empty_slots': state_insert.excluded.empty_slots,
+                'timestamp': state_insert.excluded.timestamp,
+            }
+        )
+        
+        with self.db_manager.engine.begin() as connection:
+            if state_rows:
+                connection.execute(state_upsert, state_rows)
+            self._write_snapshots(connection, snapshot_rows)
+        
+        logger.info(f"Delta load: {len(changed)}/{len(snapshot)} stations changed")
+        return len(changed)
+    
+    def _snapshot_rows(self, snapshot: pd.DataFrame, changed_mask: np.ndarray) -> List[Dict]:
+        """
+        One bike_snapshots row per network in a delta batch
+        
+        Args:
+            snapshot: Deduplicated station snapshot
+            changed_mask: Which snapshot rows changed
+            
+        Returns:
+            Rows with timestamp, network_id, station_count and changed_count
+        """
+        counts = pd.DataFrame({
+            'network_id': snapshot['network_id'].astype(str).to_numpy(),
+            'timestamp': snapshot['timestamp'].to_numpy(),
+            'changed': changed_mask,
+        }).groupby('network_id', sort=False).agg(
+            timestamp=('timestamp', 'max'),
+            station_count=('changed', 'size'),
+            changed_count=('changed', 'sum')
+        )
+        
+        return [
+            {
+                'timestamp': pd.Timestamp(count['timestamp']).to_pydatetime(),
+                'network_id': network_id,
+                'station_count': int(count['station_count']),
+                'changed_count': int(count['changed_count']),
+            }
+            for network_id, count in counts.iterrows()
+        ]
+    
+    def _write_snapshots(self, connection, rows: List[Dict]):
+        """
+        Insert bike_snapshots rows, keeping rows an earlier load already wrote
+        
+        A retried load computes its counts against the station state it
+        updated the first time (and, when idempotent, without the rows it
+        stored), so it must not replace them. Within one load_bikes_stream,
+        later chunks of a network add to the row its first chunk inserted.
+        
+        Args:
+            connection: Connection of the delta load's transaction
+            rows: Rows from _snapshot_rows
+        """
+        snapshot_insert = self.db_manager.insert(BikeSnapshot).on_conflict_do_nothing(
+            index_elements=['timestamp', 'network_id']
+        )
+        
+        for row in rows:
+            key = (row['timestamp'], row['network_id'])
+            
+            if self._stream_snapshots is not None and key in self._stream_snapshots:
+                connection.execute(
+                    update(BikeSnapshot)
+                    .where(BikeSnapshot.timestamp == row['timestamp'], BikeSnapshot.network_id == row['network_id'])
+                    .values(
+                        station_count=BikeSnapshot.station_count + row['station_count'],
+                        changed_count=BikeSnapshot.changed_count + row['changed_count']
+                    )
+                )
+                continue
+            
+            inserted = connection.execute(snapshot_insert, row).rowcount
+            if self._stream_snapshots is not None and inserted:
+                self._stream_snapshots.add(key)
+    
+    def read_latest_stations(self) -> pd.DataFrame:
+        """
+        Read the most recent stored row of every station
+        
+        Returns:
+            DataFrame shaped like bike_stations, one row per station
+        """
+        source = self._source('bike_stations')
+        columns = [c.name for c in BikeStation.__table__.columns if c.name != 'id']
+        
+        latest = select(
+            source.c.network_id,
+            source.c.station_id,
+            func.max(source.c.timestamp).label('latest')
+        ).group_by(source.c.network_id, source.c.station_id).subquery('latest')
+        
+        query = select(*[source.c[c] for c in columns]).join_from(
+            source,
+            latest,
+            and_(
+                source.c.network_id == latest.c.network_id,
+                source.c.station_id == latest.c.station_id,
+                source.c.timestamp == latest.c.latest
+            )
+        )
+        
+        return pd.read_sql(query, self.db_manager.engine, parse_dates=['timestamp', 'extracted_at'])
+    
+    def get_bike_timeseries(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        network_id: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Rebuild the full per-snapshot station series from change-only rows
+        
+        Each station is carried forward from its latest change to every
+        snapshot taken after it. Stations dropped from the feed keep their
+        last value until they reappear.
+        
+        Args:
+            start: First snapshot time to include
+            end: Last snapshot time to include
+            network_id: Restrict to a single network
+            
+        Returns:
+            DataFrame shaped like bike_stations, one row per station per snapshot
+        """
+        source = self._source('bike_stations')
+        columns = [c.name for c in BikeStation.__table__.columns if c.name != 'id']
+        
+        snapshot_query = select(BikeSnapshot.timestamp, BikeSnapshot.network_id)
+        if network_id is not None:
+            snapshot_query = snapshot_query.where(BikeSnapshot.network_id == network_id)
+        if start is not None:
+            snapshot_query = snapshot_query.where(BikeSnapshot.timestamp >= start)
+        if end is not None:
+            snapshot_query = snapshot_query.where(BikeSnapshot.timestamp <= end)
+        
+        change_query = select(*[source.c[c] for c in columns])
+        if end is not None:
+            change_query = change_query.where(source.c.timestamp <= end)
+        if network_id is not None:
+            change_query = change_query.where(source.c.network_id == network_id)
+        
+        engine = self.db_manager.engine
+        snapshots = pd.read_sql(snapshot_query, engine, parse_dates=['timestamp'])
+        changes = pd.read_sql(change_query, engine, parse_dates=['timestamp', 'extracted_at'])
+        
+        if snapshots.empty or changes.empty:
+            return pd.DataFrame(columns=columns)
+        
+        # Each station only gets the snapshots of its own network
+        grid = changes[self.STATION_KEY].drop_duplicates().merge(
+            snapshots.rename(columns={'timestamp': 'snapshot'}),
+            on='network_id'
+        )
+        
+        series = pd.merge_asof(
+            grid.sort_values('snapshot'),
+            changes.sort_values('timestamp'),
+            left_on='snapshot',
+            right_on='timestamp',
+            by=self.STATION_KEY,
+            direction='backward'
+        )
+        series = series.dropna(subset=['timestamp'])
+        series['timestamp'] = series['snapshot']
+        
+        return series[columns].sort_values(['timestamp'] + self.STATION_KEY).reset_index(drop=True)
+            
     def load_flights(self, df: pd.DataFrame) -> int:
         """
         Load flight data to database
@@ -65,31 +696,184 @@ class DataLoader:
         logger.info(f"Loading {len(df)} flight records")
         
         try:
-            df.to_sql(
-                'flights',
-                self.db_manager.engine,
-                if_exists='append',
-                index=False
-            )
+            with self._stage('load', 'flights', rows_in=len(df)) as record:
+                if self.idempotent:
+                    with self._stage('dedupe', 'flights', rows_in=len(df)) as dedupe:
+                        df = self._new_rows('flights', df)
+                        dedupe.rows_out = len(df)
+                    
+                    if df.empty:
+                        logger.info("All flight records are already stored, nothing to load")
+                        record.rows_out = 0
+                        return 0
+                
+                with self._archived('flights', df):
+                    with self._stage('db_write', 'flights', rows_in=len(df)) as write:
+                        loaded = self._write('flights', df)
+                        write.rows_out = loaded
+                
+                if self.rollups is not None:
+                    with self._stage('rollups', 'flights', rows_in=len(df)):
+                        self.rollups.update_flights(df)
+                
+                record.rows_out = loaded
             
-            logger.info(f"Successfully loaded {len(df)} flight records")
-            return len(df)
+            logger.info(f"Successfully loaded {loaded} flight records")
+            return loaded
             
         except Exception as e:
             logger.error(f"Failed to load flight data: {e}")
             raise
             
+    def _counter_name(self, base: str) -> str:
+        """table_counts row holding the row count of a logical table"""
+        if base == 'bike_stations' and self.bike_storage == 'star':
+            return 'station_availability'
+        return base
+        
+    def _count_rows(self, table_name: str, rows: int):
+        """Adjust the stored row count of a table after a write"""
+        if rows == 0:
+            return
+        
+        with self.db_manager.engine.begin() as connection:
+            connection.execute(
+                update(TableCount)
+                .where(TableCount.table_name == table_name)
+                .values(row_count=TableCount.row_count + rows)
+            )
+            
+    def _seed_record_counts(self):
+        """Count rows once for databases that have no table_counts rows yet"""
+        with self.db_manager.engine.connect() as connection:
+            known = set(connection.execute(select(TableCount.table_name)).scalars())
+        
+        missing = [base for base in DatabaseManager.PARTITIONED_TABLES if self._counter_name(base) not in known]
+        if missing:
+            self.refresh_record_counts(missing)
+            
+    def refresh_record_counts(self, bases: Optional[List[str]] = None) -> dict:
+        """
+        Recount rows with full scans and store the result in table_counts
+        
+        Only needed when rows were written outside this loader.
+        
+        Args:
+            bases: Logical tables to recount; None recounts all
+            
+        Returns:
+            Row count per logical table
+        """
+        counts = {}
+        statement = self.db_manager.insert(TableCount)
+        statement = statement.on_conflict_do_update(
+            index_elements=['table_name'],
+            set_={'row_count': statement.excluded.row_count}
+        )
+        
+        with self.db_manager.engine.begin() as connection:
+            for base in bases or DatabaseManager.PARTITIONED_TABLES:
+                counts[base] = connection.execute(select(func.count()).select_from(self._source(base))).scalar()
+                connection.execute(statement, {'table_name': self._counter_name(base), 'row_count': counts[base]})
+        
+        logger.info(f"Recounted rows: {counts}")
+        return counts
+            
     def get_record_counts(self) -> dict:
-        """Get count of records in each table"""
-        session = self.db_manager.get_session()
+        """
+        Get count of records in each table
         
-        try:
-            bike_count = session.query(BikeStation).count()
-            flight_count = session.query(Flight).count()
+        Read from table_counts, which every load updates, instead of counting rows.
+        """
+        names = {base: self._counter_name(base) for base in DatabaseManager.PARTITIONED_TABLES}
+        
+        with self.db_manager.engine.connect() as connection:
+            stored = dict(connection.execute(
+                select(TableCount.table_name, TableCount.row_count).where(TableCount.table_name.in_(names.values()))
+            ).all())
+        
+        return {base: stored.get(name, 0) for base, name in names.items()}
             
-            return {
-                'bike_stations': bike_count,
-                'flights': flight_count
-            }
+    def load_bikes_stream(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """
+        Load bike station chunks, committing each before pulling the next
+        
+        Args:
+            chunks: Iterable of DataFrames, e.g. BikesTransformer.transform_stream
+            
+        Returns:
+            Number of records inserted
+        """
+        total = 0
+        # (timestamp, network_id) snapshot rows inserted by this stream (delta mode)
+        self._stream_snapshots = set()
+        
+        try:
+            for number, chunk in enumerate(chunks, start=1):
+                total += self.load_bikes(chunk)
+                logger.info(f"Committed bike chunk {number} ({total} records so far)")
         finally:
-            session.close()
+            self._stream_snapshots = None
+            
+        return total
+            
+    def load_flights_stream(self, chunks: Iterable[pd.DataFrame]) -> int:
+        """
+        Load flight chunks, committing each before pulling the next
+        
+        Args:
+            chunks: Iterable of DataFrames, e.g. FlightsTransformer.transform_stream
+            
+        Returns:
+            Number of records inserted
+        """
+        total = 0
+        
+        for number, chunk in enumerate(chunks, start=1):
+            total += self.load_flights(chunk)
+            logger.info(f"Committed flight chunk {number} ({total} records so far)")
+            
+        return total
+            
+    def rebuild_rollups(self, since: Optional[datetime] = None, window: timedelta = timedelta(days=1)):
+        """
+        Recompute the hourly rollup tables from stored rows
+        
+        Args:
+            since: Rebuild buckets from this time on (rounded down to the hour);
+                None rebuilds everything
+            window: Time span read per chunk from the raw tables
+        """
+        if since is not None:
+            since = since.replace(minute=0, second=0, microsecond=0)
+        
+        def read(base: str) -> Iterable[pd.DataFrame]:
+            # Each window is read completely before the rollups are written,
+            # so no cursor stays open across writes to the same database
+            source = self._source(base)
+            bounds = select(func.min(source.c.timestamp), func.max(source.c.timestamp))
+            if since is not None:
+                bounds = bounds.where(source.c.timestamp >= since)
+            
+            with self.db_manager.engine.connect() as connection:
+                first, last = connection.execute(bounds).one()
+            
+            if first is None:
+                return
+            
+            start = pd.Timestamp(first).floor('h').to_pydatetime()
+            last = pd.Timestamp(last).to_pydatetime()
+            
+            while start <= last:
+                end = start + window
+                query = select(source).where(source.c.timestamp >= start, source.c.timestamp < end)
+                yield pd.read_sql(query, self.db_manager.engine, parse_dates=['timestamp'])
+                start = end
+        
+        if self.bike_load_mode == 'delta':
+            # Change-only rows must be expanded back into full snapshots first
+            bike_chunks = [self.get_bike_timeseries(start=since)]
+        else:
+            bike_chunks = read('bike_stations')
+        
+        (self.rollups or RollupManager(self.db_manager)).rebuild(bike_chunks, read('flights'), since=since)
@@ -2,15 +2,30 @@
 Database Schema Definitions
 Defines tables for logistics data
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import (
+    create_engine, inspect, Column, Integer, String, Float, Boolean, DateTime,
+    Index, MetaData, ForeignKey, UniqueConstraint
+)
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
 import logging
+import os
+import re
+import threading
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Process-wide engines and schema checks, keyed by database URL
+_engines: Dict[str, Engine] = {}
+_checked_schemas: Set[str] = set()
+_registry_lock = threading.Lock()
+
 
 class BikeStation(Base):
     """Bike station data model"""
@@ -28,8 +43,14 @@ class BikeStation(Base):
     free_bikes = Column(Integer)
     empty_slots = Column(Integer)
     total_slots = Column(Integer)
+    observed_at = Column(DateTime)  # station timestamp sent by the API
     timestamp = Column(DateTime)
     extracted_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ix_bike_stations_station_ts', 'station_id', 'timestamp'),
+        Index('ix_bike_stations_network_ts', 'network_id', 'timestamp'),
+    )
 
 
 class Flight(Base):
@@ -47,30 +68,527 @@ class Flight(Base):
     on_ground = Column(Boolean)
     velocity = Column(Float)
     heading = Column(Float)
+    observed_at = Column(DateTime)  # OpenSky time_position, else last_contact
     timestamp = Column(DateTime)
     extracted_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index('ix_flights_icao24_ts', 'icao24', 'timestamp'),
+        Index('ix_flights_airport_ts', 'airport_code', 'timestamp'),
+    )
+
+
+class BikeStationState(Base):
+    """Last known availability per station, used by change-only loads"""
+    __tablename__ = 'bike_station_state'
+    
+    network_id = Column(String(100), primary_key=True)
+    station_id = Column(String(100), primary_key=True)
+    free_bikes = Column(Integer)
+    empty_slots = Column(Integer)
+    timestamp = Column(DateTime)
+
+
+class BikeSnapshot(Base):
+    """One row per network and bike load, used to expand change-only rows into a time series"""
+    __tablename__ = 'bike_snapshots'
+    
+    timestamp = Column(DateTime, primary_key=True)
+    network_id = Column(String(100), primary_key=True)
+    station_count = Column(Integer)
+    changed_count = Column(Integer)
+
+
+class Station(Base):
+    """Station dimension: descriptive attributes, one row per station"""
+    __tablename__ = 'stations'
+    
+    station_key = Column(Integer, primary_key=True, autoincrement=True)
+    network_id = Column(String(100), nullable=False)
+    station_id = Column(String(100), nullable=False)
+    network_name = Column(String(200))
+    city = Column(String(100))
+    country = Column(String(100))
+    station_name = Column(String(200))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    updated_at = Column(DateTime)
+    
+    __table_args__ = (
+        UniqueConstraint('network_id', 'station_id', name='uq_stations_network_station'),
+    )
+
+
+class StationAvailability(Base):
+    """Availability fact: only the values that change between snapshots"""
+    __tablename__ = 'station_availability'
+    
+    station_key = Column(Integer, ForeignKey('stations.station_key'), primary_key=True)
+    ts = Column(DateTime, primary_key=True)
+    free_bikes = Column(Integer)
+    empty_slots = Column(Integer)
+    
+    # Clustered on (station_key, ts) in SQLite, so no separate rowid b-tree
+    __table_args__ = {'sqlite_with_rowid': False}
+
+
+class StationHourly(Base):
+    """Hourly availability rollup per station"""
+    __tablename__ = 'station_hourly'
+    
+    network_id = Column(String(100), primary_key=True)
+    station_id = Column(String(100), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    samples = Column(Integer)
+    min_free_bikes = Column(Integer)
+    max_free_bikes = Column(Integer)
+    sum_free_bikes = Column(Integer)
+    avg_free_bikes = Column(Float)
+
+
+class NetworkHourly(Base):
+    """Hourly utilization rollup per bike network"""
+    __tablename__ = 'network_hourly'
+    
+    network_id = Column(String(100), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    samples = Column(Integer)
+    sum_free_bikes = Column(Integer)
+    sum_total_slots = Column(Integer)
+    utilization_pct = Column(Float)
+
+
+class AirportHourly(Base):
+    """Hourly airborne vs on-ground aircraft counts per airport"""
+    __tablename__ = 'airport_hourly'
+    
+    airport_code = Column(String(10), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    samples = Column(Integer)
+    airborne = Column(Integer)
+    on_ground = Column(Integer)
+
+
+class TableCount(Base):
+    """Row count per table, maintained by the loader instead of counting rows"""
+    __tablename__ = 'table_counts'
+    
+    table_name = Column(String(100), primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+
+
+def get_engine(url: str, pool_size: int = 5, max_overflow: int = 10) -> Engine:
+    """
+    Get the process-wide engine for a database URL, creating it on first use
+    
+    Every DatabaseManager for the same URL shares one engine and therefore one
+    connection pool; pool settings of later callers are ignored.
+    
+    Args:
+        url: SQLAlchemy database URL
+        pool_size: Connections kept open in the pool
+        max_overflow: Extra connections allowed under load
+        
+    Returns:
+        Shared Engine
+    """
+    with _registry_lock:
+        engine = _engines.get(url)
+        if engine is not None:
+            return engine
+        
+        if url.startswith('sqlite') and ':memory:' not in url and url != 'sqlite://':
+            # SQLAlchemy 1.4 opens a new file connection per checkout by default;
+            # a pool keeps them (and their PRAGMAs and page cache) between loads.
+            # Pooled connections move between threads, one at a time.
+            engine = create_engine(
+                url,
+                poolclass=QueuePool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                connect_args={'check_same_thread': False}
+            )
+        elif url.startswith('sqlite'):
+            engine = create_engine(url)
+        else:
+            # Writers from several pipelines share the server, so keep a bounded
+            # pool per process and drop connections the server has closed
+            engine = create_engine(
+                url,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_pre_ping=True
+            )
+        
+        _engines[url] = engine
+        return engine
+
+
+def dispose_engine(url: str):
+    """Close the pooled connections of one database and forget its engine and schema check"""
+    with _registry_lock:
+        engine = _engines.pop(url, None)
+        if engine is not None:
+            engine.dispose()
+        _checked_schemas.discard(url)
+        _checked_schemas.discard(f'{url}#natural_keys')
+
+
+def dispose_engines():
+    """Close all pooled connections and forget engines and schema checks"""
+    with _registry_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _checked_schemas.clear()
 
 
 class DatabaseManager:
     """Manage database connections and operations"""
     
-    def __init__(self, db_path: str):
+    # Tables that can be split into one table per day
+    PARTITIONED_TABLES = ('bike_stations', 'flights')
+    
+    # Columns identifying one source observation; idempotent loads back them
+    # with ux_<table>_natural_key unique indexes
+    NATURAL_KEYS = {
+        'bike_stations': ['network_id', 'station_id', 'observed_at'],
+        'flights': ['airport_code', 'icao24', 'observed_at'],
+    }
+    
+    DATABASE_TYPES = ('sqlite', 'postgresql')
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        url: Optional[str] = None,
+        pool_size: int = 5,
+        max_overflow: int = 10
+    ):
+        """
+        Args:
+            db_path: SQLite database file, used when no url is given
+            url: SQLAlchemy URL of another database, e.g. postgresql://user@host/db
+            pool_size: Connections kept open per process (server databases only)
+            max_overflow: Extra connections allowed under load (server databases only)
+        """
+        if db_path is None and url is None:
+            raise ValueError("Either db_path or url is required")
+        
         self.db_path = db_path
+        self.url = url or f'sqlite:///{db_path}'
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
         self.engine = None
         self.Session = None
+        self.partition_metadata = MetaData()
+        self._known_partitions = set()
+        self._natural_keys = False
+        
+    @classmethod
+    def from_config(cls, db_config: dict) -> 'DatabaseManager':
+        """
+        Create a manager for the database described by config.yaml
+        
+        With type 'postgresql' the connection URL is read from the
+        LOGISTICS_DATABASE_URL environment variable, falling back to 'url'.
+        
+        Args:
+            db_config: Parsed 'database' config section
+            
+        Returns:
+            DatabaseManager, not yet connected
+        """
+        db_path, url = cls.location_from_config(db_config)
+        return cls(
+            db_path,
+            url=url,
+            pool_size=db_config.get('pool_size', 5),
+            max_overflow=db_config.get('max_overflow', 10)
+        )
+        
+    @classmethod
+    def location_from_config(cls, db_config: dict) -> Tuple[Optional[str], Optional[str]]:
+        """(db_path, url) of the database described by a 'database' config section"""
+        db_type = db_config.get('type', 'sqlite')
+        if db_type not in cls.DATABASE_TYPES:
+            raise ValueError(f"Unknown database type '{db_type}', expected one of {cls.DATABASE_TYPES}")
+        
+        if db_type == 'postgresql':
+            return None, os.environ.get('LOGISTICS_DATABASE_URL') or db_config['url']
+        return db_config['path'], None
         
     def connect(self):
         """Create database connection"""
-        logger.info(f"Connecting to database: {self.db_path}")
-        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        logger.info(f"Connecting to database: {self.db_path or make_url(self.url).render_as_string(hide_password=True)}")
+        
+        self.engine = get_engine(self.url, pool_size=self.pool_size, max_overflow=self.max_overflow)
         self.Session = sessionmaker(bind=self.engine)
         
-    def create_tables(self):
-        """Create all tables if they don't exist"""
+    @property
+    def dialect(self) -> str:
+        """Dialect name of the connected engine, e.g. 'sqlite' or 'postgresql'"""
+        return self.engine.dialect.name
+        
+    def create_tables(self, force: bool = False):
+        """
+        Create all tables if they don't exist
+        
+        The check runs once per database and process; later managers for the
+        same URL skip it.
+        
+        Args:
+            force: Check again even if this process already did
+        """
+        with _registry_lock:
+            if self.url in _checked_schemas and not force:
+                return
+        
         logger.info("Creating database tables")
         Base.metadata.create_all(self.engine)
+        self.ensure_columns()
+        
+        with _registry_lock:
+            _checked_schemas.add(self.url)
         logger.info("Tables created successfully")
         
+    def ensure_columns(self) -> List[str]:
+        """
+        Add model columns that existing tables and day partitions lack
+        
+        create_all leaves existing tables alone, so columns declared later
+        (e.g. observed_at) are added here as nullable columns.
+        
+        Returns:
+            Added columns as '<table>.<column>'
+        """
+        added = []
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        
+        for model_table in Base.metadata.sorted_tables:
+            names = [model_table.name]
+            if model_table.name in self.PARTITIONED_TABLES:
+                names += self.list_partitions(model_table.name)
+            
+            changed = False
+            for name in names:
+                if name not in existing_tables:
+                    continue
+                
+                present = {column['name'] for column in inspector.get_columns(name)}
+                for column in model_table.columns:
+                    if column.name in present:
+                        continue
+                    
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    with self.engine.begin() as connection:
+                        connection.exec_driver_sql(f'ALTER TABLE "{name}" ADD COLUMN "{column.name}" {column_type}')
+                    added.append(f'{name}.{column.name}')
+                    changed = True
+            
+            # The <base>_all view lists columns explicitly
+            if changed and len(names) > 1:
+                self.refresh_partition_view(model_table.name)
+        
+        if added:
+            logger.info(f"Added columns: {added}")
+        return added
+        
+    def _create_natural_key(self, name: str, base: str) -> bool:
+        """Create the natural-key unique index of one table, dropping duplicate observations first"""
+        index_name = f'ux_{name}_natural_key'
+        if index_name in {index['name'] for index in inspect(self.engine).get_indexes(name)}:
+            return False
+        
+        keys = ', '.join(f'"{key}"' for key in self.NATURAL_KEYS[base])
+        
+        with self.engine.begin() as connection:
+            # Rows appended twice before the index existed; keep the first copy
+            removed = connection.exec_driver_sql(
+                f'DELETE FROM "{name}" WHERE observed_at IS NOT NULL AND id NOT IN '
+                f'(SELECT MIN(id) FROM "{name}" GROUP BY {keys})'
+            ).rowcount
+            connection.exec_driver_sql(f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{name}" ({keys})')
+        
+        if removed:
+            logger.warning(f"Removed {removed} duplicate observations from {name}")
+        return True
+        
+    def ensure_natural_keys(self) -> List[str]:
+        """
+        Back NATURAL_KEYS with unique indexes, on base tables and day partitions
+        
+        Runs once per database and process. Partitions created later by this
+        manager get the index too. Rows without observed_at never conflict,
+        since NULLs are distinct.
+        
+        Returns:
+            Names of the indexes created
+        """
+        self._natural_keys = True
+        with _registry_lock:
+            if f'{self.url}#natural_keys' in _checked_schemas:
+                return []
+        
+        created = []
+        existing_tables = set(inspect(self.engine).get_table_names())
+        
+        for base in self.NATURAL_KEYS:
+            for name in [base] + self.list_partitions(base):
+                if name in existing_tables and self._create_natural_key(name, base):
+                    created.append(f'ux_{name}_natural_key')
+        
+        with _registry_lock:
+            _checked_schemas.add(f'{self.url}#natural_keys')
+        if created:
+            logger.info(f"Created natural key indexes: {created}")
+        return created
+        
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create indexes declared on the models that an existing database lacks
+        
+        create_all only adds indexes together with new tables, so databases
+        created before an index was declared need this once.
+        
+        Returns:
+            Names of the indexes created
+        """
+        created = []
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    logger.info(f"Creating index {index.name} on {table.name}")
+                    index.create(self.engine)
+                    created.append(index.name)
+        
+        return created
+        
+    @staticmethod
+    def partition_name(base: str, day: date) -> str:
+        """Name of the table holding one day of a partitioned table"""
+        return f"{base}_{day:%Y%m%d}"
+        
+    def list_partitions(self, base: str) -> List[str]:
+        """List existing day partitions of a table, oldest first"""
+        pattern = re.compile(rf"^{re.escape(base)}_\d{{8}}$")
+        return sorted(name for name in inspect(self.engine).get_table_names() if pattern.match(name))
+        
+    def ensure_partition(self, base: str, day: date) -> str:
+        """
+        Create the day partition of a table if needed
+        
+        Partitions copy the base table's columns and indexes.
+        
+        Args:
+            base: Partitioned table name
+            day: Day stored in the partition
+            
+        Returns:
+            Partition table name
+        """
+        name = self.partition_name(base, day)
+        
+        if name in self._known_partitions:
+            return name
+        
+        table = Base.metadata.tables[base].to_metadata(self.partition_metadata, name=name)
+        for index in table.indexes:
+            index.name = index.name.replace(base, name, 1)
+        
+        is_new = name not in inspect(self.engine).get_table_names()
+        table.create(self.engine, checkfirst=True)
+        self._known_partitions.add(name)
+        
+        if is_new:
+            logger.info(f"Created partition {name}")
+            self.refresh_partition_view(base)
+        if self._natural_keys and base in self.NATURAL_KEYS:
+            self._create_natural_key(name, base)
+        
+        return name
+        
+    def refresh_partition_view(self, base: str):
+        """
+        Recreate the <base>_all view over the base table and its partitions
+        
+        Args:
+            base: Partitioned table name
+        """
+        columns = ', '.join(f'"{column.name}"' for column in Base.metadata.tables[base].columns)
+        selects = [f'SELECT {columns} FROM "{name}"' for name in [base] + self.list_partitions(base)]
+        
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(f'DROP VIEW IF EXISTS "{base}_all"')
+            connection.exec_driver_sql(f'CREATE VIEW "{base}_all" AS {" UNION ALL ".join(selects)}')
+        
+    def drop_partitions(self, base: str, before: date) -> List[str]:
+        """
+        Drop day partitions older than a given day
+        
+        Args:
+            base: Partitioned table name
+            before: First day to keep
+            
+        Returns:
+            Names of the dropped partitions
+        """
+        cutoff = self.partition_name(base, before)
+        dropped = [name for name in self.list_partitions(base) if name < cutoff]
+        
+        if not dropped:
+            return dropped
+        
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(f'DROP VIEW IF EXISTS "{base}_all"')
+            rows = 0
+            for name in dropped:
+                rows += connection.exec_driver_sql(f'SELECT COUNT(*) FROM "{name}"').scalar()
+                connection.exec_driver_sql(f'DROP TABLE "{name}"')
+                self._known_partitions.discard(name)
+            
+            # Keep the loader's row counts in step with the dropped rows
+            counts = TableCount.__table__
+            connection.execute(
+                counts.update()
+                .where(counts.c.table_name == base)
+                .values(row_count=counts.c.row_count - rows)
+            )
+        
+        self.refresh_partition_view(base)
+        logger.info(f"Dropped {len(dropped)} partitions of {base} before {before}")
+        return dropped
+        
+    def insert(self, table):
+        """
+        Get a dialect-specific INSERT supporting ON CONFLICT clauses
+        
+        Args:
+            table: SQLAlchemy Table or mapped class
+            
+        Returns:
+            Insert construct with on_conflict_do_nothing/do_update
+        """
+        if not self.engine:
+            self.connect()
+        
+        table = getattr(table, '__table__', table)
+        
+        if self.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        
+        return insert(table)
+        
     def get_session(self):
         """Get a new database session"""
         if not self.Session:
@@ -0,0 +1,127 @@
+"""
+Database Migrations
+Brings existing databases up to the current schema
+
+Usage (from the project root):
+    python -m scripts.loaders.migrations --config config/config.yaml [--partition]
+    python -m scripts.loaders.migrations --db data/logistics.db [--partition]
+    python -m scripts.loaders.migrations --url postgresql://user@host/db [--partition]
+"""
+import argparse
+import logging
+from datetime import date
+from typing import Dict, Optional
+import yaml
+from sqlalchemy import select, insert, delete, distinct, func, cast, Date
+from .database_schema import Base, DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+def _day(db_manager: DatabaseManager, column):
+    """SQL expression for the calendar day of a timestamp column"""
+    if db_manager.engine.dialect.name == 'sqlite':
+        return func.date(column)
+    return cast(column, Date)
+
+
+def migrate_to_partitions(db_manager: DatabaseManager, base: str) -> int:
+    """
+    Move rows of a base table into per-day partitions, one day per transaction
+
+    Args:
+        db_manager: Connected DatabaseManager
+        base: Partitioned table name
+
+    Returns:
+        Number of rows moved
+    """
+    source = Base.metadata.tables[base]
+    columns = [c for c in source.columns if c.name != 'id']
+    day_expr = _day(db_manager, source.c.timestamp)
+
+    with db_manager.engine.connect() as connection:
+        days = [row[0] for row in connection.execute(
+            select(distinct(day_expr)).where(source.c.timestamp.isnot(None)).order_by(day_expr)
+        )]
+
+    moved = 0
+
+    for day in days:
+        day_value = day if isinstance(day, date) else date.fromisoformat(day)
+        name = db_manager.ensure_partition(base, day_value)
+        target = db_manager.partition_metadata.tables[name]
+
+        with db_manager.engine.begin() as connection:
+            result = connection.execute(
+                insert(target).from_select(
+                    [c.name for c in columns],
+                    select(*columns).where(day_expr == day)
+                )
+            )
+            connection.execute(delete(source).where(day_expr == day))
+
+        moved += result.rowcount
+        logger.info(f"Moved {result.rowcount} rows of {base} into {name}")
+
+    return moved
+
+
+def migrate(
+    db_path: Optional[str] = None,
+    partition: bool = False,
+    url: Optional[str] = None,
+    db_manager: Optional[DatabaseManager] = None
+) -> Dict[str, object]:
+    """
+    Apply schema migrations to an existing database
+
+    Args:
+        db_path: Path to a SQLite database
+        partition: Also move existing rows into per-day partitions
+        url: SQLAlchemy URL of the database instead, e.g. postgresql://user@host/db
+        db_manager: Manager to use instead of db_path/url, e.g. DatabaseManager.from_config
+
+    Returns:
+        Summary with created indexes and rows moved per table
+    """
+    if db_manager is None:
+        db_manager = DatabaseManager(db_path, url=url)
+    db_manager.connect()
+    db_manager.create_tables()
+
+    summary: Dict[str, object] = {'indexes_created': db_manager.ensure_indexes()}
+
+    if partition:
+        summary['rows_partitioned'] = {
+            base: migrate_to_partitions(db_manager, base)
+            for base in DatabaseManager.PARTITIONED_TABLES
+        }
+
+    logger.info(f"Migration complete: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate a logistics database to the current schema")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--config', help="Pipeline config file; migrates the database it configures (database.type/url/path)")
+    target.add_argument('--db', help='Path to a SQLite database (default: data/logistics.db)')
+    target.add_argument('--url', help='SQLAlchemy URL, e.g. postgresql://user@host/db')
+    parser.add_argument('--partition', action='store_true', help='Move existing rows into per-day partitions')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.config:
+        with open(args.config, 'r') as f:
+            config = yaml.safe_load(f)
+        migrate(partition=args.partition, db_manager=DatabaseManager.from_config(config['database']))
+    elif args.url:
+        migrate(partition=args.partition, url=args.url)
+    else:
+        migrate(args.db or 'data/logistics.db', partition=args.partition)
+
+
+if __name__ == '__main__':
+    main()
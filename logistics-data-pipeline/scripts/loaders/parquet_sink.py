@@ -0,0 +1,224 @@
+"""
+Parquet Archive
+Hive-partitioned Parquet history of loaded batches, with compaction
+
+Usage (from the project root):
+    python -m scripts.loaders.parquet_sink --config config/config.yaml [--before 2024-01-31]
+"""
+import argparse
+import logging
+import os
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import yaml
+
+logger = logging.getLogger(__name__)
+
+
+class ParquetSink:
+    """
+    Append batches to <root>/<table>/date=YYYY-MM-DD/<key>=<value>/ Parquet files
+
+    Every write adds one small file per partition it touches; compact()
+    later merges them, so a partition ends up as a single file that can be
+    read with column and partition pruning.
+    """
+
+    # Second partition level per table, below date
+    PARTITION_KEYS = {
+        'bike_stations': 'city',
+        'flights': 'airport_code',
+    }
+
+    def __init__(self, root: str, compression: str = 'snappy'):
+        self.root = root
+        self.compression = compression
+
+    @classmethod
+    def from_config(cls, archive_config: Dict[str, Any]) -> Optional['ParquetSink']:
+        """
+        Create a sink from the database.archive config section
+
+        Returns:
+            ParquetSink, or None if archiving is disabled
+        """
+        if not archive_config.get('enabled', False):
+            return None
+
+        return cls(archive_config.get('root', 'data/archive'), compression=archive_config.get('compression', 'snappy'))
+
+    def _partitioning(self, table: str) -> pa.Schema:
+        # Partition values stay strings so date filters compare as ISO dates
+        return pa.schema([('date', pa.string()), (self.PARTITION_KEYS[table], pa.string())])
+
+    def write(self, table: str, df: pd.DataFrame) -> List[str]:
+        """
+        Archive a batch of rows
+
+        Args:
+            table: 'bike_stations' or 'flights'
+            df: Rows as produced by the transformers
+
+        Returns:
+            Paths of the files written, one per partition touched
+        """
+        if df.empty:
+            return []
+
+        key = self.PARTITION_KEYS[table]
+        batch = df.assign(
+            date=df['timestamp'].dt.strftime('%Y-%m-%d'),
+            **{key: df[key].astype(object).fillna('unknown').astype(str)}
+        )
+        written = []
+
+        pq.write_to_dataset(
+            pa.Table.from_pandas(batch, preserve_index=False),
+            os.path.join(self.root, table),
+            partitioning=ds.partitioning(self._partitioning(table), flavor='hive'),
+            basename_template=f"part-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+            compression=self.compression,
+            file_visitor=lambda written_file: written.append(written_file.path)
+        )
+
+        logger.info(f"Archived {len(df)} {table} rows to {self.root}")
+        return written
+
+    def discard(self, paths: Sequence[str]):
+        """
+        Remove files returned by write, e.g. when the batch they hold was not stored after all
+
+        Args:
+            paths: Files to remove; ones already gone are ignored
+        """
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        logger.info(f"Discarded {len(paths)} archived files")
+
+    def _leaf_partitions(self, table: str) -> List[Tuple[str, str]]:
+        """(date value, leaf directory) for every date=/key= directory of a table"""
+        table_root = os.path.join(self.root, table)
+        leaves = []
+
+        if not os.path.isdir(table_root):
+            return leaves
+
+        for date_dir in sorted(os.listdir(table_root)):
+            if not date_dir.startswith('date='):
+                continue
+            for key_dir in sorted(os.listdir(os.path.join(table_root, date_dir))):
+                leaves.append((date_dir[len('date='):], os.path.join(table_root, date_dir, key_dir)))
+
+        return leaves
+
+    def compact(self, table: str, before: Optional[date] = None) -> Dict[str, int]:
+        """
+        Merge the files of each partition into one
+
+        Readers running during compaction may briefly see a partition's rows
+        twice (after the merged file is renamed into place and before the
+        small files are removed), so run it when nothing is reading, or
+        limit it to closed days with before.
+
+        Args:
+            table: 'bike_stations' or 'flights'
+            before: Only compact partitions of days before this one
+
+        Returns:
+            Counts of compacted partitions and files merged
+        """
+        partitions = 0
+        merged_files = 0
+
+        for day, leaf in self._leaf_partitions(table):
+            if before is not None and day >= before.isoformat():
+                continue
+
+            files = sorted(
+                os.path.join(leaf, name) for name in os.listdir(leaf) if name.endswith('.parquet')
+            )
+            if len(files) < 2:
+                continue
+
+            merged = pa.concat_tables([pq.read_table(path) for path in files], promote_options='default')
+
+            target = os.path.join(leaf, f"compacted-{uuid.uuid4().hex[:8]}.parquet")
+            tmp_path = f"{target}.tmp"
+            pq.write_table(merged, tmp_path, compression=self.compression)
+            os.replace(tmp_path, target)
+
+            for path in files:
+                os.remove(path)
+
+            partitions += 1
+            merged_files += len(files)
+
+        logger.info(f"Compacted {merged_files} files into {partitions} for {table}")
+        return {'partitions': partitions, 'files_merged': merged_files}
+
+    def read(
+        self,
+        table: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[List[Tuple[str, str, Any]]] = None
+    ) -> pd.DataFrame:
+        """
+        Read archived rows, touching only the needed partitions and columns
+
+        Args:
+            table: 'bike_stations' or 'flights'
+            columns: Columns to read; None reads all
+            filters: pyarrow filters, e.g. [('date', '>=', '2024-01-01'), ('city', '=', 'Milano')].
+                Filters on date and the partition key skip whole directories.
+
+        Returns:
+            Matching rows
+        """
+        table_root = os.path.join(self.root, table)
+        if not os.path.isdir(table_root):
+            return pd.DataFrame(columns=list(columns) if columns else None)
+
+        return pq.read_table(
+            table_root,
+            columns=list(columns) if columns else None,
+            filters=filters,
+            partitioning=ds.partitioning(self._partitioning(table), flavor='hive')
+        ).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the Parquet archive")
+    parser.add_argument('--config', default='config/config.yaml', help='Pipeline config file')
+    parser.add_argument(
+        '--before',
+        type=lambda value: datetime.strptime(value, '%Y-%m-%d').date(),
+        default=date.today(),
+        help='Only compact days before this one (default: today)'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    sink = ParquetSink.from_config(config['database'].get('archive', {}))
+    if sink is None:
+        logger.warning("Archive is disabled in config, nothing to compact")
+        return
+
+    for table in ParquetSink.PARTITION_KEYS:
+        sink.compact(table, before=args.before)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Rollup Tables
+Incrementally maintained hourly aggregates for dashboards
+
+Usage (from the project root):
+    python -m scripts.loaders.rollups --config config/config.yaml [--since 2024-01-01]
+"""
+import argparse
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+import pandas as pd
+import yaml
+from sqlalchemy import delete, func
+from .database_schema import DatabaseManager, StationHourly, NetworkHourly, AirportHourly
+
+logger = logging.getLogger(__name__)
+
+
+class RollupManager:
+    """Merge per-batch aggregates into hourly rollup tables"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+
+    def _least(self, a, b):
+        if self.db_manager.engine.dialect.name == 'postgresql':
+            return func.least(a, b)
+        return func.min(a, b)
+
+    def _greatest(self, a, b):
+        if self.db_manager.engine.dialect.name == 'postgresql':
+            return func.greatest(a, b)
+        return func.max(a, b)
+
+    def _merge(self, model, rows: pd.DataFrame, keys, combine):
+        """Upsert aggregate rows, combining with buckets already stored"""
+        if rows.empty:
+            return
+
+        statement = self.db_manager.insert(model)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_=combine(model.__table__.c, statement.excluded)
+        )
+
+        with self.db_manager.engine.begin() as connection:
+            connection.execute(statement, rows.to_dict('records'))
+
+    @staticmethod
+    def _hour(timestamps: pd.Series) -> pd.Series:
+        return pd.to_datetime(timestamps).dt.floor('h')
+
+    def update_bikes(self, df: pd.DataFrame):
+        """
+        Fold a batch of bike station rows into station and network rollups
+
+        Only the hour buckets present in the batch are touched.
+
+        Args:
+            df: Bike station rows as produced by BikesTransformer
+        """
+        if df.empty:
+            return
+
+        batch = df[['network_id', 'station_id', 'free_bikes', 'total_slots']].assign(
+            hour=self._hour(df['timestamp'])
+        )
+
+        stations = batch.groupby(['network_id', 'station_id', 'hour'], observed=True).agg(
+            samples=('free_bikes', 'size'),
+            min_free_bikes=('free_bikes', 'min'),
+            max_free_bikes=('free_bikes', 'max'),
+            sum_free_bikes=('free_bikes', 'sum'),
+        ).reset_index()
+        stations['avg_free_bikes'] = stations['sum_free_bikes'] / stations['samples']
+
+        self._merge(
+            StationHourly,
+            stations,
+            ['network_id', 'station_id', 'hour'],
+            lambda t, new: {
+                'samples': t.samples + new.samples,
+                'min_free_bikes': self._least(t.min_free_bikes, new.min_free_bikes),
+                'max_free_bikes': self._greatest(t.max_free_bikes, new.max_free_bikes),
+                'sum_free_bikes': t.sum_free_bikes + new.sum_free_bikes,
+                'avg_free_bikes': (t.sum_free_bikes + new.sum_free_bikes) * 1.0 / (t.samples + new.samples),
+            }
+        )
+
+        networks = batch.groupby(['network_id', 'hour'], observed=True).agg(
+            samples=('free_bikes', 'size'),
+            sum_free_bikes=('free_bikes', 'sum'),
+            sum_total_slots=('total_slots', 'sum'),
+        ).reset_index()
+        networks['utilization_pct'] = networks['sum_free_bikes'] * 100.0 / networks['sum_total_slots'].where(
+            networks['sum_total_slots'] > 0
+        )
+        networks['utilization_pct'] = networks['utilization_pct'].astype(object).where(
+            networks['utilization_pct'].notna(), None
+        )
+
+        self._merge(
+            NetworkHourly,
+            networks,
+            ['network_id', 'hour'],
+            lambda t, new: {
+                'samples': t.samples + new.samples,
+                'sum_free_bikes': t.sum_free_bikes + new.sum_free_bikes,
+                'sum_total_slots': t.sum_total_slots + new.sum_total_slots,
+                'utilization_pct': (t.sum_free_bikes + new.sum_free_bikes) * 100.0
+                / func.nullif(t.sum_total_slots + new.sum_total_slots, 0),
+            }
+        )
+
+        logger.info(f"Updated {len(stations)} station and {len(networks)} network hourly buckets")
+
+    def update_flights(self, df: pd.DataFrame):
+        """
+        Fold a batch of flight rows into the airport rollup
+
+        Args:
+            df: Flight rows as produced by FlightsTransformer
+        """
+        if df.empty:
+            return
+
+        on_ground = df['on_ground'].astype(bool)
+        batch = pd.DataFrame({
+            'airport_code': df['airport_code'],
+            'hour': self._hour(df['timestamp']),
+            'on_ground': on_ground.astype(int),
+            'airborne': (~on_ground).astype(int),
+        })
+
+        airports = batch.groupby(['airport_code', 'hour'], observed=True).agg(
+            samples=('on_ground', 'size'),
+            airborne=('airborne', 'sum'),
+            on_ground=('on_ground', 'sum'),
+        ).reset_index()
+
+        self._merge(
+            AirportHourly,
+            airports,
+            ['airport_code', 'hour'],
+            lambda t, new: {
+                'samples': t.samples + new.samples,
+                'airborne': t.airborne + new.airborne,
+                'on_ground': t.on_ground + new.on_ground,
+            }
+        )
+
+        logger.info(f"Updated {len(airports)} airport hourly buckets")
+
+    def clear(self, since: Optional[datetime] = None):
+        """Delete rollup buckets, all of them or from since onwards"""
+        with self.db_manager.engine.begin() as connection:
+            for model in (StationHourly, NetworkHourly, AirportHourly):
+                statement = delete(model)
+                if since is not None:
+                    statement = statement.where(model.hour >= since)
+                connection.execute(statement)
+
+    def rebuild(
+        self,
+        bike_chunks: Iterable[pd.DataFrame],
+        flight_chunks: Iterable[pd.DataFrame],
+        since: Optional[datetime] = None
+    ):
+        """
+        Recompute rollups from raw rows, e.g. after a backfill
+
+        Args:
+            bike_chunks: Bike station rows from since onwards
+            flight_chunks: Flight rows from since onwards
+            since: Start of the rebuilt range; None rebuilds everything
+        """
+        logger.info(f"Rebuilding rollups since {since or 'the beginning'}")
+        self.clear(since)
+
+        for chunk in bike_chunks:
+            self.update_bikes(chunk)
+        for chunk in flight_chunks:
+            self.update_flights(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild hourly rollup tables from raw data")
+    parser.add_argument('--config', default='config/config.yaml', help='Pipeline config file')
+    parser.add_argument('--since', type=datetime.fromisoformat, help='Only rebuild buckets from this time on')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    from .data_loader import DataLoader
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    DataLoader.from_config(config['database']).rebuild_rollups(since=args.since)
+
+
+if __name__ == '__main__':
+    main()
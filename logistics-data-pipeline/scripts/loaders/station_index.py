@@ -0,0 +1,284 @@
+"""
+Station Index
+In-memory grid index over the latest bike station snapshot for proximity queries
+"""
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+@dataclass
+class StationMatch:
+    """A station returned by a proximity query"""
+    network_id: str
+    station_id: str
+    station_name: Optional[str]
+    latitude: float
+    longitude: float
+    free_bikes: int
+    empty_slots: int
+    distance_km: float
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class StationIndex:
+    """
+    Latest position and availability of every station, bucketed into a lat/lon grid
+
+    Stations are keyed by (network_id, station_id). Each update overwrites
+    availability in place and only re-buckets stations that are new or moved
+    to another cell, so it can follow every load without a full rebuild.
+    """
+
+    def __init__(self, cell_size: float = 0.01):
+        """
+        Args:
+            cell_size: Grid cell edge in degrees (0.01 is roughly 1 km)
+        """
+        self.cell_size = cell_size
+
+        self._lock = threading.Lock()
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._keys: List[Tuple[str, str]] = []
+        self._names: List[Optional[str]] = []
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._cell_of: List[Tuple[int, int]] = []
+        self._extent: Optional[List[int]] = None  # min/max cell row and column ever used
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._free = np.empty(0, dtype=np.int64)
+        self._empty = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size))
+
+    def _add_to_cell(self, cell: Tuple[int, int], slot: int):
+        self._cells.setdefault(cell, set()).add(slot)
+
+        y, x = cell
+        if self._extent is None:
+            self._extent = [y, y, x, x]
+        else:
+            extent = self._extent
+            extent[0], extent[1] = min(extent[0], y), max(extent[1], y)
+            extent[2], extent[3] = min(extent[2], x), max(extent[3], x)
+
+    def _grow(self, size: int):
+        """Make room for size slots, doubling the arrays to amortize growth"""
+        capacity = len(self._lat)
+        if size <= capacity:
+            return
+
+        capacity = max(size, 2 * capacity, 1024)
+        for name in ('_lat', '_lon', '_free', '_empty'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        Apply a batch of bike station rows to the index
+
+        Args:
+            df: Bike station rows as produced by BikesTransformer; for
+                repeated stations the last row wins
+
+        Returns:
+            Number of stations added or moved to another cell
+        """
+        if df.empty:
+            return 0
+
+        snapshot = df.drop_duplicates(subset=['network_id', 'station_id'], keep='last')
+        keys = list(zip(snapshot['network_id'].astype(str), snapshot['station_id'].astype(str)))
+        lats = snapshot['latitude'].to_numpy(dtype=float)
+        lons = snapshot['longitude'].to_numpy(dtype=float)
+        rows_y = np.floor(lats / self.cell_size).astype(np.int64)
+        rows_x = np.floor(lons / self.cell_size).astype(np.int64)
+        names = snapshot['station_name'].tolist() if 'station_name' in snapshot else [None] * len(keys)
+
+        with self._lock:
+            self._grow(len(self._keys) + len(keys))
+            slots = np.empty(len(keys), dtype=np.int64)
+            rebucketed = 0
+
+            for i, key in enumerate(keys):
+                cell = (int(rows_y[i]), int(rows_x[i]))
+                slot = self._slots.get(key)
+
+                if slot is None:
+                    slot = len(self._keys)
+                    self._slots[key] = slot
+                    self._keys.append(key)
+                    self._names.append(names[i])
+                    self._cell_of.append(cell)
+                    self._add_to_cell(cell, slot)
+                    rebucketed += 1
+                else:
+                    self._names[slot] = names[i]
+                    if self._cell_of[slot] != cell:
+                        old_cell = self._cell_of[slot]
+                        self._cells[old_cell].discard(slot)
+                        if not self._cells[old_cell]:
+                            del self._cells[old_cell]
+                        self._add_to_cell(cell, slot)
+                        self._cell_of[slot] = cell
+                        rebucketed += 1
+
+                slots[i] = slot
+
+            self._lat[slots] = lats
+            self._lon[slots] = lons
+            self._free[slots] = snapshot['free_bikes'].to_numpy(dtype=np.int64)
+            self._empty[slots] = snapshot['empty_slots'].to_numpy(dtype=np.int64)
+
+        logger.info(f"Station index updated with {len(keys)} stations ({rebucketed} added or moved)")
+        return rebucketed
+
+    def _ring(self, center: Tuple[int, int], radius: int) -> List[int]:
+        """Slots in the cells exactly radius cells away from center"""
+        cy, cx = center
+        slots: List[int] = []
+
+        if radius == 0:
+            slots.extend(self._cells.get(center, ()))
+            return slots
+
+        for dx in range(-radius, radius + 1):
+            slots.extend(self._cells.get((cy - radius, cx + dx), ()))
+            slots.extend(self._cells.get((cy + radius, cx + dx), ()))
+        for dy in range(-radius + 1, radius):
+            slots.extend(self._cells.get((cy + dy, cx - radius), ()))
+            slots.extend(self._cells.get((cy + dy, cx + radius), ()))
+
+        return slots
+
+    def _matches(self, slots: np.ndarray, distances: np.ndarray) -> List[StationMatch]:
+        return [
+            StationMatch(
+                network_id=self._keys[slot][0],
+                station_id=self._keys[slot][1],
+                station_name=self._names[slot],
+                latitude=float(self._lat[slot]),
+                longitude=float(self._lon[slot]),
+                free_bikes=int(self._free[slot]),
+                empty_slots=int(self._empty[slot]),
+                distance_km=float(distance),
+            )
+            for slot, distance in zip(slots, distances)
+        ]
+
+    def nearest(self, lat: float, lon: float, k: int = 5, min_bikes: int = 0) -> List[StationMatch]:
+        """
+        Find the k closest stations with at least min_bikes free bikes
+
+        Rings of grid cells are searched outwards from the query point until
+        no unvisited cell can hold a closer station than the k-th found.
+
+        Args:
+            lat: Query latitude
+            lon: Query longitude
+            k: Number of stations to return
+            min_bikes: Minimum free bikes a station needs to qualify
+
+        Returns:
+            Up to k matches, closest first
+        """
+        with self._lock:
+            if not self._cells or k <= 0:
+                return []
+
+            center = self._cell(lat, lon)
+            min_y, max_y, min_x, max_x = self._extent
+            max_radius = max(
+                abs(center[0] - min_y), abs(center[0] - max_y),
+                abs(center[1] - min_x), abs(center[1] - max_x)
+            )
+
+            found_slots = np.empty(0, dtype=np.int64)
+            found_distances = np.empty(0)
+
+            for radius in range(max_radius + 1):
+                ring = np.fromiter(self._ring(center, radius), dtype=np.int64)
+                if len(ring):
+                    ring = ring[self._free[ring] >= min_bikes]
+                if len(ring):
+                    found_slots = np.concatenate([found_slots, ring])
+                    found_distances = np.concatenate([
+                        found_distances,
+                        haversine_km(lat, lon, self._lat[ring], self._lon[ring])
+                    ])
+
+                if len(found_slots) >= k:
+                    # Anything outside this ring is at least radius full cells away;
+                    # longitude degrees shrink towards the poles, so bound by the widest latitude reached
+                    reach = min(abs(lat) + (radius + 1) * self.cell_size, 90.0)
+                    bound = radius * self.cell_size * KM_PER_DEGREE * math.cos(math.radians(reach))
+                    kth = np.partition(found_distances, k - 1)[k - 1]
+                    if kth <= bound:
+                        break
+
+            order = np.argsort(found_distances, kind='stable')[:k]
+            return self._matches(found_slots[order], found_distances[order])
+
+    def within_radius(self, lat: float, lon: float, radius_km: float, min_bikes: int = 0) -> List[StationMatch]:
+        """
+        Find every station within radius_km with at least min_bikes free bikes
+
+        Args:
+            lat: Query latitude
+            lon: Query longitude
+            radius_km: Search radius in kilometres
+            min_bikes: Minimum free bikes a station needs to qualify
+
+        Returns:
+            Matches sorted by distance
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(min(abs(lat) + dlat, 90.0))), 1e-6))
+
+        y0, x0 = self._cell(lat - dlat, lon - dlon)
+        y1, x1 = self._cell(lat + dlat, lon + dlon)
+
+        with self._lock:
+            slots: List[int] = []
+
+            if (y1 - y0 + 1) * (x1 - x0 + 1) > len(self._cells):
+                for (y, x), members in self._cells.items():
+                    if y0 <= y <= y1 and x0 <= x <= x1:
+                        slots.extend(members)
+            else:
+                for y in range(y0, y1 + 1):
+                    for x in range(x0, x1 + 1):
+                        slots.extend(self._cells.get((y, x), ()))
+
+            candidates = np.fromiter(slots, dtype=np.int64)
+            if len(candidates):
+                candidates = candidates[self._free[candidates] >= min_bikes]
+            distances = haversine_km(lat, lon, self._lat[candidates], self._lon[candidates])
+
+            inside = distances <= radius_km
+            candidates, distances = candidates[inside], distances[inside]
+            order = np.argsort(distances, kind='stable')
+            return self._matches(candidates[order], distances[order])
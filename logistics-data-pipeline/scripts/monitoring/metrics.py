@@ -0,0 +1,216 @@
+"""
+Pipeline Metrics
+Per-stage timings, row and byte counters exported as Prometheus text or StatsD
+"""
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, None where unsupported"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageRecord:
+    """Mutable result of a running stage; set rows_out and bytes before it ends"""
+
+    __slots__ = ('rows_in', 'rows_out', 'bytes')
+
+    def __init__(self, rows_in: Optional[int] = None):
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.bytes: Optional[int] = None
+
+
+class MetricsRegistry:
+    """
+    In-process counters and gauges keyed by name and labels
+
+    Recording is a dict update under a lock, so instrumentation can stay on
+    in production. Values are exported on demand to a Prometheus text file
+    (e.g. for the node_exporter textfile collector) and, if configured, sent
+    to StatsD as they are recorded.
+    """
+
+    COUNTER = 'counter'
+    GAUGE = 'gauge'
+
+    def __init__(
+        self,
+        prefix: str = 'logistics',
+        statsd_host: Optional[str] = None,
+        statsd_port: int = 8125
+    ):
+        self.prefix = prefix
+
+        self._lock = threading.Lock()
+        self._types: Dict[str, str] = {}
+        self._values: Dict[Tuple[str, LabelSet], float] = {}
+
+        self._statsd_address = (statsd_host, statsd_port) if statsd_host else None
+        self._statsd_socket = None
+        if self._statsd_address is not None:
+            self._statsd_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._statsd_socket.setblocking(False)
+
+    @classmethod
+    def from_config(cls, monitoring_config: Dict[str, Any]) -> Optional['MetricsRegistry']:
+        """
+        Create a registry from the monitoring config section
+
+        Returns:
+            MetricsRegistry, or None if monitoring is disabled
+        """
+        if not monitoring_config.get('enabled', False):
+            return None
+
+        statsd_config = monitoring_config.get('statsd', {})
+        statsd_enabled = statsd_config.get('enabled', False)
+
+        return cls(
+            prefix=monitoring_config.get('prefix', 'logistics'),
+            statsd_host=statsd_config.get('host', 'localhost') if statsd_enabled else None,
+            statsd_port=statsd_config.get('port', 8125)
+        )
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> LabelSet:
+        return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+    def _record(self, kind: str, name: str, value: float, labels: Dict[str, Any]):
+        key = (name, self._labels(labels))
+
+        with self._lock:
+            self._types.setdefault(name, kind)
+            if kind == self.COUNTER:
+                self._values[key] = self._values.get(key, 0.0) + value
+            else:
+                self._values[key] = value
+
+        if self._statsd_socket is not None:
+            self._send_statsd(kind, key, value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add value to a counter"""
+        self._record(self.COUNTER, name, value, labels)
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge"""
+        self._record(self.GAUGE, name, value, labels)
+
+    def get(self, name: str, **labels) -> Optional[float]:
+        """Current value of a metric, None if never recorded"""
+        with self._lock:
+            return self._values.get((name, self._labels(labels)))
+
+    @contextmanager
+    def stage(self, stage: str, source: Optional[str] = None, rows_in: Optional[int] = None) -> Iterator[StageRecord]:
+        """
+        Time a pipeline stage and record its rows, bytes and peak RSS
+
+        Exported as <prefix>_stage_* metrics labelled with stage and source.
+        Failed stages are counted in stage_failures_total and re-raised.
+
+        Args:
+            stage: Stage name, e.g. 'extract', 'transform', 'load'
+            source: Data source, e.g. 'bikes' or 'flights'
+            rows_in: Rows entering the stage, if known up front
+
+        Yields:
+            StageRecord to fill in rows_out / bytes
+        """
+        record = StageRecord(rows_in)
+        start = time.perf_counter()
+
+        try:
+            yield record
+        except Exception:
+            self.inc('stage_failures_total', stage=stage, source=source)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            labels = {'stage': stage, 'source': source}
+
+            self.inc('stage_runs_total', **labels)
+            self.inc('stage_seconds_total', elapsed, **labels)
+            self.set('stage_last_seconds', elapsed, **labels)
+
+            if record.rows_in is not None:
+                self.inc('stage_rows_in_total', record.rows_in, **labels)
+            if record.rows_out is not None:
+                self.inc('stage_rows_out_total', record.rows_out, **labels)
+                if elapsed > 0:
+                    self.set('stage_rows_per_second', record.rows_out / elapsed, **labels)
+            if record.bytes is not None:
+                self.inc('stage_bytes_total', record.bytes, **labels)
+
+            peak = peak_rss_bytes()
+            if peak is not None:
+                self.set('stage_peak_rss_bytes', peak, **labels)
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            values = sorted(self._values.items())
+            types = dict(self._types)
+
+        lines = []
+        current = None
+
+        for (name, labels), value in values:
+            full_name = f"{self.prefix}_{name}"
+            if name != current:
+                lines.append(f"# TYPE {full_name} {types[name]}")
+                current = name
+
+            label_text = ','.join(
+                '{}="{}"'.format(key, val.replace('\\', '\\\\').replace('"', '\\"')) for key, val in labels
+            )
+            lines.append(f"{full_name}{{{label_text}}} {value!r}" if label_text else f"{full_name} {value!r}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """
+        Write the registry to a .prom file, atomically
+
+        Args:
+            path: Target file, e.g. in the node_exporter textfile directory
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def _send_statsd(self, kind: str, key: Tuple[str, LabelSet], value: float):
+        """Fire-and-forget one StatsD datagram; label values become name segments"""
+        name, labels = key
+        segments = [self.prefix, name] + [val.replace('.', '_').replace(':', '_') for _, val in labels]
+        metric_type = 'c' if kind == self.COUNTER else 'g'
+
+        try:
+            self._statsd_socket.sendto(f"{'.'.join(segments)}:{value:g}|{metric_type}".encode(), self._statsd_address)
+        except OSError as e:
+            logger.debug(f"StatsD send failed: {e}")
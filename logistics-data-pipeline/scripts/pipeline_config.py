@@ -0,0 +1,91 @@
+"""
+Pipeline Config
+Loads config.yaml once per change, caching the parsed result as JSON
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Parsed configs of this process, by absolute path
+_loaded: Dict[str, Tuple[List[int], Dict[str, Any]]] = {}
+
+
+def _fingerprint(path: str) -> List[int]:
+    """mtime and size of a file; a change to either invalidates the cache"""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def cache_path(path: str, cache_dir: Optional[str] = None) -> str:
+    """Location of the JSON cache for a config file"""
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'logistics_pipeline')
+    return os.path.join(cache_dir, f"config-{digest}.json")
+
+
+def _read_cache(json_path: str, fingerprint: List[int]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(json_path, 'r') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if entry.get('fingerprint') != fingerprint:
+        return None
+    return entry.get('config')
+
+
+def _write_cache(json_path: str, fingerprint: List[int], config: Dict[str, Any]):
+    tmp_path = f"{json_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'config': config}, f)
+        os.replace(tmp_path, json_path)
+    except (OSError, TypeError) as e:
+        # Values JSON can't hold (e.g. YAML dates) just disable the cache
+        logger.warning(f"Not caching config {json_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_config(path: str, cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a YAML config file
+
+    Within a process the parsed dict is reused until the file changes. Across
+    processes (every scheduler parse loop and task start-up) the result is
+    read back from a JSON cache keyed by the file's mtime and size, so PyYAML
+    is only imported and run after an edit.
+
+    Args:
+        path: YAML file
+        cache_dir: Directory for the JSON cache (default: <tmp>/logistics_pipeline)
+
+    Returns:
+        Parsed config; callers must not modify it
+    """
+    path = os.path.abspath(path)
+    fingerprint = _fingerprint(path)
+
+    loaded = _loaded.get(path)
+    if loaded is not None and loaded[0] == fingerprint:
+        return loaded[1]
+
+    json_path = cache_path(path, cache_dir)
+    config = _read_cache(json_path, fingerprint)
+
+    if config is None:
+        import yaml
+
+        with open(path, 'r') as f:
+            config = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+        _write_cache(json_path, fingerprint, config)
+
+    _loaded[path] = (fingerprint, config)
+    return config
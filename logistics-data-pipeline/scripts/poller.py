@@ -0,0 +1,272 @@
+"""
+Continuous Poller
+Long-running extract/transform/load loop polling each source on its own interval
+
+Usage (from the project root):
+    python scripts/poller.py --config config/config.yaml
+"""
+import argparse
+import logging
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from extractors.base_extractor import BaseExtractor
+from extractors.citybikes_extractor import CityBikesExtractor
+from extractors.flights_extractor import FlightsExtractor
+from extractors.response_cache import ResponseCache
+from transformers.bikes_transformer import BikesTransformer
+from transformers.flights_transformer import FlightsTransformer
+from loaders.data_loader import DataLoader
+from monitoring.metrics import MetricsRegistry
+from pipeline_config import load_config
+
+logger = logging.getLogger(__name__)
+
+
+class Poller:
+    """
+    Poll CityBikes and OpenSky continuously with warm connections
+
+    Each source runs in its own thread on its own interval and hands
+    transformed DataFrames to a bounded queue. A single loader thread drains
+    the queue, since SQLite allows one writer at a time. When loading falls
+    behind, the queue fills up and the pollers block instead of piling up
+    snapshots in memory; every full interval spent waiting is counted and
+    logged.
+    """
+
+    SOURCES = ('bikes', 'flights')
+
+    def __init__(self, config: Dict[str, Any], metrics: Optional[MetricsRegistry] = None):
+        """
+        Args:
+            config: Parsed config.yaml
+            metrics: Optional registry recording poll and load stages
+        """
+        self.config = config
+        self.poller_config = config.get('poller', {})
+        self.metrics = metrics
+
+        self.stop_event = threading.Event()
+        self._pollers_done = threading.Event()
+        self.queue: 'queue.Queue[Tuple[str, pd.DataFrame]]' = queue.Queue(
+            maxsize=self.poller_config.get('queue_size', 4)
+        )
+
+        # Built once and reused every cycle: sessions keep their pools, the
+        # loader keeps its engine and the cache its in-memory index
+        extraction_config = config.get('extraction', {})
+        cache_config = extraction_config.get('cache', {})
+        # Every cycle must ask the API again: cached responses are only reused
+        # after a 304, never served unrevalidated within ttl_seconds
+        if cache_config.get('enabled', False) and cache_config.get('ttl_seconds', 60) > 0:
+            logger.info("Poller revalidates every cached response, ignoring extraction.cache.ttl_seconds")
+        options = {
+            **BaseExtractor.options_from_config(extraction_config),
+            'cache': ResponseCache.from_config({**cache_config, 'ttl_seconds': 0}),
+            'metrics': metrics,
+        }
+        self.bikes_extractor = CityBikesExtractor(**options)
+        self.flights_extractor = FlightsExtractor(
+            **FlightsExtractor.consolidation_options(config['data_sources']['opensky']),
+            **options
+        )
+        self.loader = DataLoader.from_config(config['database'], metrics=metrics)
+
+        self.transform_config = config.get('transform', {})
+        self.cycles: Dict[str, int] = {source: 0 for source in self.SOURCES}
+        self.enqueue_waits: Dict[str, int] = {source: 0 for source in self.SOURCES}
+        self.dropped: Dict[str, int] = {source: 0 for source in self.SOURCES}
+        self.loaded: Dict[str, int] = {source: 0 for source in self.SOURCES}
+        self._loader_thread: Optional[threading.Thread] = None
+        self._poller_threads: List[threading.Thread] = []
+
+    def _stage(self, stage: str, source: str):
+        if self.metrics is None:
+            return nullcontext(SimpleNamespace())
+        return self.metrics.stage(stage, source=source)
+
+    def poll_bikes(self) -> pd.DataFrame:
+        """Fetch and transform one bike snapshot"""
+        networks = self.bikes_extractor.extract_all_networks(self.config['data_sources']['citybikes']['cities'])
+        return BikesTransformer.transform(
+            networks,
+            columnar=self.transform_config.get('columnar', False),
+            compact=self.transform_config.get('compact', False)
+        )
+
+    def poll_flights(self) -> pd.DataFrame:
+        """Fetch and transform one flight snapshot"""
+        flights = self.flights_extractor.extract_flights_for_airports(
+            self.config['data_sources']['opensky']['airports']
+        )
+        return FlightsTransformer.transform(
+            flights,
+            vectorized=self.transform_config.get('vectorized', False),
+            compact=self.transform_config.get('compact', False)
+        )
+
+    def _enqueue(self, source: str, df: pd.DataFrame, interval: float):
+        """
+        Block until the loader has room, counting every full interval spent waiting
+
+        After a stop request the batch is still handed over while the loader
+        runs, since it keeps draining until the pollers have exited. Only a
+        batch the loader can no longer take is dropped, and that is counted too.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put((source, df), timeout=interval)
+                return
+            except queue.Full:
+                self.enqueue_waits[source] += 1
+                if self.metrics is not None:
+                    self.metrics.inc('poller_enqueue_waits_total', source=source)
+                logger.warning(f"Loader is falling behind, {source} poller waiting ({self.queue.qsize()} batches queued)")
+
+        while self._loader_thread is not None and self._loader_thread.is_alive() and not self._pollers_done.is_set():
+            try:
+                self.queue.put((source, df), timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+        self.dropped[source] += 1
+        if self.metrics is not None:
+            self.metrics.inc('poller_dropped_batches_total', source=source)
+        logger.warning(f"Loader has stopped, dropped a {source} batch of {len(df)} rows")
+
+    def _poll_loop(self, source: str, poll: Callable[[], pd.DataFrame], interval: float):
+        logger.info(f"Polling {source} every {interval}s")
+
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+
+            try:
+                with self._stage('poll', source) as record:
+                    df = poll()
+                    record.rows_out = len(df)
+            except Exception as e:
+                logger.error(f"{source} poll failed: {e}")
+            else:
+                self.cycles[source] += 1
+                if not df.empty:
+                    self._enqueue(source, df, interval)
+
+            # Intervals are measured start to start, so slow polls do not drift
+            self.stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def _load_loop(self):
+        """Drain the queue until the pollers have exited and nothing is left"""
+        while not (self._pollers_done.is_set() and self.queue.empty()):
+            try:
+                source, df = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                if source == 'bikes':
+                    self.loader.load_bikes(df)
+                else:
+                    self.loader.load_flights(df)
+                self.loaded[source] += 1
+            except Exception as e:
+                logger.error(f"Loading {source} batch failed: {e}")
+            finally:
+                self.queue.task_done()
+                self._export_metrics()
+
+    def _export_metrics(self):
+        path = self.poller_config.get('metrics_file')
+        if self.metrics is not None and path:
+            self.metrics.set('poller_queue_depth', self.queue.qsize())
+            self.metrics.write_prometheus(path)
+
+    def start(self):
+        """Start the loader thread and one polling thread per enabled source"""
+        pollers = {'bikes': self.poll_bikes, 'flights': self.poll_flights}
+        source_configs = {'bikes': 'citybikes', 'flights': 'opensky'}
+
+        self._loader_thread = threading.Thread(target=self._load_loop, name='poller-loader')
+        self._loader_thread.start()
+
+        for source in self.SOURCES:
+            if not self.config['data_sources'][source_configs[source]].get('enabled', True):
+                continue
+
+            interval = self.poller_config.get(f'{source}_interval_seconds', 30)
+            thread = threading.Thread(
+                target=self._poll_loop,
+                args=(source, pollers[source], interval),
+                name=f'poller-{source}'
+            )
+            thread.start()
+            self._poller_threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop polling, load what is already queued and release connections
+
+        Args:
+            timeout: Seconds to wait for each thread
+        """
+        self.stop_event.set()
+
+        for thread in self._poller_threads:
+            thread.join(timeout)
+
+        # Only now can nothing new be queued, so the loader may drain and exit
+        self._pollers_done.set()
+        if self._loader_thread is not None:
+            self._loader_thread.join(timeout)
+
+        self.bikes_extractor.close()
+        self.flights_extractor.close()
+        self.loader.db_manager.engine.dispose()
+        logger.info(f"Poller stopped after {self.cycles} cycles, {self.loaded} batches loaded, "
+                    f"{self.enqueue_waits} waits on the loader, {self.dropped} batches dropped")
+
+    def run(self):
+        """Run until SIGINT or SIGTERM"""
+        def request_stop(signum, frame):
+            logger.info(f"Received signal {signum}, finishing current cycle")
+            self.stop_event.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        self.start()
+        while not self.stop_event.wait(1.0):
+            pass
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll data sources continuously outside Airflow")
+    parser.add_argument('--config', default='config/config.yaml', help='Pipeline config file')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+
+    logging_config = config.get('logging', {})
+    logging.basicConfig(
+        level=logging_config.get('level', 'INFO'),
+        format=logging_config.get('format', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+
+    Poller(config, metrics=MetricsRegistry.from_config(config.get('monitoring', {}))).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,9 +3,11 @@ Bike Station Data Transformer
 Cleans and structures bike-sharing data
 """
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional
+from .dtypes import compact_dtypes
 
 logger = logging.getLogger(__name__)
 
@@ -13,20 +15,71 @@ logger = logging.getLogger(__name__)
 class BikesTransformer:
     """Transform bike station data"""
     
+    # Output schema, in column order
+    COLUMNS = [
+        'network_id', 'network_name', 'city', 'country',
+        'station_id', 'station_name', 'latitude', 'longitude',
+        'free_bikes', 'empty_slots', 'total_slots',
+        'observed_at', 'timestamp', 'extracted_at'
+    ]
+    
+    # Opt-in narrow types: repeated network attributes as categories,
+    # coordinates as float32 (~1 m precision) and counts as int16
+    COMPACT_DTYPES = {
+        'network_id': 'category',
+        'network_name': 'category',
+        'city': 'category',
+        'country': 'category',
+        'latitude': 'float32',
+        'longitude': 'float32',
+        'free_bikes': 'int16',
+        'empty_slots': 'int16',
+        'total_slots': 'int16',
+    }
+    
     @staticmethod
-    def transform(networks_data: List[Dict]) -> pd.DataFrame:
+    def observed_at(values: pd.Series, fallback: datetime) -> pd.Series:
+        """
+        Parse CityBikes station timestamps to naive UTC
+        
+        Part of the natural key of a station reading, so loads can skip
+        readings they already stored. Missing or unparsable values fall back
+        to the run time.
+        
+        Args:
+            values: ISO 8601 strings as sent by the API, e.g. '2024-01-01T12:00:00.123Z'
+            fallback: Timestamp for stations without one
+            
+        Returns:
+            datetime64[ns] Series
+        """
+        parsed = pd.to_datetime(values, utc=True, errors='coerce', format='ISO8601').dt.tz_localize(None)
+        return parsed.fillna(pd.Timestamp(fallback))
+    
+    @staticmethod
+    def transform(networks_data: List[Dict], columnar: bool = False, compact: bool = False) -> pd.DataFrame:
         """
         Transform raw bike network data to structured format
         
         Args:
             networks_data: List of network data from API
+            columnar: Build station columns directly instead of row dicts
+            compact: Return the COMPACT_DTYPES schema
             
         Returns:
             Cleaned DataFrame
         """
+        if compact:
+            return BikesTransformer.compact(BikesTransformer.transform(networks_data, columnar=columnar))
+        
+        if columnar:
+            return BikesTransformer.transform_columnar(networks_data)
+        
         logger.info("Transforming bike station data")
         
         all_stations = []
+        # Taken up front: it is also the observed_at fallback, and every row may be dropped below
+        run_timestamp = datetime.utcnow()
         
         for network in networks_data:
             network_id = network.get('id')
@@ -47,8 +100,9 @@ class BikesTransformer:
                     'free_bikes': station.get('free_bikes', 0),
                     'empty_slots': station.get('empty_slots', 0),
                     'total_slots': station.get('free_bikes', 0) + station.get('empty_slots', 0),
-                    'timestamp': datetime.utcnow(),
-                    'extracted_at': datetime.utcnow()
+                    'observed_at': station.get('timestamp'),
+                    'timestamp': run_timestamp,
+                    'extracted_at': run_timestamp
                 })
         
         df = pd.DataFrame(all_stations)
@@ -61,7 +115,120 @@ class BikesTransformer:
         df = df.dropna(subset=['station_id', 'latitude', 'longitude'])
         df['free_bikes'] = df['free_bikes'].fillna(0).astype(int)
         df['empty_slots'] = df['empty_slots'].fillna(0).astype(int)
+        df['observed_at'] = BikesTransformer.observed_at(df['observed_at'], run_timestamp)
         
         logger.info(f"Transformed {len(df)} bike stations")
         
         return df
+
+    @staticmethod
+    def transform_columnar(
+        networks_data: List[Dict],
+        run_timestamp: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Transform raw bike network data by building each column directly
+        
+        Network attributes are repeated once per network, and a single run
+        timestamp is broadcast across the whole batch.
+        
+        Args:
+            networks_data: List of network data from API
+            run_timestamp: Timestamp to stamp on every row (defaults to now)
+            
+        Returns:
+            Cleaned DataFrame with the same schema as transform()
+        """
+        logger.info("Transforming bike station data (columnar)")
+        
+        columns = {name: [] for name in BikesTransformer.COLUMNS[:10] + ['observed_at']}
+        
+        for network in networks_data:
+            stations = network.get('stations', [])
+            count = len(stations)
+            
+            if not count:
+                continue
+            
+            location = network.get('location', {})
+            columns['network_id'].extend([network.get('id')] * count)
+            columns['network_name'].extend([network.get('name')] * count)
+            columns['city'].extend([location.get('city', 'Unknown')] * count)
+            columns['country'].extend([location.get('country', 'Unknown')] * count)
+            
+            columns['station_id'].extend([station.get('id') for station in stations])
+            columns['station_name'].extend([station.get('name') for station in stations])
+            columns['latitude'].extend([station.get('latitude') for station in stations])
+            columns['longitude'].extend([station.get('longitude') for station in stations])
+            columns['free_bikes'].extend([station.get('free_bikes', 0) for station in stations])
+            columns['empty_slots'].extend([station.get('empty_slots', 0) for station in stations])
+            columns['observed_at'].extend([station.get('timestamp') for station in stations])
+        
+        if not columns['station_id']:
+            logger.warning("No bike station data to transform")
+            return pd.DataFrame(columns=BikesTransformer.COLUMNS)
+        
+        df = pd.DataFrame(columns)
+        
+        # Data quality checks
+        df = df.dropna(subset=['station_id', 'latitude', 'longitude'])
+        df['free_bikes'] = pd.to_numeric(df['free_bikes']).fillna(0).astype(int)
+        df['empty_slots'] = pd.to_numeric(df['empty_slots']).fillna(0).astype(int)
+        df['total_slots'] = df['free_bikes'] + df['empty_slots']
+        
+        run_timestamp = np.datetime64(run_timestamp or datetime.utcnow(), 'ns')
+        df['observed_at'] = BikesTransformer.observed_at(df['observed_at'], run_timestamp)
+        df['timestamp'] = run_timestamp
+        df['extracted_at'] = run_timestamp
+        
+        logger.info(f"Transformed {len(df)} bike stations")
+        
+        return df[BikesTransformer.COLUMNS]
+
+    @staticmethod
+    def compact(df: pd.DataFrame) -> pd.DataFrame:
+        """Cast transformer output to COMPACT_DTYPES"""
+        return compact_dtypes(df, BikesTransformer.COMPACT_DTYPES)
+
+    @staticmethod
+    def transform_stream(
+        networks: Iterable[Dict],
+        chunk_size: int = 5000,
+        compact: bool = False
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Transform networks as they arrive into DataFrames of bounded size
+        
+        Large networks are split across chunks, so no chunk holds more than
+        chunk_size stations. All chunks share one run timestamp.
+        
+        Args:
+            networks: Iterable of network data, e.g. CityBikesExtractor.iter_networks
+            chunk_size: Maximum stations per yielded DataFrame
+            compact: Yield the COMPACT_DTYPES schema
+            
+        Yields:
+            Cleaned DataFrames with the same schema as transform()
+        """
+        finish = BikesTransformer.compact if compact else (lambda chunk: chunk)
+        run_timestamp = datetime.utcnow()
+        buffer = []
+        buffered = 0
+        
+        for network in networks:
+            stations = network.get('stations', [])
+            offset = 0
+            
+            while offset < len(stations):
+                take = min(chunk_size - buffered, len(stations) - offset)
+                buffer.append({**network, 'stations': stations[offset:offset + take]})
+                buffered += take
+                offset += take
+                
+                if buffered >= chunk_size:
+                    yield finish(BikesTransformer.transform_columnar(buffer, run_timestamp))
+                    buffer = []
+                    buffered = 0
+        
+        if buffered:
+            yield finish(BikesTransformer.transform_columnar(buffer, run_timestamp))
@@ -0,0 +1,62 @@
+"""
+Compact Dtypes
+Narrow column types for transformer output and a report of the memory saved
+"""
+import logging
+from typing import Any, Dict
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def compact_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Cast columns to narrower types
+
+    Columns missing from df are skipped, so empty batches pass through.
+
+    Args:
+        df: Transformer output
+        dtypes: Target dtype per column, e.g. {'city': 'category', 'latitude': 'float32'}
+
+    Returns:
+        DataFrame with the compact types
+    """
+    present = {column: dtype for column, dtype in dtypes.items() if column in df.columns}
+    return df.astype(present) if present else df
+
+
+def memory_report(wide: pd.DataFrame, compact: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compare the in-memory size of a batch before and after compaction
+
+    Args:
+        wide: Batch with the default types
+        compact: The same batch after compact_dtypes
+
+    Returns:
+        Rows, total bytes before/after, saved fraction and per-column bytes
+    """
+    wide_columns = wide.memory_usage(index=False, deep=True)
+    compact_columns = compact.memory_usage(index=False, deep=True)
+    wide_bytes = int(wide_columns.sum())
+    compact_bytes = int(compact_columns.sum())
+
+    return {
+        'rows': len(wide),
+        'wide_bytes': wide_bytes,
+        'compact_bytes': compact_bytes,
+        'saved_pct': 100.0 * (1 - compact_bytes / wide_bytes) if wide_bytes else 0.0,
+        'columns': {
+            column: (int(wide_columns[column]), int(compact_columns.get(column, 0)))
+            for column in wide.columns
+        },
+    }
+
+
+def format_memory_report(report: Dict[str, Any]) -> str:
+    """One-line summary of a memory_report, for logs"""
+    return (
+        f"{report['rows']} rows: {report['wide_bytes'] / 1e6:.2f} MB -> "
+        f"{report['compact_bytes'] / 1e6:.2f} MB ({report['saved_pct']:.0f}% saved)"
+    )
@@ -3,9 +3,11 @@ Flight Data Transformer
 Cleans and structures flight tracking data
 """
 import logging
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Iterable, Iterator, Optional, Tuple
+from .dtypes import compact_dtypes
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,8 @@ class FlightsTransformer:
     ICAO24 = 0
     CALLSIGN = 1
     ORIGIN_COUNTRY = 2
+    TIME_POSITION = 3
+    LAST_CONTACT = 4
     LONGITUDE = 5
     LATITUDE = 6
     ALTITUDE = 7
@@ -24,20 +28,71 @@ class FlightsTransformer:
     VELOCITY = 9
     HEADING = 10
     
+    # Leading state vector fields needed by the vectorized path
+    STATE_WIDTH = 11
+    
+    # Output schema, in column order
+    COLUMNS = [
+        'airport_code', 'icao24', 'callsign', 'origin_country',
+        'longitude', 'latitude', 'altitude', 'on_ground',
+        'velocity', 'heading', 'observed_at', 'timestamp', 'extracted_at'
+    ]
+    
+    # Opt-in narrow types: airports and countries as categories, positions
+    # and kinematics as float32 (OpenSky reports them to two decimals at most)
+    COMPACT_DTYPES = {
+        'airport_code': 'category',
+        'origin_country': 'category',
+        'longitude': 'float32',
+        'latitude': 'float32',
+        'altitude': 'float32',
+        'velocity': 'float32',
+        'heading': 'float32',
+    }
+    
     @staticmethod
-    def transform(flights_by_airport: Dict[str, List]) -> pd.DataFrame:
+    def observed_at(time_position: pd.Series, last_contact: pd.Series, fallback: datetime) -> pd.Series:
+        """
+        Source time of each state vector as naive UTC
+        
+        time_position is when the position was last updated; vectors without
+        one fall back to last_contact, then to the run time.
+        
+        Args:
+            time_position: Unix seconds, may be null
+            last_contact: Unix seconds, may be null
+            fallback: Timestamp for vectors with neither
+            
+        Returns:
+            datetime64[ns] Series
+        """
+        seconds = pd.to_numeric(time_position, errors='coerce').fillna(pd.to_numeric(last_contact, errors='coerce'))
+        return pd.to_datetime(seconds, unit='s').fillna(pd.Timestamp(fallback))
+    
+    @staticmethod
+    def transform(flights_by_airport: Dict[str, List], vectorized: bool = False, compact: bool = False) -> pd.DataFrame:
         """
         Transform raw flight data to structured format
         
         Args:
             flights_by_airport: Dictionary mapping airport codes to flight states
+            vectorized: Slice state vectors by column with NumPy instead of per flight
+            compact: Return the COMPACT_DTYPES schema
             
         Returns:
             Cleaned DataFrame
         """
+        if compact:
+            return FlightsTransformer.compact(FlightsTransformer.transform(flights_by_airport, vectorized=vectorized))
+        
+        if vectorized:
+            return FlightsTransformer.transform_vectorized(flights_by_airport)
+        
         logger.info("Transforming flight data")
         
         all_flights = []
+        # Taken up front: it is also the observed_at fallback, and every row may be dropped below
+        run_timestamp = datetime.utcnow()
         
         for airport_code, flights in flights_by_airport.items():
             for flight in flights:
@@ -55,8 +110,10 @@ class FlightsTransformer:
                     'on_ground': flight[FlightsTransformer.ON_GROUND],
                     'velocity': flight[FlightsTransformer.VELOCITY],
                     'heading': flight[FlightsTransformer.HEADING],
-                    'timestamp': datetime.utcnow(),
-                    'extracted_at': datetime.utcnow()
+                    'time_position': flight[FlightsTransformer.TIME_POSITION],
+                    'last_contact': flight[FlightsTransformer.LAST_CONTACT],
+                    'timestamp': run_timestamp,
+                    'extracted_at': run_timestamp
                 })
         
         df = pd.DataFrame(all_flights)
@@ -70,7 +127,144 @@ class FlightsTransformer:
         df['altitude'] = df['altitude'].fillna(0).astype(float)
         df['velocity'] = df['velocity'].fillna(0).astype(float)
         df['on_ground'] = df['on_ground'].fillna(False).astype(bool)
+        df.insert(
+            df.columns.get_loc('time_position'),
+            'observed_at',
+            FlightsTransformer.observed_at(df['time_position'], df['last_contact'], run_timestamp)
+        )
+        df = df.drop(columns=['time_position', 'last_contact'])
         
         logger.info(f"Transformed {len(df)} flights")
         
         return df
+
+    @staticmethod
+    def transform_vectorized(
+        flights_by_airport: Dict[str, List],
+        run_timestamp: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """
+        Transform raw flight data by slicing a 2-D state vector array by column
+        
+        Args:
+            flights_by_airport: Dictionary mapping airport codes to flight states
+            run_timestamp: Timestamp to stamp on every row (defaults to now)
+            
+        Returns:
+            Cleaned DataFrame with the same schema as transform()
+        """
+        logger.info("Transforming flight data (vectorized)")
+        
+        width = FlightsTransformer.STATE_WIDTH
+        airport_codes = []
+        blocks = []
+        
+        for airport_code, flights in flights_by_airport.items():
+            rows = [flight for flight in flights if flight]
+            
+            if not rows:
+                continue
+            
+            try:
+                block = np.array(rows, dtype=object)
+            except ValueError:
+                block = None
+            
+            if block is None or block.ndim != 2:
+                # Vectors of mixed length (e.g. with the optional category field)
+                block = np.array([row[:width] for row in rows], dtype=object)
+            
+            blocks.append(block[:, :width])
+            airport_codes.append(np.full(len(rows), airport_code, dtype=object))
+        
+        if not blocks:
+            logger.warning("No flight data to transform")
+            return pd.DataFrame(columns=FlightsTransformer.COLUMNS)
+        
+        matrix = np.concatenate(blocks)
+        
+        def numeric(index: int) -> np.ndarray:
+            return matrix[:, index].astype(float)
+        
+        # A plain pass over one column beats the pandas .str accessor here
+        callsigns = [
+            str(callsign).strip() if callsign else None
+            for callsign in matrix[:, FlightsTransformer.CALLSIGN]
+        ]
+        
+        run_timestamp = np.datetime64(run_timestamp or datetime.utcnow(), 'ns')
+        
+        df = pd.DataFrame({
+            'airport_code': np.concatenate(airport_codes),
+            'icao24': matrix[:, FlightsTransformer.ICAO24],
+            'callsign': callsigns,
+            'origin_country': matrix[:, FlightsTransformer.ORIGIN_COUNTRY],
+            'longitude': numeric(FlightsTransformer.LONGITUDE),
+            'latitude': numeric(FlightsTransformer.LATITUDE),
+            'altitude': numeric(FlightsTransformer.ALTITUDE),
+            'on_ground': matrix[:, FlightsTransformer.ON_GROUND],
+            'velocity': numeric(FlightsTransformer.VELOCITY),
+            'heading': numeric(FlightsTransformer.HEADING),
+            'observed_at': FlightsTransformer.observed_at(
+                pd.Series(matrix[:, FlightsTransformer.TIME_POSITION]),
+                pd.Series(matrix[:, FlightsTransformer.LAST_CONTACT]),
+                run_timestamp
+            ).to_numpy(),
+            'timestamp': run_timestamp,
+            'extracted_at': run_timestamp
+        })
+        
+        # Data quality checks
+        df = df.dropna(subset=['icao24', 'latitude', 'longitude'])
+        df['altitude'] = df['altitude'].fillna(0)
+        df['velocity'] = df['velocity'].fillna(0)
+        df['on_ground'] = df['on_ground'].fillna(False).astype(bool)
+        
+        logger.info(f"Transformed {len(df)} flights")
+        
+        return df
+
+    @staticmethod
+    def compact(df: pd.DataFrame) -> pd.DataFrame:
+        """Cast transformer output to COMPACT_DTYPES"""
+        return compact_dtypes(df, FlightsTransformer.COMPACT_DTYPES)
+
+    @staticmethod
+    def transform_stream(
+        flights_by_airport: Iterable[Tuple[str, List]],
+        chunk_size: int = 5000,
+        compact: bool = False
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Transform per-airport flight states as they arrive into bounded DataFrames
+        
+        Args:
+            flights_by_airport: Iterable of (airport code, states) pairs,
+                e.g. FlightsExtractor.iter_flights_for_airports
+            chunk_size: Maximum flights per yielded DataFrame
+            compact: Yield the COMPACT_DTYPES schema
+            
+        Yields:
+            Cleaned DataFrames with the same schema as transform()
+        """
+        finish = FlightsTransformer.compact if compact else (lambda chunk: chunk)
+        run_timestamp = datetime.utcnow()
+        buffer = {}
+        buffered = 0
+        
+        for airport_code, flights in flights_by_airport:
+            offset = 0
+            
+            while offset < len(flights):
+                take = min(chunk_size - buffered, len(flights) - offset)
+                buffer.setdefault(airport_code, []).extend(flights[offset:offset + take])
+                buffered += take
+                offset += take
+                
+                if buffered >= chunk_size:
+                    yield finish(FlightsTransformer.transform_vectorized(buffer, run_timestamp))
+                    buffer = {}
+                    buffered = 0
+        
+        if buffered:
+            yield finish(FlightsTransformer.transform_vectorized(buffer, run_timestamp))
@@ -1,6 +1,7 @@
 """
 Unit tests for logistics pipeline
 """
+import os
 import pytest
 from unittest.mock import Mock, patch
 import pandas as pd
@@ -10,17 +11,18 @@ from datetime import datetime
 class TestExtractors:
     """Test extraction scripts"""
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_citybikes_extraction(self, mock_get):
         """Test bike data extraction"""
         import sys
         import os
+        import json
         sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
         
         from extractors.citybikes_extractor import CityBikesExtractor
         
         mock_response = Mock()
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             'network': {
                 'id': 'test-network',
                 'name': 'Test Network',
@@ -36,7 +38,7 @@ class TestExtractors:
                     }
                 ]
             }
-        }
+        }).encode()
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
         
@@ -47,6 +49,350 @@ class TestExtractors:
         assert result['id'] == 'test-network'
         assert len(result['stations']) == 1
 
+    def test_concurrent_extraction_respects_host_limit(self):
+        """Test networks are fetched in parallel, capped per host, in order"""
+        import sys
+        import os
+        import json
+        import threading
+        import time
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from extractors.citybikes_extractor import CityBikesExtractor
+        
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'peak': 0}
+        
+        def fake_get(url, params=None, headers=None, timeout=None, stream=False):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+            time.sleep(0.05)
+            with lock:
+                in_flight['now'] -= 1
+            
+            response = Mock()
+            response.raise_for_status = Mock()
+            response.content = json.dumps({'network': {'id': url.rsplit('/', 1)[-1], 'stations': []}}).encode()
+            return response
+        
+        extractor = CityBikesExtractor(max_workers=8, max_per_host=3)
+        network_ids = [f'network-{i}' for i in range(9)]
+        
+        with patch.object(extractor.session, 'get', side_effect=fake_get):
+            results = extractor.extract_all_networks(network_ids)
+        
+        assert [r['id'] for r in results] == network_ids
+        assert 1 < in_flight['peak'] <= 3
+        
+        in_flight['peak'] = 0
+        with patch.object(extractor.session, 'get', side_effect=fake_get):
+            streamed = list(extractor.iter_networks(network_ids))
+        
+        assert sorted(r['id'] for r in streamed) == sorted(network_ids)
+        assert 1 < in_flight['peak'] <= 3
+
+    def test_response_cache_revalidation(self):
+        """Test fresh hits, 304 revalidation and LRU eviction in the response cache"""
+        import sys
+        import os
+        import json
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from extractors.base_extractor import BaseExtractor
+        from extractors.response_cache import ResponseCache
+        
+        payload = json.dumps({'network': {'id': 'test-network', 'stations': []}}).encode('utf-8')
+        
+        ok_response = Mock(status_code=200, content=payload, headers={'ETag': '"v1"'})
+        ok_response.raise_for_status = Mock()
+        ok_response.json.return_value = json.loads(payload)
+        not_modified = Mock(status_code=304, content=b'', headers={})
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResponseCache(cache_dir, ttl=60, max_bytes=10 * len(payload))
+            extractor = BaseExtractor('https://example.test', cache=cache)
+            
+            with patch.object(extractor.session, 'get', return_value=ok_response) as mock_get:
+                assert extractor.get('networks/a') == json.loads(payload)
+                assert extractor.get('networks/a') == json.loads(payload)
+                assert mock_get.call_count == 1
+            
+            cache.ttl = 0
+            with patch.object(extractor.session, 'get', return_value=not_modified) as mock_get:
+                assert extractor.get('networks/a') == json.loads(payload)
+                assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+            
+            stats = cache.stats()
+            assert stats['misses'] == 1
+            assert stats['hits'] == 1
+            assert stats['revalidated'] == 1
+            assert stats['bytes_saved'] == 2 * len(payload)
+            
+            for i in range(20):
+                cache.store(f'https://example.test/{i}', None, payload)
+            assert cache.stats()['size_bytes'] <= 10 * len(payload)
+            assert cache.stats()['evictions'] > 0
+            
+            reloaded = ResponseCache(cache_dir)
+            assert reloaded.stats()['entries'] == cache.stats()['entries']
+
+
+    def test_rate_limiter_and_circuit_breaker(self):
+        """Test 429s pause the host bucket, long Retry-After fails fast and circuits open"""
+        import sys
+        import os
+        import time
+        import requests
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from extractors.base_extractor import BaseExtractor
+        from extractors.rate_limiter import RateLimiter, CircuitBreaker
+        
+        ok_response = Mock(status_code=200, headers={})
+        ok_response.raise_for_status = Mock()
+        ok_response.content = b'{"ok": true}'
+        throttled = Mock(status_code=429, headers={'Retry-After': '0.2'})
+        exhausted = Mock(status_code=429, headers={'X-Rate-Limit-Retry-After-Seconds': '3600'})
+        
+        limiter = RateLimiter(rate=100, burst=1, max_retry_after=60)
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+        extractor = BaseExtractor(
+            'https://example.test', max_retries=3, rate_limiter=limiter,
+            circuit_breaker=breaker, backoff_base=0
+        )
+        
+        with patch.object(extractor.session, 'get', side_effect=[throttled, ok_response]):
+            start = time.monotonic()
+            assert extractor.get('states') == {'ok': True}
+            assert time.monotonic() - start >= 0.2
+        
+        with patch.object(extractor.session, 'get', side_effect=[exhausted]) as mock_get:
+            assert extractor.get('states') is None
+            assert mock_get.call_count == 1
+        
+        host_stats = extractor.stats()['rate_limits']['example.test']
+        assert host_stats['throttled'] == 2
+        assert host_stats['requests'] == 3
+        
+        failure = requests.exceptions.ConnectionError('down')
+        with patch.object(extractor.session, 'get', side_effect=failure) as mock_get:
+            assert extractor.get('states') is None
+            assert mock_get.call_count == 1
+            assert breaker.stats()['example.test']['state'] == CircuitBreaker.OPEN
+            
+            assert extractor.get('states') is None
+            assert mock_get.call_count == 1
+            assert breaker.stats()['example.test']['rejected'] == 2
+        
+        time.sleep(0.2)
+        with patch.object(extractor.session, 'get', return_value=ok_response):
+            assert extractor.get('states') == {'ok': True}
+        assert breaker.stats()['example.test']['state'] == CircuitBreaker.CLOSED
+
+
+    def test_streamed_retries_release_connections(self):
+        """Test streamed responses are closed before every retry and only the final one is returned open"""
+        import sys
+        import os
+        import requests
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from extractors.base_extractor import BaseExtractor
+        
+        throttled = Mock(status_code=503, headers={})
+        failed = Mock(status_code=500, headers={})
+        failed.raise_for_status = Mock(side_effect=requests.exceptions.HTTPError('500', response=failed))
+        ok_response = Mock(status_code=200, headers={})
+        
+        extractor = BaseExtractor('https://example.test', max_retries=3, backoff_base=0)
+        
+        with patch.object(extractor.session, 'get', side_effect=[throttled, failed, ok_response]) as mock_get:
+            assert extractor._fetch('https://example.test/states', stream=True) is ok_response
+            assert all(call.kwargs['stream'] for call in mock_get.call_args_list)
+        
+        throttled.close.assert_called_once()
+        failed.close.assert_called_once()
+        ok_response.close.assert_not_called()
+
+
+    def test_extractors_against_mock_server(self):
+        """Test the benchmark stand-in server speaks the CityBikes and OpenSky APIs"""
+        import sys
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_state_vectors
+        from benchmarks.mock_server import MockApiServer
+        from extractors.citybikes_extractor import CityBikesExtractor
+        from extractors.flights_extractor import FlightsExtractor
+        
+        networks = generate_bike_networks(200, num_networks=2)
+        states = generate_state_vectors(300, (8.0, 45.0, 9.0, 46.0))
+        airports = [{'code': 'LIMC', 'bbox': [8.5, 45.4, 8.8, 45.7]}]
+        
+        with MockApiServer(networks, states, latency=0.01) as server:
+            bikes = CityBikesExtractor(base_url=server.url, max_workers=2, max_retries=1)
+            flights = FlightsExtractor(base_url=server.url)
+            
+            assert bikes.extract_all_networks([n['id'] for n in networks] + ['missing']) == networks
+            
+            result = flights.extract_flights_for_airports(airports)
+            expected = [s for s in states if 8.5 <= s[5] <= 8.8 and 45.4 <= s[6] <= 45.7]
+            assert result == {'LIMC': expected}
+            assert server.requests >= 4
+            
+            bikes.close()
+            flights.close()
+
+
+    def test_consolidated_flight_requests_match_per_airport(self):
+        """Test merged bbox requests are split into the same per-airport result"""
+        import sys
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_state_vectors
+        from extractors.flights_extractor import FlightsExtractor
+        
+        airports = [
+            {'code': 'LIMC', 'bbox': [8.5, 45.4, 8.8, 45.7]},
+            {'code': 'LIML', 'bbox': [9.2, 45.4, 9.4, 45.5]},
+            {'code': 'OVRL', 'bbox': [8.7, 45.6, 9.0, 45.8]},
+            {'code': 'EHAM', 'bbox': [4.6, 52.2, 4.9, 52.4]},
+        ]
+        states = generate_state_vectors(400, (8.4, 45.3, 9.5, 45.9), seed=1)
+        states += generate_state_vectors(100, (4.5, 52.1, 5.0, 52.5), seed=2, start_index=400)
+        
+        requested = []
+        
+        def fake_bbox_request(bbox):
+            # Mimic the API's server-side bbox filter
+            requested.append(bbox)
+            return [
+                state for state in states
+                if bbox[0] <= state[5] <= bbox[2] and bbox[1] <= state[6] <= bbox[3]
+            ]
+        
+        per_airport = FlightsExtractor()
+        consolidated = FlightsExtractor(consolidate_requests=True, max_merged_area=1.0, max_workers=2)
+        
+        with patch.object(FlightsExtractor, 'extract_flights_by_bbox', side_effect=fake_bbox_request):
+            expected = per_airport.extract_flights_for_airports(airports)
+            requested.clear()
+            
+            result = consolidated.extract_flights_for_airports(airports)
+            assert len(requested) == 2
+            assert list(result) == [airport['code'] for airport in airports]
+            assert result == expected
+            assert any(result['OVRL']) and any(result['LIMC'])
+            
+            streamed = dict(consolidated.iter_flights_for_airports(airports))
+            assert streamed == expected
+        
+        groups = FlightsExtractor.merge_bboxes([tuple(a['bbox']) for a in airports], max_area=1000)
+        assert len(groups) == 1 and sorted(groups[0][1]) == [0, 1, 2, 3]
+
+
+    def test_single_airport_extraction_reports_failures(self):
+        """Test an empty sky is not mistaken for a failed request"""
+        import sys
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from extractors.flights_extractor import FlightsExtractor
+        
+        airport = {'code': 'LIMC', 'bbox': [8.5, 45.4, 8.8, 45.7]}
+        state = ['4b1805', 'SWR123', 'Switzerland', 1700000000, 1700000000, 8.6, 45.5]
+        extractor = FlightsExtractor()
+        
+        responses = [{'time': 1700000000, 'states': [state]}, {'time': 1700000000, 'states': None}, None]
+        with patch.object(extractor, 'get', side_effect=responses) as mock_get:
+            assert extractor.extract_airport(airport) == [state]
+            assert mock_get.call_args.kwargs['params'] == {'lamin': 45.4, 'lomin': 8.5, 'lamax': 45.7, 'lomax': 8.8}
+            assert extractor.extract_airport(airport) == []
+            assert extractor.extract_airport(airport) is None
+
+
+    def test_incremental_json_batches(self):
+        """Test batched parsing matches whole-document decoding for stations and states"""
+        import sys
+        import os
+        import io
+        import json
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_state_vectors
+        from benchmarks.mock_server import MockApiServer
+        from extractors import json_decoder
+        from extractors.citybikes_extractor import CityBikesExtractor
+        from extractors.flights_extractor import FlightsExtractor
+        
+        def parse_events(value, prefix=''):
+            # The (prefix, event, value) stream ijson.parse produces
+            if isinstance(value, dict):
+                yield prefix, 'start_map', None
+                for key, item in value.items():
+                    yield prefix, 'map_key', key
+                    yield from parse_events(item, f"{prefix}.{key}" if prefix else key)
+                yield prefix, 'end_map', None
+            elif isinstance(value, list):
+                yield prefix, 'start_array', None
+                for item in value:
+                    yield from parse_events(item, f"{prefix}.item" if prefix else 'item')
+                yield prefix, 'end_array', None
+            else:
+                yield prefix, 'string', value
+        
+        network = generate_bike_networks(25, num_networks=1)[0]
+        document = {'network': network}
+        metadata = {key: value for key, value in network.items() if key != 'stations'}
+        
+        assert json_decoder.loads(json.dumps(document).encode()) == document
+        
+        buffered = list(json_decoder.iter_batches(io.BytesIO(json.dumps(document).encode()), 'network.stations', 10))
+        streamed = list(json_decoder.iter_event_batches(parse_events(document), 'network.stations', 10))
+        for batches in (buffered, streamed):
+            assert [len(batch) for _, batch in batches] == [10, 10, 5]
+            assert [station for _, batch in batches for station in batch] == network['stations']
+            assert all(members == metadata for members, _ in batches)
+        
+        empty_sky = {'time': 1700000000, 'states': None}
+        assert list(json_decoder.iter_event_batches(parse_events(empty_sky), 'states', 10)) == []
+        assert list(json_decoder.iter_batches(io.BytesIO(json.dumps(empty_sky).encode()), 'states', 10)) == []
+        
+        networks = generate_bike_networks(120, num_networks=2)
+        states = generate_state_vectors(300, (8.0, 45.0, 9.0, 46.0))
+        airports = [
+            {'code': 'LIMC', 'bbox': [8.5, 45.4, 8.8, 45.7]},
+            {'code': 'LIML', 'bbox': [9.2, 45.4, 9.4, 45.5]},
+        ]
+        
+        with MockApiServer(networks, states) as server:
+            bikes = CityBikesExtractor(base_url=server.url, max_retries=1)
+            pieces = list(bikes.iter_station_batches([n['id'] for n in networks], batch_size=50))
+            assert max(len(piece['stations']) for piece in pieces) == 50
+            for expected in networks:
+                mine = [piece for piece in pieces if piece['id'] == expected['id']]
+                assert [station for piece in mine for station in piece['stations']] == expected['stations']
+                assert mine[0]['location'] == expected['location']
+            
+            for consolidate in (False, True):
+                flights = FlightsExtractor(base_url=server.url, consolidate_requests=consolidate)
+                expected = flights.extract_flights_for_airports(airports)
+                batched = {}
+                for code, batch in flights.iter_flight_batches(airports, batch_size=20):
+                    assert len(batch) <= 20
+                    batched.setdefault(code, []).extend(batch)
+                assert {code: batched.get(code, []) for code in expected} == expected
+                flights.close()
+            
+            bikes.close()
+
 
 class TestTransformers:
     """Test transformation scripts"""
@@ -84,6 +430,150 @@ class TestTransformers:
         assert df.iloc[0]['free_bikes'] == 5
         assert df.iloc[0]['total_slots'] == 15
 
+    def test_bikes_columnar_matches_row_transform(self):
+        """Test the columnar bike transform produces the row-wise output"""
+        import sys
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from transformers.bikes_transformer import BikesTransformer
+        
+        raw_data = [
+            {
+                'id': 'net-a',
+                'name': 'Network A',
+                'location': {'city': 'Milano', 'country': 'IT'},
+                'stations': [
+                    {'id': 's1', 'name': 'One', 'latitude': 45.0, 'longitude': 9.0,
+                     'free_bikes': 3, 'empty_slots': 7, 'timestamp': '2024-01-01T12:00:00.250000Z'},
+                    {'id': 's2', 'name': 'Two', 'latitude': None, 'longitude': 9.1,
+                     'free_bikes': 1, 'empty_slots': 1},
+                    {'id': 's3', 'name': 'Three', 'latitude': 45.2, 'longitude': 9.2,
+                     'timestamp': '2024-01-01T11:58:00Z'},
+                ]
+            },
+            {'id': 'net-empty', 'name': 'Empty', 'location': {}, 'stations': []},
+            {
+                'id': 'net-b',
+                'name': 'Network B',
+                'stations': [
+                    {'id': 's4', 'name': 'Four', 'latitude': 48.8, 'longitude': 2.3,
+                     'free_bikes': 10, 'empty_slots': 0, 'timestamp': '2024-01-01T12:00:01+00:00'},
+                ]
+            },
+        ]
+        
+        rows = BikesTransformer.transform(raw_data)
+        columnar = BikesTransformer.transform(raw_data, columnar=True)
+        
+        assert list(columnar.columns) == BikesTransformer.COLUMNS
+        assert columnar['timestamp'].nunique() == 1
+        assert list(columnar['observed_at']) == [
+            pd.Timestamp('2024-01-01 12:00:00.25'), pd.Timestamp('2024-01-01 11:58:00'), pd.Timestamp('2024-01-01 12:00:01')
+        ]
+        pd.testing.assert_frame_equal(
+            rows.drop(columns=['timestamp', 'extracted_at']),
+            columnar.drop(columns=['timestamp', 'extracted_at'])
+        )
+        
+        assert BikesTransformer.transform([], columnar=True).empty
+
+    def test_flights_vectorized_matches_row_transform(self):
+        """Test the vectorized flight transform produces the per-flight output"""
+        import sys
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from transformers.flights_transformer import FlightsTransformer
+        
+        raw_data = {
+            'LIMC': [
+                ['4b1805', 'AZA123  ', 'Italy', 1, 2, 8.6, 45.5, 1000.0, False, 200.0, 90.0,
+                 None, None, 1050.0, '1000', False, 0],
+                ['4b1806', None, 'Italy', 1, 2, 8.7, 45.6, None, True, None, None,
+                 None, None, None, None, False, 0, 3],
+                ['4b1807', '', 'Italy', 1, 2, None, 45.6, None, None, None, None,
+                 None, None, None, None, False, 0],
+                [],
+            ],
+            'EDDM': [],
+            'EHAM': [
+                ['484506', 'KLM1   ', 'Netherlands', 1, 2, 4.7, 52.3, 300.0, False, 80.0, None,
+                 None, None, None, None, False, 0],
+            ],
+        }
+        
+        rows = FlightsTransformer.transform(raw_data)
+        vectorized = FlightsTransformer.transform(raw_data, vectorized=True)
+        
+        assert list(vectorized.columns) == FlightsTransformer.COLUMNS
+        assert list(vectorized['callsign']) == ['AZA123', None, 'KLM1']
+        pd.testing.assert_frame_equal(
+            rows.drop(columns=['timestamp', 'extracted_at']),
+            vectorized.drop(columns=['timestamp', 'extracted_at'])
+        )
+        
+        assert FlightsTransformer.transform({'LIMC': []}, vectorized=True).empty
+
+    def test_streaming_transform_chunks(self):
+        """Test streaming transforms split input into bounded chunks without loss"""
+        import sys
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_flights_by_airport
+        from transformers.bikes_transformer import BikesTransformer
+        from transformers.flights_transformer import FlightsTransformer
+        
+        networks = generate_bike_networks(2500, num_networks=3)
+        bike_chunks = list(BikesTransformer.transform_stream(iter(networks), chunk_size=1000))
+        
+        assert [len(chunk) for chunk in bike_chunks] == [1000, 1000, 500]
+        assert len({chunk['timestamp'].iloc[0] for chunk in bike_chunks}) == 1
+        streamed = pd.concat(bike_chunks, ignore_index=True)
+        batch = BikesTransformer.transform(networks, columnar=True).reset_index(drop=True)
+        pd.testing.assert_frame_equal(
+            streamed.drop(columns=['timestamp', 'extracted_at']),
+            batch.drop(columns=['timestamp', 'extracted_at'])
+        )
+        
+        flights = generate_flights_by_airport(250)
+        flight_chunks = list(FlightsTransformer.transform_stream(iter(flights.items()), chunk_size=100))
+        assert [len(chunk) for chunk in flight_chunks] == [100, 100, 50]
+        assert list(pd.concat(flight_chunks)['airport_code'].unique()) == list(flights)
+
+
+    def test_transforms_with_every_row_dropped(self):
+        """Test rows all failing the quality checks give an empty frame on every path"""
+        import sys
+        import os
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from transformers.bikes_transformer import BikesTransformer
+        from transformers.flights_transformer import FlightsTransformer
+        
+        networks = [{
+            'id': 'net',
+            'name': 'Net',
+            'location': {'city': 'Milano', 'country': 'IT'},
+            'stations': [{'id': 's1', 'name': 'No position', 'latitude': None, 'longitude': None,
+                          'free_bikes': 1, 'empty_slots': 2}]
+        }]
+        # OpenSky state vectors without a position
+        flights = {'LIMC': [['abc123', 'DLH1  ', 'Germany', None, 1700000000, None, None,
+                             None, True, None, None]]}
+        
+        for columnar in (False, True):
+            df = BikesTransformer.transform(networks, columnar=columnar)
+            assert df.shape == (0, 14)
+            assert set(df.columns) == set(BikesTransformer.COLUMNS)
+        
+        for vectorized in (False, True):
+            df = FlightsTransformer.transform(flights, vectorized=vectorized)
+            assert df.shape == (0, 13)
+            assert set(df.columns) == set(FlightsTransformer.COLUMNS)
+
 
 class TestLoaders:
     """Test loading scripts"""
@@ -115,3 +605,1099 @@ class TestLoaders:
         finally:
             if os.path.exists(db_path):
                 os.remove(db_path)
+
+    def test_bulk_load_matches_to_sql(self):
+        """Test the bulk load path stores the same rows as to_sql in WAL mode"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from loaders.data_loader import DataLoader
+        from loaders.database_schema import BikeStation
+        
+        df = pd.DataFrame([
+            {'network_id': 'net', 'network_name': 'Net', 'city': 'Milano', 'country': 'IT',
+             'station_id': f's{i}', 'station_name': f'Station {i}', 'latitude': 45.0 + i,
+             'longitude': 9.0, 'free_bikes': i, 'empty_slots': 10 - i, 'total_slots': 10,
+             'timestamp': datetime(2024, 1, 1, 12, 0, 0, 123456),
+             'extracted_at': datetime(2024, 1, 1, 12, 0, 1)}
+            for i in range(5)
+        ])
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stored = {}
+            
+            for method in ('to_sql', 'bulk'):
+                loader = DataLoader(os.path.join(tmp_dir, f'{method}.db'), load_method=method, chunk_size=2)
+                assert loader.load_bikes(df) == 5
+                
+                session = loader.db_manager.get_session()
+                try:
+                    stored[method] = [
+                        (row.station_id, row.free_bikes, row.timestamp, row.extracted_at)
+                        for row in session.query(BikeStation).order_by(BikeStation.id)
+                    ]
+                finally:
+                    session.close()
+                
+                with loader.db_manager.engine.connect() as connection:
+                    journal_mode = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+                loader.db_manager.engine.dispose()
+            
+            assert stored['bulk'] == stored['to_sql']
+            assert stored['bulk'][0][2] == datetime(2024, 1, 1, 12, 0, 0, 123456)
+            assert journal_mode == 'wal'
+            assert loader.bulk_loader.last_stats['rows'] == 5
+
+    def test_delta_load_and_timeseries_rebuild(self):
+        """Test delta mode writes only changed stations and rebuilds the series"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from loaders.data_loader import DataLoader
+        
+        def snapshot(ts, free_bikes):
+            return pd.DataFrame([
+                {'network_id': 'net', 'network_name': 'Net', 'city': 'Milano', 'country': 'IT',
+                 'station_id': f's{i}', 'station_name': f'Station {i}', 'latitude': 45.0,
+                 'longitude': 9.0, 'free_bikes': free, 'empty_slots': 10 - free, 'total_slots': 10,
+                 'timestamp': ts, 'extracted_at': ts}
+                for i, free in enumerate(free_bikes)
+            ])
+        
+        t1, t2, t3 = (datetime(2024, 1, 1, 12, m) for m in (0, 30, 59))
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loader = DataLoader(os.path.join(tmp_dir, 'delta.db'), bike_load_mode='delta')
+            
+            assert loader.load_bikes(snapshot(t1, [1, 2, 3])) == 3
+            assert loader.load_bikes(snapshot(t2, [1, 5, 3])) == 1
+            assert loader.load_bikes(snapshot(t3, [1, 5, 3])) == 0
+            assert loader.get_record_counts()['bike_stations'] == 4
+            
+            series = loader.get_bike_timeseries()
+            assert len(series) == 9
+            assert list(series[series['timestamp'] == t2]['free_bikes']) == [1, 5, 3]
+            assert list(series[series['station_id'] == 's1']['free_bikes']) == [2, 5, 5]
+            
+            assert len(loader.get_bike_timeseries(start=t2, end=t2)) == 3
+            loader.db_manager.engine.dispose()
+
+    def test_delta_snapshots_per_network(self):
+        """Test snapshot counts are kept per network and survive retries and split chunks"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from sqlalchemy import select
+        from loaders.data_loader import DataLoader
+        from loaders.database_schema import BikeSnapshot
+        
+        def snapshot(network_id, ts, free_bikes):
+            return pd.DataFrame([
+                {'network_id': network_id, 'network_name': network_id, 'city': 'Milano', 'country': 'IT',
+                 'station_id': f's{i}', 'station_name': f'Station {i}', 'latitude': 45.0,
+                 'longitude': 9.0, 'free_bikes': free, 'empty_slots': 10 - free, 'total_slots': 10,
+                 'timestamp': ts, 'extracted_at': ts}
+                for i, free in enumerate(free_bikes)
+            ])
+        
+        t1, t2 = datetime(2024, 1, 1, 12, 0), datetime(2024, 1, 1, 12, 30)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'snapshots.db')
+            loader = DataLoader(db_path, bike_load_mode='delta')
+            
+            def counts():
+                with loader.db_manager.engine.connect() as connection:
+                    rows = connection.execute(select(
+                        BikeSnapshot.timestamp, BikeSnapshot.network_id,
+                        BikeSnapshot.station_count, BikeSnapshot.changed_count
+                    )).all()
+                return {(ts, net): (stations, changed) for ts, net, stations, changed in rows}
+            
+            both = pd.concat([snapshot('a', t1, [1, 2]), snapshot('b', t1, [3, 4, 5])], ignore_index=True)
+            loader.load_bikes(both)
+            assert counts() == {(t1, 'a'): (2, 2), (t1, 'b'): (3, 3)}
+            # A retry of the same batch keeps the counts of the original load
+            loader.load_bikes(both)
+            assert counts() == {(t1, 'a'): (2, 2), (t1, 'b'): (3, 3)}
+            
+            # Network 'b' split over two streamed chunks, then the whole stream retried
+            chunks = [snapshot('b', t2, [3, 9, 5]).iloc[:2], snapshot('b', t2, [3, 9, 5]).iloc[2:]]
+            loader.load_bikes_stream(chunks)
+            assert counts()[(t2, 'b')] == (3, 1)
+            loader.load_bikes_stream(chunks)
+            assert counts()[(t2, 'b')] == (3, 1)
+            
+            # Only network 'b' was loaded at t2, so 'a' gets no row for it
+            assert sorted(loader.get_bike_timeseries(network_id='a')['timestamp'].unique()) == [t1]
+            assert len(loader.get_bike_timeseries(network_id='b')) == 6
+            assert len(loader.get_bike_timeseries()) == 8
+            loader.db_manager.engine.dispose()
+
+    def test_indexes_partitions_and_migration(self):
+        """Test composite indexes, per-day partitions and migrating an old database"""
+        import sys
+        import os
+        import sqlite3
+        import tempfile
+        from datetime import date
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from loaders.data_loader import DataLoader
+        from loaders.database_schema import DatabaseManager
+        from loaders.migrations import migrate
+        
+        def flights(day):
+            return pd.DataFrame([
+                {'airport_code': 'LIMC', 'icao24': f'abc{i}', 'callsign': 'AZA1',
+                 'origin_country': 'Italy', 'longitude': 8.7, 'latitude': 45.6,
+                 'altitude': 1000.0, 'on_ground': False, 'velocity': 200.0, 'heading': 90.0,
+                 'timestamp': datetime(2024, 1, day, 12, i), 'extracted_at': datetime(2024, 1, day, 12, i)}
+                for i in range(3)
+            ])
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'old.db')
+            
+            # A database created before the indexes were declared
+            connection = sqlite3.connect(db_path)
+            connection.execute(
+                "CREATE TABLE flights (id INTEGER PRIMARY KEY, airport_code VARCHAR(10), icao24 VARCHAR(20), "
+                "callsign VARCHAR(20), origin_country VARCHAR(100), longitude FLOAT, latitude FLOAT, "
+                "altitude FLOAT, on_ground BOOLEAN, velocity FLOAT, heading FLOAT, "
+                "timestamp DATETIME, extracted_at DATETIME)"
+            )
+            connection.commit()
+            connection.close()
+            
+            loader = DataLoader(db_path)
+            loader.load_flights(pd.concat([flights(1), flights(2)]))
+            loader.db_manager.engine.dispose()
+            
+            summary = migrate(db_path, partition=True)
+            assert set(summary['indexes_created']) == {'ix_flights_icao24_ts', 'ix_flights_airport_ts'}
+            assert summary['rows_partitioned']['flights'] == 6
+            
+            # The CLI's --config path: the same database described by config.yaml
+            again = migrate(db_manager=DatabaseManager.from_config({'type': 'sqlite', 'path': db_path}))
+            assert again == {'indexes_created': []}
+            with patch.dict(os.environ, {'LOGISTICS_DATABASE_URL': 'postgresql://etl@db:5432/logistics'}):
+                pg = DatabaseManager.from_config({'type': 'postgresql', 'url': 'postgresql://localhost/x', 'pool_size': 3})
+            assert (pg.db_path, pg.url, pg.pool_size) == (None, 'postgresql://etl@db:5432/logistics', 3)
+            
+            loader = DataLoader(db_path, partition_by_day=True)
+            assert loader.db_manager.list_partitions('flights') == ['flights_20240101', 'flights_20240102']
+            assert loader.get_record_counts()['flights'] == 6
+            
+            loader.load_flights(flights(3))
+            assert loader.get_record_counts()['flights'] == 9
+            
+            with loader.db_manager.engine.connect() as connection:
+                plan = connection.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN SELECT * FROM flights_20240103 "
+                    "WHERE icao24 = 'abc1' AND timestamp >= '2024-01-03'"
+                ).fetchall()
+            assert 'ix_flights_20240103_icao24_ts' in str(plan)
+            
+            dropped = loader.db_manager.drop_partitions('flights', date(2024, 1, 2))
+            assert dropped == ['flights_20240101']
+            assert loader.get_record_counts()['flights'] == 6
+            loader.db_manager.engine.dispose()
+
+    def test_star_schema_load(self):
+        """Test star storage upserts the station dimension and appends narrow facts"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from loaders.data_loader import DataLoader
+        from loaders.database_schema import Station
+        
+        def snapshot(ts, name_of_s1='Station 1'):
+            return pd.DataFrame([
+                {'network_id': 'net', 'network_name': 'Net', 'city': 'Milano', 'country': 'IT',
+                 'station_id': f's{i}', 'station_name': name_of_s1 if i == 1 else f'Station {i}',
+                 'latitude': 45.0 + i, 'longitude': 9.0, 'free_bikes': i, 'empty_slots': 5,
+                 'total_slots': i + 5, 'timestamp': ts, 'extracted_at': ts}
+                for i in range(3)
+            ])
+        
+        t1, t2 = datetime(2024, 1, 1, 12, 0), datetime(2024, 1, 1, 12, 30)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loader = DataLoader(os.path.join(tmp_dir, 'star.db'), bike_storage='star')
+            loader.load_bikes(snapshot(t1))
+            loader.load_bikes(snapshot(t2, name_of_s1='Renamed'))
+            
+            session = loader.db_manager.get_session()
+            try:
+                stations = session.query(Station).order_by(Station.station_key).all()
+                assert [s.station_name for s in stations] == ['Station 0', 'Renamed', 'Station 2']
+                assert stations[0].updated_at < stations[1].updated_at
+            finally:
+                session.close()
+            
+            counts = loader.get_record_counts()
+            assert counts['bike_stations'] == 6
+            
+            with loader.db_manager.engine.connect() as connection:
+                fact_columns = [row[1] for row in connection.exec_driver_sql(
+                    'PRAGMA table_info(station_availability)'
+                )]
+                assert fact_columns == ['station_key', 'ts', 'free_bikes', 'empty_slots']
+                assert connection.exec_driver_sql('SELECT COUNT(*) FROM bike_stations').scalar() == 0
+            
+            loader.db_manager.engine.dispose()
+
+    def test_rollups_incremental_and_rebuild(self):
+        """Test rollups fold each batch into its hour buckets and rebuild identically"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from loaders.data_loader import DataLoader
+        
+        def bikes(ts, free_bikes):
+            return pd.DataFrame([
+                {'network_id': 'net', 'network_name': 'Net', 'city': 'Milano', 'country': 'IT',
+                 'station_id': f's{i}', 'station_name': f'Station {i}', 'latitude': 45.0,
+                 'longitude': 9.0, 'free_bikes': free, 'empty_slots': 10 - free, 'total_slots': 10,
+                 'timestamp': ts, 'extracted_at': ts}
+                for i, free in enumerate(free_bikes)
+            ])
+        
+        def flights(ts, on_ground):
+            return pd.DataFrame([
+                {'airport_code': 'LIMC', 'icao24': f'abc{i}', 'callsign': None, 'origin_country': 'Italy',
+                 'longitude': 8.7, 'latitude': 45.6, 'altitude': 0.0, 'on_ground': grounded,
+                 'velocity': 0.0, 'heading': 0.0, 'timestamp': ts, 'extracted_at': ts}
+                for i, grounded in enumerate(on_ground)
+            ])
+        
+        def read_rollups(loader):
+            with loader.db_manager.engine.connect() as connection:
+                return {
+                    name: connection.exec_driver_sql(f'SELECT * FROM {name} ORDER BY 1, 2, 3').fetchall()
+                    for name in ('station_hourly', 'network_hourly', 'airport_hourly')
+                }
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loader = DataLoader(os.path.join(tmp_dir, 'rollups.db'), maintain_rollups=True)
+            
+            loader.load_bikes(bikes(datetime(2024, 1, 1, 12, 0), [2, 8]))
+            loader.load_bikes(bikes(datetime(2024, 1, 1, 12, 30), [4, 6]))
+            loader.load_bikes(bikes(datetime(2024, 1, 1, 13, 0), [0, 10]))
+            loader.load_flights(flights(datetime(2024, 1, 1, 12, 10), [True, False, False]))
+            loader.load_flights(flights(datetime(2024, 1, 1, 12, 40), [True, True, False]))
+            
+            incremental = read_rollups(loader)
+            
+            s0_noon = [row for row in incremental['station_hourly'] if row[1] == 's0'][0]
+            assert s0_noon[3:] == (2, 2, 4, 6, 3.0)
+            
+            network_noon = incremental['network_hourly'][0]
+            assert network_noon[2:] == (4, 20, 40, 50.0)
+            
+            assert incremental['airport_hourly'][0][2:] == (6, 3, 3)
+            
+            loader.rebuild_rollups()
+            assert read_rollups(loader) == incremental
+            
+            loader.rebuild_rollups(since=datetime(2024, 1, 1, 13, 15))
+            assert read_rollups(loader) == incremental
+            
+            # A failed write leaves the rollups untouched, so a retry counts the batch once
+            with patch.object(loader, '_store_bikes', side_effect=RuntimeError('disk full')):
+                with pytest.raises(RuntimeError):
+                    loader.load_bikes(bikes(datetime(2024, 1, 1, 13, 30), [5, 5]))
+            assert read_rollups(loader) == incremental
+            loader.db_manager.engine.dispose()
+
+
+    def test_station_index_queries_follow_loads(self):
+        """Test nearest/radius queries match a brute-force scan and track loads"""
+        import sys
+        import os
+        import tempfile
+        import numpy as np
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks
+        from transformers.bikes_transformer import BikesTransformer
+        from loaders.data_loader import DataLoader
+        from loaders.station_index import haversine_km
+        
+        df = BikesTransformer.transform(generate_bike_networks(3000, num_networks=2), columnar=True)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'index.db')
+            loader = DataLoader(db_path, station_index=True)
+            loader.load_bikes(df)
+            assert loader._station_index is None
+            index = loader.station_index
+            assert len(index) == 3000
+            
+            lat, lon = df['latitude'].iloc[0] + 0.003, df['longitude'].iloc[0] - 0.002
+            distances = haversine_km(lat, lon, df['latitude'].to_numpy(), df['longitude'].to_numpy())
+            distances[df['free_bikes'].to_numpy() < 5] = np.inf
+            
+            nearest = index.nearest(lat, lon, k=10, min_bikes=5)
+            assert np.allclose([m.distance_km for m in nearest], np.sort(distances)[:10])
+            assert all(m.free_bikes >= 5 for m in nearest)
+            
+            within = index.within_radius(lat, lon, 1.0, min_bikes=5)
+            assert len(within) == int((distances <= 1.0).sum())
+            
+            # The next snapshot empties the closest station and moves another one away
+            update = df[(df['network_id'] == nearest[0].network_id) & (df['station_id'] == nearest[0].station_id)].copy()
+            update['free_bikes'] = 0
+            moved = df[(df['network_id'] == nearest[1].network_id) & (df['station_id'] == nearest[1].station_id)].copy()
+            moved['latitude'] += 1.0
+            loader.load_bikes(pd.concat([update, moved]))
+            
+            keys = {(m.network_id, m.station_id) for m in index.nearest(lat, lon, k=10, min_bikes=5)}
+            assert (nearest[0].network_id, nearest[0].station_id) not in keys
+            assert (nearest[1].network_id, nearest[1].station_id) not in keys
+            assert len(index) == 3000
+            loader.db_manager.engine.dispose()
+            
+            # A new process seeds the index from the latest stored rows on first use
+            reopened = DataLoader(db_path, station_index=True)
+            assert reopened._station_index is None
+            assert len(reopened.station_index) == 3000
+            assert reopened.station_index.nearest(lat, lon, k=1, min_bikes=5)[0].station_id == nearest[2].station_id
+            reopened.db_manager.engine.dispose()
+
+
+    def test_postgres_copy_loader_streams_csv_chunks(self):
+        """Test COPY statements and CSV chunks sent to the driver, without a server"""
+        import sys
+        import os
+        import csv
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from loaders.postgres_loader import PostgresCopyLoader
+        
+        copied = []
+        cursor = Mock()
+        cursor.copy_expert.side_effect = lambda sql, buffer: copied.append((sql, buffer.read()))
+        connection = Mock()
+        connection.cursor.return_value = cursor
+        engine = Mock()
+        engine.raw_connection.return_value = connection
+        
+        df = pd.DataFrame({
+            'airport_code': ['LIMC', 'LIMC', 'EHAM'],
+            'callsign': ['AZA123', None, ''],
+            'on_ground': [True, False, False],
+            'altitude': [0.0, None, 1200.5],
+            'timestamp': pd.to_datetime(['2024-01-01 12:00:00', '2024-01-01 12:00:00', '2024-01-01 12:00:01.5'], format='ISO8601'),
+        })
+        
+        loader = PostgresCopyLoader(engine, chunk_size=2)
+        assert loader.load('flights', df) == 3
+        
+        assert len(copied) == 2
+        assert copied[0][0] == (
+            'COPY "flights" ("airport_code", "callsign", "on_ground", "altitude", "timestamp") '
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        rows = [row for _, body in copied for row in csv.reader(body.splitlines())]
+        assert rows[0] == ['LIMC', 'AZA123', 'True', '0.0', '2024-01-01 12:00:00.000000']
+        assert rows[1][1] == '\\N' and rows[1][3] == '\\N'
+        assert rows[2][1] == '' and rows[2][4] == '2024-01-01 12:00:01.500000'
+        connection.commit.assert_called_once()
+        connection.close.assert_called_once()
+        
+        cursor.rowcount = 1
+        assert loader.load('flights', df, conflict_keys=['airport_code', 'icao24']) == 1
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        assert statements[0] == 'CREATE TEMP TABLE "_staging_flights" (LIKE "flights" INCLUDING DEFAULTS) ON COMMIT DROP'
+        assert copied[-1][0].startswith('COPY "_staging_flights"')
+        assert statements[1].endswith('FROM "_staging_flights" ON CONFLICT ("airport_code", "icao24") DO NOTHING')
+    
+    @pytest.mark.skipif(
+        not os.environ.get('LOGISTICS_TEST_POSTGRES_URL'),
+        reason='set LOGISTICS_TEST_POSTGRES_URL to a disposable PostgreSQL database'
+    )
+    def test_postgres_backend_load(self):
+        """Test the PostgreSQL backend creates the schema and loads through COPY"""
+        import sys
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_flights_by_airport
+        from transformers.bikes_transformer import BikesTransformer
+        from transformers.flights_transformer import FlightsTransformer
+        from loaders.data_loader import DataLoader
+        from loaders.database_schema import Base
+        
+        loader = DataLoader(
+            db_url=os.environ['LOGISTICS_TEST_POSTGRES_URL'],
+            load_method='bulk',
+            maintain_rollups=True
+        )
+        Base.metadata.drop_all(loader.db_manager.engine)
+        Base.metadata.create_all(loader.db_manager.engine)
+        
+        try:
+            bikes = BikesTransformer.transform(generate_bike_networks(2000), columnar=True)
+            flights = FlightsTransformer.transform(generate_flights_by_airport(900), vectorized=True)
+            
+            assert loader.load_bikes(bikes) == 2000
+            assert loader.load_flights(flights) == 900
+            assert loader.get_record_counts() == {'bike_stations': 2000, 'flights': 900}
+            assert loader.bulk_loader.last_stats['rows'] == 900
+            
+            stored = pd.read_sql('SELECT * FROM flights ORDER BY icao24', loader.db_manager.engine)
+            assert stored['on_ground'].dtype == bool
+            assert stored['callsign'].isna().sum() == flights['callsign'].isna().sum()
+        finally:
+            Base.metadata.drop_all(loader.db_manager.engine)
+            loader.db_manager.engine.dispose()
+
+
+    def test_compact_batches_keep_types_and_load(self):
+        """Test the compact schema shrinks batches, survives artifacts and loads like the wide one"""
+        import sys
+        import tempfile
+        import numpy as np
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_flights_by_airport
+        from transformers.bikes_transformer import BikesTransformer
+        from transformers.flights_transformer import FlightsTransformer
+        from transformers.dtypes import memory_report
+        from artifacts.artifact_store import LocalArtifactStore
+        from loaders.data_loader import DataLoader
+        from sqlalchemy import select
+        
+        wide = BikesTransformer.transform(generate_bike_networks(2000, num_networks=4), columnar=True)
+        compact = BikesTransformer.compact(wide)
+        flights = FlightsTransformer.transform(generate_flights_by_airport(600), vectorized=True, compact=True)
+        
+        assert compact['city'].dtype == 'category'
+        assert compact['latitude'].dtype == np.float32
+        assert compact['free_bikes'].dtype == np.int16
+        assert flights['airport_code'].dtype == 'category' and flights['altitude'].dtype == np.float32
+        
+        report = memory_report(wide, compact)
+        assert report['compact_bytes'] < report['wide_bytes'] / 2
+        assert report['columns']['network_id'][1] < report['columns']['network_id'][0]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = LocalArtifactStore(os.path.join(tmp_dir, 'artifacts'))
+            restored = store.read_frame(store.write_frame(compact, 'run', 'bikes'))
+            assert dict(restored.dtypes) == dict(compact.dtypes)
+            
+            for storage in ('wide', 'star'):
+                loader = DataLoader(os.path.join(tmp_dir, f'{storage}.db'), load_method='bulk', bike_storage=storage)
+                assert loader.load_bikes(restored) == 2000
+                assert loader.load_flights(flights) == 600
+                
+                stored = pd.read_sql(select(loader._source('bike_stations')), loader.db_manager.engine)
+                stored = stored.sort_values(['network_id', 'station_id']).reset_index(drop=True)
+                expected = wide.sort_values(['network_id', 'station_id']).reset_index(drop=True)
+                assert list(stored['city']) == list(expected['city'])
+                assert (stored['free_bikes'] == expected['free_bikes']).all()
+                assert np.allclose(stored['latitude'], expected['latitude'], atol=1e-5)
+                
+                # float32 coordinates read back as float64 must not look like moved stations
+                if storage == 'star':
+                    later = restored.assign(timestamp=restored['timestamp'] + pd.Timedelta(minutes=5))
+                    with patch.object(loader.db_manager, 'insert', wraps=loader.db_manager.insert) as insert:
+                        loader.load_bikes(later)
+                        assert insert.call_count == 0
+                loader.db_manager.engine.dispose()
+
+
+    def test_idempotent_reloads_skip_stored_observations(self):
+        """Test re-running a load inserts nothing, leaves rollups alone and dedupes legacy rows"""
+        import sys
+        import sqlite3
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_flights_by_airport
+        from transformers.bikes_transformer import BikesTransformer
+        from transformers.flights_transformer import FlightsTransformer
+        from loaders.data_loader import DataLoader
+        from loaders.database_schema import StationHourly, AirportHourly
+        from sqlalchemy import select, func
+        
+        bikes = BikesTransformer.transform(generate_bike_networks(1000, num_networks=2), columnar=True)
+        flights = FlightsTransformer.transform(generate_flights_by_airport(600), vectorized=True)
+        
+        # Source times, not the run time, identify an observation
+        assert bikes['observed_at'].nunique() > 1
+        assert flights['observed_at'].max() <= pd.Timestamp('2024-01-01 12:00:00')
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for options in ({}, {'load_method': 'bulk', 'partition_by_day': True}):
+                db_path = os.path.join(tmp_dir, f"{options.get('load_method', 'to_sql')}.db")
+                loader = DataLoader(db_path, idempotent=True, maintain_rollups=True, **options)
+                
+                assert loader.load_bikes(bikes) == 1000
+                assert loader.load_flights(flights) == 600
+                
+                # An Airflow retry of the same batch
+                assert loader.load_bikes(bikes) == 0
+                assert loader.load_flights(flights) == 0
+                
+                # A later batch where half the stations reported again
+                later = bikes.iloc[:500].assign(observed_at=bikes['observed_at'].iloc[:500] + pd.Timedelta(minutes=1))
+                assert loader.load_bikes(pd.concat([bikes.iloc[500:], later])) == 500
+                
+                assert loader.get_record_counts() == {'bike_stations': 1500, 'flights': 600}
+                assert loader.refresh_record_counts() == {'bike_stations': 1500, 'flights': 600}
+                with loader.db_manager.engine.connect() as connection:
+                    assert connection.execute(select(func.sum(StationHourly.samples))).scalar() == 1500
+                    assert connection.execute(select(func.sum(AirportHourly.samples))).scalar() == 600
+                
+                # The unique index alone also rejects duplicates
+                assert loader._write('flights', flights) == 0
+                loader.db_manager.engine.dispose()
+            
+            # A database appended to twice before idempotent loads
+            legacy_path = os.path.join(tmp_dir, 'legacy.db')
+            legacy = DataLoader(legacy_path)
+            legacy.load_flights(flights)
+            legacy.load_flights(flights)
+            assert legacy.get_record_counts()['flights'] == 1200
+            legacy.db_manager.engine.dispose()
+            
+            upgraded = DataLoader(legacy_path, idempotent=True)
+            assert upgraded.get_record_counts()['flights'] == 600
+            assert upgraded.load_flights(flights) == 0
+            upgraded.db_manager.engine.dispose()
+            
+            connection = sqlite3.connect(legacy_path)
+            indexes = [row[1] for row in connection.execute("PRAGMA index_list('flights')")]
+            connection.close()
+            assert 'ux_flights_natural_key' in indexes
+        
+        with pytest.raises(ValueError):
+            DataLoader(os.path.join(tmp_dir, 'star.db'), idempotent=True, bike_storage='star')
+
+
+    def test_engine_registry_and_stored_record_counts(self):
+        """Test loaders share one engine and schema check, and counts come from table_counts"""
+        import sys
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_flights_by_airport
+        from transformers.bikes_transformer import BikesTransformer
+        from transformers.flights_transformer import FlightsTransformer
+        from loaders.data_loader import DataLoader
+        from loaders import database_schema
+        
+        bikes = BikesTransformer.transform(generate_bike_networks(300), columnar=True)
+        flights = FlightsTransformer.transform(generate_flights_by_airport(120), vectorized=True)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'shared.db')
+            
+            with patch.object(database_schema.Base.metadata, 'create_all', wraps=database_schema.Base.metadata.create_all) as create_all:
+                first = DataLoader(db_path, load_method='bulk')
+                second = DataLoader(db_path)
+                assert create_all.call_count == 1
+            assert first.db_manager.engine is second.db_manager.engine
+            
+            first.load_bikes(bikes)
+            second.load_flights(flights)
+            second.load_flights(flights)
+            assert first.get_record_counts() == {'bike_stations': 300, 'flights': 240}
+            
+            # Counts are read, not scanned: rows written behind the loader's back
+            # only show up after a recount
+            with first.db_manager.engine.begin() as connection:
+                connection.exec_driver_sql("DELETE FROM flights WHERE id <= 40")
+            assert first.get_record_counts()['flights'] == 240
+            assert first.refresh_record_counts() == {'bike_stations': 300, 'flights': 200}
+            assert second.get_record_counts()['flights'] == 200
+            
+            # Databases without stored counts are counted once on start-up
+            with first.db_manager.engine.begin() as connection:
+                connection.exec_driver_sql("DELETE FROM table_counts")
+            star = DataLoader(db_path, bike_storage='star')
+            assert star.get_record_counts() == {'bike_stations': 0, 'flights': 200}
+            star.load_bikes(bikes)
+            assert star.get_record_counts()['bike_stations'] == 300
+            database_schema.dispose_engines()
+
+
+    def test_parquet_archive_partitions_and_compaction(self):
+        """Test archived batches land in date/city partitions, compact and read back pruned"""
+        import sys
+        import glob
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks
+        from transformers.bikes_transformer import BikesTransformer
+        from loaders.data_loader import DataLoader
+        from loaders.parquet_sink import ParquetSink
+        
+        df = BikesTransformer.transform(generate_bike_networks(600, num_networks=3), columnar=True)
+        df['timestamp'] = pd.Timestamp('2024-01-01 12:00:00')
+        next_day = df.assign(timestamp=pd.Timestamp('2024-01-02 08:30:00'))
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = os.path.join(tmp_dir, 'archive')
+            loader = DataLoader(os.path.join(tmp_dir, 'archive.db'), archive=ParquetSink(root))
+            loader.load_bikes(df)
+            loader.load_bikes(df)
+            loader.load_bikes(next_day)
+            loader.db_manager.engine.dispose()
+            
+            sink = loader.archive
+            cities = df['city'].nunique()
+            day_one = glob.glob(os.path.join(root, 'bike_stations', 'date=2024-01-01', 'city=*', '*.parquet'))
+            assert len(day_one) == 2 * cities
+            
+            # Only closed days are compacted
+            result = sink.compact('bike_stations', before=pd.Timestamp('2024-01-02').date())
+            assert result == {'partitions': cities, 'files_merged': 2 * cities}
+            assert len(glob.glob(os.path.join(root, 'bike_stations', 'date=2024-01-01', 'city=*', '*.parquet'))) == cities
+            assert len(glob.glob(os.path.join(root, 'bike_stations', 'date=2024-01-02', 'city=*', '*.parquet'))) == cities
+            
+            city = df['city'].iloc[0]
+            subset = sink.read(
+                'bike_stations',
+                columns=['station_id', 'free_bikes', 'city'],
+                filters=[('date', '=', '2024-01-01'), ('city', '=', city)]
+            )
+            assert list(subset.columns) == ['station_id', 'free_bikes', 'city']
+            assert len(subset) == 2 * (df['city'] == city).sum()
+            assert subset['free_bikes'].sum() == 2 * df.loc[df['city'] == city, 'free_bikes'].sum()
+            
+            everything = sink.read('bike_stations')
+            assert len(everything) == 3 * len(df)
+            assert set(everything['date']) == {'2024-01-01', '2024-01-02'}
+
+
+    def test_archive_survives_retries_of_idempotent_loads(self):
+        """Test a failed archive or database write leaves the retried batch archived exactly once"""
+        import sys
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks
+        from transformers.bikes_transformer import BikesTransformer
+        from loaders.data_loader import DataLoader
+        from loaders.parquet_sink import ParquetSink
+        
+        df = BikesTransformer.transform(generate_bike_networks(200, num_networks=2), columnar=True)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loader = DataLoader(
+                os.path.join(tmp_dir, 'archive.db'),
+                archive=ParquetSink(os.path.join(tmp_dir, 'archive')),
+                idempotent=True
+            )
+            
+            # The archive write fails: nothing is stored, so the retry loads and archives the batch
+            with patch.object(ParquetSink, 'write', side_effect=OSError("disk full")):
+                with pytest.raises(OSError):
+                    loader.load_bikes(df)
+            assert loader.get_record_counts()['bike_stations'] == 0
+            assert loader.load_bikes(df) == 200
+            assert len(loader.archive.read('bike_stations')) == 200
+            
+            # The database write fails after archiving: the files are removed before the retry
+            later = df.assign(observed_at=df['observed_at'] + pd.Timedelta(minutes=30))
+            with patch.object(DataLoader, '_store_bikes', side_effect=RuntimeError("database is locked")):
+                with pytest.raises(RuntimeError):
+                    loader.load_bikes(later)
+            assert len(loader.archive.read('bike_stations')) == 200
+            assert loader.load_bikes(later) == 200
+            assert loader.load_bikes(later) == 0
+            assert len(loader.archive.read('bike_stations')) == 400
+            loader.db_manager.engine.dispose()
+
+
+    def test_streaming_load_commits_each_chunk(self):
+        """Test chunked loads commit every chunk and count all records"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks
+        from transformers.bikes_transformer import BikesTransformer
+        from loaders.data_loader import DataLoader
+        
+        networks = generate_bike_networks(1200, num_networks=2)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            loader = DataLoader(os.path.join(tmp_dir, 'stream.db'), load_method='bulk', bike_load_mode='delta')
+            seen_counts = []
+            
+            def chunks():
+                for chunk in BikesTransformer.transform_stream(networks, chunk_size=500):
+                    seen_counts.append(loader.get_record_counts()['bike_stations'])
+                    yield chunk
+            
+            assert loader.load_bikes_stream(chunks()) == 1200
+            assert seen_counts == [0, 500, 1000]
+            
+            series = loader.get_bike_timeseries()
+            assert len(series) == 1200
+            assert series['timestamp'].nunique() == 1
+            loader.db_manager.engine.dispose()
+
+
+class TestArtifacts:
+    """Test task artifact exchange"""
+    
+    def test_local_artifact_store_roundtrip(self):
+        """Test frames and raw payloads survive the store with checksums verified"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from artifacts.artifact_store import build_artifact_store
+        
+        df = pd.DataFrame({
+            'station_id': ['s1', 's2', None],
+            'latitude': [45.0, 45.1, 45.2],
+            'free_bikes': [1, 2, 3],
+            'timestamp': [datetime(2024, 1, 1, 12, 0)] * 3,
+        })
+        payload = [{'id': 'net', 'stations': [{'id': 's1'}]}]
+        
+        with tempfile.TemporaryDirectory() as root:
+            store = build_artifact_store({'type': 'local', 'root': root})
+            run_id = 'scheduled__2024-01-01T12:00:00+00:00'
+            
+            frame_ref = store.write_frame(df, run_id, 'bikes_transformed')
+            assert frame_ref['rows'] == 3
+            assert frame_ref['path'].startswith(root)
+            pd.testing.assert_frame_equal(store.read_frame(frame_ref), df)
+            
+            json_ref = store.write_json(payload, run_id, 'bikes_raw')
+            assert store.read_json(json_ref) == payload
+            
+            with open(json_ref['path'], 'a') as f:
+                f.write(' ')
+            with pytest.raises(ValueError):
+                store.read_json(json_ref)
+            
+            assert store.purge(max_age_seconds=-1) == 1
+            assert not os.path.exists(frame_ref['path'])
+
+
+    def test_config_cache_and_lazy_dag_imports(self):
+        """Test config.yaml is parsed once per change and the DAG defers heavy imports"""
+        import sys
+        import os
+        import tempfile
+        import time
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        import pipeline_config
+        from benchmarks.bench_dag_parse import DAG_PATH, heavy, parse_importtime, top_level_imports
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'config.yaml')
+            with open(path, 'w') as f:
+                f.write("pipeline:\n  mode: batch\n")
+            
+            config = pipeline_config.load_config(path, cache_dir=tmp)
+            assert config == {'pipeline': {'mode': 'batch'}}
+            assert pipeline_config.load_config(path, cache_dir=tmp) is config
+            assert os.path.exists(pipeline_config.cache_path(path, tmp))
+            
+            # A new process finds the JSON cache and never parses the YAML
+            pipeline_config._loaded.clear()
+            with patch('yaml.load') as yaml_load:
+                assert pipeline_config.load_config(path, cache_dir=tmp) == config
+                yaml_load.assert_not_called()
+            
+            with open(path, 'w') as f:
+                f.write("pipeline:\n  mode: fan_out\n")
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+            assert pipeline_config.load_config(path, cache_dir=tmp)['pipeline']['mode'] == 'fan_out'
+        
+        modules = top_level_imports(DAG_PATH)
+        assert 'airflow' in modules and 'pipeline_config' in modules
+        assert heavy(modules) == []
+        assert not any(module.split('.')[0] in ('extractors', 'transformers', 'loaders') for module in modules)
+        
+        entries = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _json\n"
+            "import time:       900 |       1020 | json\n"
+        )
+        assert entries[1] == {'module': 'json', 'depth': 0, 'self_us': 900, 'cumulative_us': 1020}
+        assert entries[0]['depth'] == 1
+
+
+    def test_read_frames_skips_failed_sources(self):
+        """Test a fan-in read loads what the mapped sources produced and skips failed ones"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from artifacts.artifact_store import build_artifact_store
+        
+        milano = pd.DataFrame({'station_id': ['s1', 's2'], 'free_bikes': [1, 2]})
+        paris = pd.DataFrame({'station_id': ['s3'], 'free_bikes': [3]})
+        
+        with tempfile.TemporaryDirectory() as root:
+            store = build_artifact_store({'type': 'local', 'root': root})
+            refs = [
+                store.write_frame(milano, 'run', 'bikes_transformed_milano'),
+                None,  # network whose extract kept failing
+                store.write_frame(milano.iloc[:0], 'run', 'bikes_transformed_empty'),
+                store.write_frame(paris, 'run', 'bikes_transformed_paris'),
+            ]
+            
+            df = store.read_frames(refs)
+            assert df['station_id'].tolist() == ['s1', 's2', 's3']
+            assert store.read_frames([None, None]) is None
+            assert store.read_frames(None) is None
+
+
+class TestDag:
+    """Test the Airflow DAG structure"""
+    
+    def test_fan_out_groups_and_fan_in_trigger_rules(self):
+        """Test each source's transform waits only on its own extract and loads run after failures"""
+        pytest.importorskip('airflow')
+        import sys
+        import copy
+        import runpy
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        import pipeline_config
+        
+        dag_path = os.path.join(os.path.dirname(__file__), '..', 'dags', 'logistics_pipeline_dag.py')
+        config = copy.deepcopy(pipeline_config.load_config(
+            os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
+        ))
+        config['pipeline']['mode'] = 'fan_out'
+        config['pipeline']['pools'] = {'citybikes': 'citybikes_api', 'opensky': 'opensky_api'}
+        
+        with patch.object(pipeline_config, 'load_config', return_value=config):
+            dag = runpy.run_path(dag_path)['dag']
+        
+        extract = dag.get_task('bike_networks.extract_bike_network')
+        transform = dag.get_task('bike_networks.transform_bike_network')
+        assert transform.upstream_task_ids == {extract.task_id}
+        assert extract.pool == 'citybikes_api'
+        assert dag.get_task('airports.extract_airport').pool == 'opensky_api'
+        
+        for load_id in ('load_bike_networks', 'load_airports'):
+            assert dag.get_task(load_id).trigger_rule == 'all_done'
+
+
+class TestMonitoring:
+    """Test pipeline instrumentation"""
+    
+    def test_stage_metrics_export(self):
+        """Test stages, extractor and loader metrics reach Prometheus text and StatsD"""
+        import sys
+        import os
+        import socket
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks
+        from benchmarks.mock_server import MockApiServer
+        from extractors.citybikes_extractor import CityBikesExtractor
+        from transformers.bikes_transformer import BikesTransformer
+        from loaders.data_loader import DataLoader
+        from monitoring.metrics import MetricsRegistry
+        
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(1)
+        
+        metrics = MetricsRegistry(prefix='test', statsd_host='127.0.0.1', statsd_port=receiver.getsockname()[1])
+        networks = generate_bike_networks(300, num_networks=2)
+        
+        with MockApiServer(networks) as server, tempfile.TemporaryDirectory() as tmp_dir:
+            extractor = CityBikesExtractor(base_url=server.url, metrics=metrics)
+            data = extractor.extract_all_networks([n['id'] for n in networks])
+            extractor.close()
+            
+            with metrics.stage('transform', source='bikes', rows_in=300) as record:
+                df = BikesTransformer.transform(data, columnar=True)
+                record.rows_out = len(df)
+            
+            loader = DataLoader(os.path.join(tmp_dir, 'metrics.db'), metrics=metrics)
+            loader.load_bikes(df)
+            loader.db_manager.engine.dispose()
+            
+            with pytest.raises(ValueError):
+                with metrics.stage('load', source='flights'):
+                    raise ValueError('boom')
+            
+            path = os.path.join(tmp_dir, 'metrics', 'task.prom')
+            metrics.write_prometheus(path)
+            with open(path) as f:
+                text = f.read()
+        
+        assert metrics.get('http_requests_total', host='127.0.0.1', status=200) == 2
+        assert metrics.get('http_bytes_downloaded_total', host='127.0.0.1') > 0
+        assert metrics.get('stage_rows_out_total', stage='transform', source='bikes') == 300
+        assert metrics.get('stage_rows_out_total', stage='db_write', source='bikes') == 300
+        assert metrics.get('stage_runs_total', stage='load', source='bikes') == 1
+        assert metrics.get('stage_failures_total', stage='load', source='flights') == 1
+        
+        assert '# TYPE test_stage_seconds_total counter' in text
+        assert 'test_stage_rows_out_total{source="bikes",stage="load"} 300.0' in text
+        assert 'test_stage_peak_rss_bytes{source="bikes",stage="load"}' in text
+        
+        datagram = receiver.recv(1024).decode()
+        assert datagram.startswith('test.http_request_seconds_total.127_0_0_1:') and datagram.endswith('|c')
+        receiver.close()
+
+
+class TestPoller:
+    """Test the continuous poller"""
+    
+    def test_poller_cycles_and_backpressure(self):
+        """Test sources poll on their own intervals, block when loading lags and drain on stop"""
+        import sys
+        import os
+        import tempfile
+        import time
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks, generate_state_vectors
+        from benchmarks.mock_server import MockApiServer
+        from loaders.data_loader import DataLoader
+        from poller import Poller
+        
+        networks = generate_bike_networks(100, num_networks=2)
+        states = generate_state_vectors(50, (8.5, 45.4, 8.8, 45.7))
+        
+        with MockApiServer(networks, states) as server, tempfile.TemporaryDirectory() as tmp_dir:
+            config = {
+                'data_sources': {
+                    'citybikes': {'enabled': True, 'cities': [n['id'] for n in networks]},
+                    'opensky': {'enabled': True, 'airports': [{'code': 'LIMC', 'bbox': [8.5, 45.4, 8.8, 45.7]}]},
+                },
+                'extraction': {'max_retries': 1},
+                'database': {'path': os.path.join(tmp_dir, 'poller.db'), 'load_method': 'bulk'},
+                'poller': {'bikes_interval_seconds': 0.05, 'flights_interval_seconds': 0.2, 'queue_size': 1},
+            }
+            
+            poller = Poller(config)
+            poller.bikes_extractor.base_url = server.url
+            poller.flights_extractor.base_url = server.url
+            
+            original_load = DataLoader.load_bikes
+            
+            def slow_load(loader, df):
+                time.sleep(0.15)
+                return original_load(loader, df)
+            
+            with patch.object(DataLoader, 'load_bikes', slow_load):
+                poller.start()
+                time.sleep(1.0)
+                poller.stop(timeout=5)
+            
+            assert poller.cycles['bikes'] > poller.cycles['flights'] >= 2
+            assert poller.enqueue_waits['bikes'] > 0
+            assert poller.dropped == {'bikes': 0, 'flights': 0}
+            assert poller.queue.empty()
+            assert poller.loaded['bikes'] >= 2
+            
+            counts = poller.loader.get_record_counts()
+            assert counts['flights'] == 50 * poller.loaded['flights']
+            assert counts['bike_stations'] == 100 * poller.loaded['bikes']
+
+    def test_poller_revalidates_cached_responses(self):
+        """Test the poller requests every source each cycle even with a cache TTL longer than the interval"""
+        import sys
+        import os
+        import tempfile
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+        
+        from benchmarks.generators import generate_bike_networks
+        from benchmarks.mock_server import MockApiServer
+        from poller import Poller
+        
+        networks = generate_bike_networks(20, num_networks=2)
+        
+        with MockApiServer(networks, []) as server, tempfile.TemporaryDirectory() as tmp_dir:
+            config = {
+                'data_sources': {
+                    'citybikes': {'enabled': True, 'cities': [n['id'] for n in networks]},
+                    'opensky': {'enabled': False, 'airports': []},
+                },
+                'extraction': {
+                    'max_retries': 1,
+                    'cache': {'enabled': True, 'path': os.path.join(tmp_dir, 'cache'), 'ttl_seconds': 60},
+                },
+                'database': {'path': os.path.join(tmp_dir, 'poller.db')},
+                'poller': {'bikes_interval_seconds': 10},
+            }
+            
+            poller = Poller(config)
+            poller.bikes_extractor.base_url = server.url
+            
+            assert len(poller.poll_bikes()) == 20
+            assert len(poller.poll_bikes()) == 20
+            assert server.requests == 4
+            assert poller.bikes_extractor.cache.stats()['hits'] == 0
+            poller.stop(timeout=5)
+
+    def test_poller_stop_hands_over_or_counts_waiting_batch(self):
+        """Test a batch waiting for the loader at stop is still queued if room frees up, else counted as dropped"""
+        import sys
+        import os
+        import tempfile
+        import threading
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+        
+        from poller import Poller
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = {
+                'data_sources': {'citybikes': {'enabled': False}, 'opensky': {'enabled': False}},
+                'database': {'path': os.path.join(tmp_dir, 'poller.db')},
+                'poller': {'queue_size': 1},
+            }
+            poller = Poller(config)
+            batch = pd.DataFrame({'station_id': ['s1']})
+            poller.queue.put(('bikes', batch))
+            poller.stop_event.set()
+            
+            # No loader is running to take it: the batch is dropped and counted
+            poller._enqueue('bikes', batch, 0.05)
+            assert poller.dropped['bikes'] == 1
+            assert poller.enqueue_waits['bikes'] == 0
+            
+            # A loader still draining takes it, however long that takes
+            poller._loader_thread = threading.Timer(0.3, poller.queue.get)
+            poller._loader_thread.start()
+            poller._enqueue('flights', batch, 0.05)
+            assert poller.queue.get_nowait()[0] == 'flights'
+            assert poller.dropped['flights'] == 0
+            poller.stop(timeout=5)